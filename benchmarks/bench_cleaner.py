@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compare the BeautifulSoup clean path with the streaming extractor on large,
+marketing-style newsletter emails.
+
+Usage:
+    python benchmarks/bench_cleaner.py
+    python benchmarks/bench_cleaner.py --emails 200 --stories 150 --max-chars 3000
+    python benchmarks/bench_cleaner.py --emails 400 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from processing.cleaner import HTMLCleaner  # noqa: E402
+
+WORDS = (
+    "model training inference transformer dataset benchmark agent latency gpu "
+    "open-source release paper fine-tuning evaluation retrieval context tokens "
+    "startup funding launch research pipeline deployment quantization vision"
+).split()
+
+
+def marketing_email(rng: random.Random, stories: int) -> str:
+    """A table-heavy HTML email with a big style block, tracking pixels and footer"""
+    css = "\n".join(f".c{i} {{ color: #{i:06x}; padding: {i % 9}px; }}" for i in range(400))
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<style>{css}</style>",
+        "<script>window.dataLayer = window.dataLayer || []; function gtag(){dataLayer.push(arguments);}</script>",
+        "</head><body>",
+        "<header><a href='https://example.com/view'>View in browser</a></header>",
+        "<nav><a href='#'>Home</a> | <a href='#'>Archive</a> | <a href='#'>Sponsor</a></nav>",
+        "<table width='100%' cellpadding='0' cellspacing='0'>",
+    ]
+    for i in range(stories):
+        title = " ".join(rng.choice(WORDS) for _ in range(8)).title()
+        body = " ".join(rng.choice(WORDS) for _ in range(60))
+        parts.append(
+            f"<tr><td class='c{i % 400}' style='font-family: Arial; font-size: 14px'>"
+            f"<h2>{title}</h2><p>{body} &amp; more&nbsp;details</p>"
+            f"<a href='https://track.example.com/c/{i}?utm_source=newsletter'>Read more &rarr;</a>"
+            f"<img src='https://track.example.com/open/{i}.gif' width='1' height='1'>"
+            f"<!-- story {i} --></td></tr>"
+        )
+    parts.append("</table>")
+    parts.append("<footer>You are receiving this email because you subscribed. <a href='#'>Unsubscribe</a></footer>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def bench(fn, emails, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for html in emails:
+            fn(html)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML cleaning paths")
+    parser.add_argument("--emails", type=int, default=50, help="Number of emails (default: 50)")
+    parser.add_argument("--stories", type=int, default=120, help="Stories per email (default: 120)")
+    parser.add_argument("--max-chars", type=int, default=3000, help="Truncation budget (default: 3000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions, best time reported (default: 3)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes for the parallel path (default: all cores)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    emails = [marketing_email(rng, args.stories) for _ in range(args.emails)]
+    total_mb = sum(len(e) for e in emails) / 1_000_000
+
+    def soup_path(html):
+        return HTMLCleaner.truncate(HTMLCleaner.clean(html), args.max_chars)
+
+    def stream_path(html):
+        return HTMLCleaner.extract(html, args.max_chars)
+
+    mismatches = sum(soup_path(html) != stream_path(html) for html in emails)
+
+    soup_time = bench(soup_path, emails, args.repeat)
+    stream_time = bench(stream_path, emails, args.repeat)
+
+    # Start the pool outside the timed runs; it is reused for the whole process
+    HTMLCleaner.extract_many(emails[:args.workers] * 2, args.max_chars, workers=args.workers)
+    parallel_time = bench(lambda batch: HTMLCleaner.extract_many(batch, args.max_chars, workers=args.workers),
+                          [emails], args.repeat)
+
+    print(f"{args.emails} emails, {total_mb:.1f} MB of HTML, max_chars={args.max_chars}")
+    print(f"  BeautifulSoup clean+truncate: {soup_time * 1000:8.1f} ms ({soup_time / args.emails * 1000:.2f} ms/email)")
+    print(f"  streaming extract:            {stream_time * 1000:8.1f} ms ({stream_time / args.emails * 1000:.2f} ms/email)")
+    print(f"  parallel extract ({args.workers} procs): {parallel_time * 1000:6.1f} ms ({parallel_time / args.emails * 1000:.2f} ms/email)")
+    print(f"  speedup: {soup_time / stream_time:.1f}x streaming, {stream_time / parallel_time:.1f}x more in parallel, "
+          f"output mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
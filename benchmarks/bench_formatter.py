@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Compare the old string-concatenation newsletter renderer with the compiled,
+escaping renderer on digests with thousands of items.
+
+Usage:
+    python benchmarks/bench_formatter.py
+    python benchmarks/bench_formatter.py --sections 5 --items 2000 --repeat 5
+"""
+import argparse
+import io
+import random
+import sys
+import time
+from html import escape
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from processing.formatter import NewsletterFormatter  # noqa: E402
+
+WORDS = (
+    "model training inference transformer dataset benchmark agent latency gpu "
+    "open-source release paper fine-tuning evaluation retrieval context tokens "
+    "startup funding launch research pipeline deployment quantization vision"
+).split()
+
+
+def make_digest(rng: random.Random, sections: int, items: int) -> dict:
+    """A digest with `items` stories per section, some with markup-like text to escape"""
+    return {
+        "headline": "ML Daily <Digest> & friends",
+        "date": "2026-10-18",
+        "summary": " ".join(rng.choice(WORDS) for _ in range(40)),
+        "sections": [
+            {
+                "title": f"Section {s}",
+                "items": [
+                    {
+                        "title": " ".join(rng.choice(WORDS) for _ in range(8)).title(),
+                        "snippet": " ".join(rng.choice(WORDS) for _ in range(40)) + " <b>&</b>",
+                        "source": rng.choice(["Daily", "Weekly", "Import AI"]),
+                        "url": f"https://example.com/{s}/{i}?utm_source=x&id={i}",
+                    }
+                    for i in range(items)
+                ],
+            }
+            for s in range(sections)
+        ],
+    }
+
+
+def concat_render(data: dict, esc=str) -> str:
+    """The previous renderer: f-strings grown with += inside the item loop (unescaped unless `esc` is given)"""
+    html = f"<html><body><h1>{esc(data['headline'])}</h1><div class=\"date\">{esc(data['date'])}</div>" \
+           f"<p><strong>{esc(data['summary'])}</strong></p>"
+    for section in data["sections"]:
+        section_html = f'<div class="section"><h2>{esc(section["title"])}</h2>'
+        for item in section["items"]:
+            section_html += f"""
+                <div class="item">
+                    <div class="item-title"><a href="{esc(item['url'])}">{esc(item['title'])}</a></div>
+                    <div class="item-snippet">{esc(item['snippet'])}</div>
+                    <div class="source">Source: {esc(item['source'])}</div>
+                </div>
+                """
+        html += section_html + '</div>'
+    return html + "</body></html>"
+
+
+def bench(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark newsletter rendering")
+    parser.add_argument("--sections", type=int, default=5, help="Sections per digest (default: 5)")
+    parser.add_argument("--items", type=int, default=1000, help="Items per section (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions, best time reported (default: 3)")
+    args = parser.parse_args()
+
+    data = make_digest(random.Random(42), args.sections, args.items)
+    cache = NewsletterFormatter.cache
+
+    def compiled():
+        cache.clear()
+        NewsletterFormatter.to_html(data)
+
+    def streamed():
+        cache.clear()
+        NewsletterFormatter.write_html(data, io.StringIO())
+
+    concat_time = bench(lambda: concat_render(data), args.repeat)
+    escaped_concat_time = bench(lambda: concat_render(data, escape), args.repeat)
+    compiled_time = bench(compiled, args.repeat)
+    text_time = bench(lambda: (cache.clear(), NewsletterFormatter.to_text(data)), args.repeat)
+    NewsletterFormatter.to_html(data)
+    cached_time = bench(lambda: NewsletterFormatter.to_html(data), args.repeat)
+    size_mb = len(NewsletterFormatter.to_html(data)) / 1_000_000
+
+    print(f"{args.sections} sections x {args.items} items, {size_mb:.1f} MB of HTML")
+    print(f"  string concatenation (unescaped): {concat_time * 1000:8.1f} ms")
+    print(f"  string concatenation (escaped):   {escaped_concat_time * 1000:8.1f} ms")
+    print(f"  compiled template (escaped):      {compiled_time * 1000:8.1f} ms")
+    print(f"  plain-text alternative:           {text_time * 1000:8.1f} ms")
+    print(f"  compiled, streamed to a file:     {bench(streamed, args.repeat) * 1000:8.1f} ms")
+    print(f"  cached (digest key hit):          {cached_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
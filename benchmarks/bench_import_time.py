@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark for the API and CLI entry points.
+
+Each module is imported in a fresh interpreter (so nothing is cached in
+sys.modules) and timed with `python -X importtime`. Run it before and after
+changes that touch module-level imports to catch cold-start regressions.
+
+Usage:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 10 --top 15
+    python benchmarks/bench_import_time.py --json bench_output.txt
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+src_path = project_root / "src"
+
+ENTRY_POINTS = [
+    "api.app",          # FastAPI app (uvicorn / run_server.py)
+    "run_pipeline",     # CLI pipeline run (GitHub Actions)
+    "run_server",       # combined scheduler + API
+    "graph.pipeline",   # LangGraph builder on its own
+]
+
+
+def measure(module: str):
+    """Import `module` in a fresh interpreter; return (total seconds, {module: cumulative seconds})"""
+    env = dict(os.environ)
+    env.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(src_path),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # "import time:      self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        try:
+            cumulative[parts[2].strip()] = int(parts[1]) / 1_000_000
+        except ValueError:
+            continue  # header row
+    return cumulative.get(module, sum(cumulative.values())), cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of entry points")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per entry point (default: 5)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list (default: 10)")
+    parser.add_argument("--json", type=str, help="Also write results as JSON to this path")
+    args = parser.parse_args()
+
+    report = {}
+    for module in ENTRY_POINTS:
+        runs = [measure(module) for _ in range(args.repeat)]
+        totals = [total for total, _ in runs]
+        slowest = sorted(runs[-1][1].items(), key=lambda kv: kv[1], reverse=True)
+        # Only report top-level packages, nested entries are already in their parent's total
+        top_level = [(name, secs) for name, secs in slowest if "." not in name.strip()][:args.top]
+        report[module] = {
+            "median_seconds": statistics.median(totals),
+            "min_seconds": min(totals),
+            "max_seconds": max(totals),
+            "slowest_imports": top_level,
+        }
+
+        print(f"\n{'=' * 60}")
+        print(f"{module}: median {report[module]['median_seconds'] * 1000:.0f} ms "
+              f"(min {min(totals) * 1000:.0f} ms, max {max(totals) * 1000:.0f} ms, n={args.repeat})")
+        print(f"{'=' * 60}")
+        for name, secs in top_level:
+            print(f"  {secs * 1000:8.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import List, Optional
+import json
+import queue
+import threading
 import uvicorn
 
 from database.connection import get_db_session
@@ -22,7 +25,7 @@ app.add_middleware(
 )
 
 # Custom exception handler to match frontend error format
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi import Request
 
 @app.exception_handler(HTTPException)
@@ -107,8 +110,14 @@ async def get_news(session: Session = Depends(get_db_session)):
     ]
 
 @app.post("/api/newsletter/trigger")
-async def trigger_newsletter():
-    """Manually trigger newsletter generation (admin endpoint)"""
+async def trigger_newsletter(stream: bool = False):
+    """Manually trigger newsletter generation (admin endpoint).
+    
+    With ?stream=true the response is NDJSON: one {"type": "section"} line per
+    digest section as soon as it is generated, then a final "done" or "error" line.
+    """
+    if stream:
+        return StreamingResponse(_stream_pipeline(), media_type="application/x-ndjson")
     try:
         pipeline = NewsletterPipeline()
         pipeline.run()
@@ -116,6 +125,24 @@ async def trigger_newsletter():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _stream_pipeline():
+    """Run the pipeline in a worker thread and yield its sections as NDJSON lines"""
+    events = queue.Queue()
+    
+    def run():
+        try:
+            NewsletterPipeline().run(on_section=lambda section: events.put({"type": "section", "section": section}))
+            events.put({"type": "done", "message": "Newsletter generated and sent"})
+        except Exception as e:
+            events.put({"type": "error", "error": str(e)})
+    
+    threading.Thread(target=run, name="newsletter-trigger", daemon=True).start()
+    while True:
+        event = events.get()
+        yield json.dumps(event, ensure_ascii=False) + "\n"
+        if event["type"] != "section":
+            return
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -38,4 +38,48 @@ class NewsItem(Base):
     image_url = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    newsletter = relationship("Newsletter", back_populates="news_items")
\ No newline at end of file
+    newsletter = relationship("Newsletter", back_populates="news_items")
+
+class SyncCheckpoint(Base):
+    __tablename__ = 'sync_checkpoints'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+    history_id = Column(String(50), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SenderFingerprint(Base):
+    __tablename__ = 'sender_fingerprints'
+    __table_args__ = (UniqueConstraint('sender', 'fingerprint'),)
+    
+    id = Column(Integer, primary_key=True)
+    sender = Column(String(255), nullable=False, index=True)
+    fingerprint = Column(String(32), nullable=False)
+    seen_count = Column(Integer, default=1, nullable=False)  # issues containing this segment
+    last_seen = Column(DateTime, default=datetime.utcnow)
+
+class BoilerplateIssue(Base):
+    __tablename__ = 'boilerplate_issues'
+    
+    id = Column(Integer, primary_key=True)
+    message_id = Column(String(255), unique=True, nullable=False)
+    sender = Column(String(255), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class EmailExtraction(Base):
+    __tablename__ = 'email_extractions'
+    __table_args__ = (UniqueConstraint('message_id', 'content_hash'),)
+    
+    id = Column(Integer, primary_key=True)
+    message_id = Column(String(255), nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False)  # email content + model + prompt version
+    items = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ItemFingerprint(Base):
+    __tablename__ = 'item_fingerprints'
+    
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String(32), unique=True, nullable=False)  # normalised url or title hash
+    first_published = Column(DateTime, default=datetime.utcnow, index=True)
+    last_published = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
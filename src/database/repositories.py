@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
-from database.models import Subscriber, Newsletter, NewsItem
+from database.models import Subscriber, Newsletter, NewsItem, SyncCheckpoint, SenderFingerprint, BoilerplateIssue, EmailExtraction, ItemFingerprint
 
 class SubscriberRepository:
     def __init__(self, session: Session):
@@ -64,4 +64,181 @@ class NewsItemRepository:
         return self.session.query(NewsItem)\
             .order_by(NewsItem.created_at.desc())\
             .limit(limit)\
-            .all()
\ No newline at end of file
+            .all()
+    
+    def get_labelled_texts(self, limit: int = 5000) -> List[Tuple[str, str]]:
+        """(title + snippet, category) of the most recent categorised items, for training local models"""
+        rows = self.session.query(NewsItem.title, NewsItem.snippet, NewsItem.category)\
+            .filter(NewsItem.category.isnot(None))\
+            .order_by(NewsItem.created_at.desc())\
+            .limit(limit)\
+            .all()
+        return [(f"{row.title or ''} {row.snippet or ''}", row.category) for row in rows]
+
+class SyncCheckpointRepository:
+    def __init__(self, session: Session):
+        self.session = session
+    
+    def get_history_id(self, name: str) -> Optional[str]:
+        checkpoint = self.session.query(SyncCheckpoint).filter_by(name=name).first()
+        return checkpoint.history_id if checkpoint else None
+    
+    def save_history_id(self, name: str, history_id: str) -> SyncCheckpoint:
+        """Insert or advance the checkpoint stored under `name`"""
+        checkpoint = self.session.query(SyncCheckpoint).filter_by(name=name).first()
+        if checkpoint is None:
+            checkpoint = SyncCheckpoint(name=name, history_id=str(history_id))
+            self.session.add(checkpoint)
+        else:
+            checkpoint.history_id = str(history_id)
+            checkpoint.updated_at = datetime.utcnow()
+        self.session.flush()
+        return checkpoint
+
+class SenderFingerprintRepository:
+    def __init__(self, session: Session):
+        self.session = session
+    
+    def get_counts(self, senders: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """Issue counts per segment fingerprint for each sender, in one query"""
+        senders = list(set(senders))
+        counts: Dict[str, Dict[str, int]] = {sender: {} for sender in senders}
+        if not senders:
+            return counts
+        rows = self.session.query(SenderFingerprint.sender, SenderFingerprint.fingerprint, SenderFingerprint.seen_count)\
+            .filter(SenderFingerprint.sender.in_(senders))\
+            .all()
+        for sender, fingerprint, seen_count in rows:
+            counts[sender][fingerprint] = seen_count
+        return counts
+    
+    def get_learned_ids(self, message_ids: Iterable[str]) -> Set[str]:
+        """Message ids whose segments have already been counted"""
+        message_ids = list(set(message_ids))
+        if not message_ids:
+            return set()
+        rows = self.session.query(BoilerplateIssue.message_id)\
+            .filter(BoilerplateIssue.message_id.in_(message_ids))\
+            .all()
+        return {row[0] for row in rows}
+    
+    def record(self, issues: Dict[str, str], fingerprints: Dict[str, Dict[str, int]]) -> None:
+        """Mark `issues` (message id -> sender) as learned and add their fingerprint counts"""
+        now = datetime.utcnow()
+        existing = {}
+        if fingerprints:
+            rows = self.session.query(SenderFingerprint)\
+                .filter(SenderFingerprint.sender.in_(list(fingerprints)))\
+                .all()
+            existing = {(row.sender, row.fingerprint): row for row in rows}
+        for sender, counts in fingerprints.items():
+            for fingerprint, count in counts.items():
+                row = existing.get((sender, fingerprint))
+                if row is None:
+                    self.session.add(SenderFingerprint(
+                        sender=sender, fingerprint=fingerprint, seen_count=count, last_seen=now
+                    ))
+                else:
+                    row.seen_count += count
+                    row.last_seen = now
+        for message_id, sender in issues.items():
+            self.session.add(BoilerplateIssue(message_id=message_id, sender=sender, created_at=now))
+        self.session.flush()
+    
+    def prune(self, older_than: datetime) -> int:
+        """Forget fingerprints and issues not seen since `older_than`"""
+        removed = self.session.query(SenderFingerprint)\
+            .filter(SenderFingerprint.last_seen < older_than)\
+            .delete(synchronize_session=False)
+        self.session.query(BoilerplateIssue)\
+            .filter(BoilerplateIssue.created_at < older_than)\
+            .delete(synchronize_session=False)
+        return removed
+
+class EmailExtractionRepository:
+    def __init__(self, session: Session):
+        self.session = session
+    
+    def get_many(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[dict]]:
+        """Stored items for each (message_id, content_hash) found, in one query"""
+        wanted = set(keys)
+        if not wanted:
+            return {}
+        rows = self.session.query(EmailExtraction)\
+            .filter(EmailExtraction.message_id.in_({message_id for message_id, _ in wanted}))\
+            .all()
+        return {
+            (row.message_id, row.content_hash): row.items
+            for row in rows if (row.message_id, row.content_hash) in wanted
+        }
+    
+    def save_many(self, extractions: List[Tuple[str, str, List[dict]]]) -> None:
+        """Store (message_id, content_hash, items) rows, replacing any for the same key"""
+        if not extractions:
+            return
+        rows = {
+            (row.message_id, row.content_hash): row
+            for row in self.session.query(EmailExtraction)
+            .filter(EmailExtraction.message_id.in_({message_id for message_id, _, _ in extractions}))
+            .all()
+        }
+        for message_id, content_hash, items in extractions:
+            row = rows.get((message_id, content_hash))
+            if row is None:
+                rows[(message_id, content_hash)] = row = EmailExtraction(
+                    message_id=message_id, content_hash=content_hash, items=items
+                )
+                self.session.add(row)
+            else:
+                row.items = items
+        self.session.flush()
+    
+    def prune(self, older_than: datetime) -> int:
+        return self.session.query(EmailExtraction)\
+            .filter(EmailExtraction.created_at < older_than)\
+            .delete(synchronize_session=False)
+
+class ItemFingerprintRepository:
+    def __init__(self, session: Session):
+        self.session = session
+    
+    def find_recent(self, fingerprints: Iterable[str], since: datetime) -> Set[str]:
+        """Fingerprints among `fingerprints` first published at or after `since`, in one query"""
+        wanted = set(fingerprints)
+        if not wanted:
+            return set()
+        rows = self.session.query(ItemFingerprint.fingerprint)\
+            .filter(ItemFingerprint.fingerprint.in_(wanted))\
+            .filter(ItemFingerprint.first_published >= since)\
+            .all()
+        return {row.fingerprint for row in rows}
+    
+    def record(self, fingerprints: Iterable[str], published_at: datetime) -> None:
+        """Mark fingerprints as published at `published_at`, adding any not seen before.
+        
+        The first-published date of a known fingerprint is kept, so a story that
+        keeps coming back still leaves the window it was first published in.
+        """
+        wanted = set(fingerprints)
+        if not wanted:
+            return
+        existing = {
+            row.fingerprint: row
+            for row in self.session.query(ItemFingerprint)
+            .filter(ItemFingerprint.fingerprint.in_(wanted))
+            .all()
+        }
+        for fingerprint in wanted:
+            row = existing.get(fingerprint)
+            if row is None:
+                self.session.add(ItemFingerprint(
+                    fingerprint=fingerprint, first_published=published_at, last_published=published_at
+                ))
+            elif row.last_published is None or row.last_published < published_at:
+                row.last_published = published_at
+        self.session.flush()
+    
+    def prune(self, older_than: datetime) -> int:
+        return self.session.query(ItemFingerprint)\
+            .filter(ItemFingerprint.first_published < older_than)\
+            .delete(synchronize_session=False)
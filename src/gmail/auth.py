@@ -1,19 +1,32 @@
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from datetime import datetime, timedelta
+from typing import Optional, TYPE_CHECKING
 import os
+import threading
 # import sys
 # sys.path.append('../..')
 # print(sys.path) # Adjust the path as necessary to import config.settings
 from config.settings import settings
 
+# The Google client libraries take seconds to import; they are imported on
+# first use so that importing the API or the graph stays cheap.
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+
 class GmailAuthenticator:
     def __init__(self):
         self.creds = None
         
     def authenticate(self):
         """Authenticate and return Gmail service"""
+        return build_gmail_service(self.get_credentials())
+    
+    def get_credentials(self) -> "Credentials":
+        """Load (and if needed refresh or create) OAuth credentials"""
+        from google.oauth2.credentials import Credentials
+        from google.auth.transport.requests import Request
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        
         if os.path.exists(settings.GMAIL_TOKEN_FILE):
             self.creds = Credentials.from_authorized_user_file(settings.GMAIL_TOKEN_FILE, settings.GMAIL_SCOPES)
 
@@ -28,12 +41,98 @@ class GmailAuthenticator:
                 )
                 self.creds = flow.run_local_server(port=0)
             
-            print("Saving credentials to", settings.GMAIL_TOKEN_FILE)
-            
-            with open(settings.GMAIL_TOKEN_FILE, 'w') as token:
-                token.write(self.creds.to_json())
+            save_credentials(self.creds)
         
-        return build('gmail', 'v1', credentials=self.creds)
+        return self.creds
+    
+    def authorized_http(self) -> "AuthorizedHttp":
+        """Fresh authorized Http for one worker thread (httplib2 is not thread-safe)"""
+        return build_authorized_http(self.creds)
+
+
+def build_authorized_http(creds: "Credentials") -> "AuthorizedHttp":
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+    
+    return AuthorizedHttp(creds, http=httplib2.Http())
+
+
+def save_credentials(creds: "Credentials"):
+    print("Saving credentials to", settings.GMAIL_TOKEN_FILE)
+    
+    with open(settings.GMAIL_TOKEN_FILE, 'w') as token:
+        token.write(creds.to_json())
+
+
+def build_gmail_service(creds: "Credentials"):
+    """Build the Gmail client from the discovery document bundled with
+    google-api-python-client, so no discovery request goes over the network"""
+    from googleapiclient.discovery import build
+    
+    return build('gmail', 'v1', credentials=creds, static_discovery=True, cache_discovery=False)
+
+
+class GmailServiceProvider:
+    """Thread-safe, process-wide holder of Gmail credentials and the built service.
+    
+    Credentials are loaded once and refreshed only when they are within
+    GMAIL_TOKEN_REFRESH_MARGIN_SECONDS of expiry. Refreshing updates the
+    credentials in place, so the cached service keeps working.
+    """
+    
+    def __init__(self, authenticator: GmailAuthenticator = None, refresh_margin_seconds: int = None):
+        self.authenticator = authenticator or GmailAuthenticator()
+        if refresh_margin_seconds is None:
+            refresh_margin_seconds = settings.GMAIL_TOKEN_REFRESH_MARGIN_SECONDS
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self._creds: Optional["Credentials"] = None
+        self._service = None
+        self._lock = threading.RLock()
+    
+    def get_credentials(self) -> "Credentials":
+        with self._lock:
+            if self._creds is None:
+                self._creds = self.authenticator.get_credentials()
+            elif self._near_expiry(self._creds) and self._creds.refresh_token:
+                from google.auth.transport.requests import Request
+                self._creds.refresh(Request())
+                save_credentials(self._creds)
+            return self._creds
+    
+    def get_service(self):
+        with self._lock:
+            creds = self.get_credentials()
+            if self._service is None:
+                self._service = build_gmail_service(creds)
+            return self._service
+    
+    def authorized_http(self) -> "AuthorizedHttp":
+        """Fresh authorized Http for one worker thread (httplib2 is not thread-safe)"""
+        return build_authorized_http(self.get_credentials())
+    
+    def _near_expiry(self, creds: "Credentials") -> bool:
+        if creds.expiry is None:
+            return not creds.valid
+        # google-auth keeps expiry as naive UTC
+        return creds.expiry - datetime.utcnow() < self.refresh_margin
+
+
+_provider: Optional[GmailServiceProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_service_provider() -> GmailServiceProvider:
+    """Get or create the process-wide Gmail service provider lazily"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = GmailServiceProvider()
+        return _provider
+
+
+def get_gmail_service():
+    """Shared Gmail service; authenticates on first use only"""
+    return get_service_provider().get_service()
     
 if __name__ == "__main__":
     authenticator = GmailAuthenticator()
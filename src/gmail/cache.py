@@ -0,0 +1,50 @@
+import hashlib
+import json
+from typing import Dict, Optional
+
+from cache.disk import DiskCache
+from config.settings import settings
+
+
+class RawMessageCache:
+    """Local store of fetched (uncleaned) messages, keyed by Gmail message id.
+
+    Bodies are content-addressed by their SHA-256, so the same newsletter
+    body delivered under several message ids is only stored once.
+    """
+
+    def __init__(self, store: DiskCache):
+        self.store = store
+
+    @classmethod
+    def from_settings(cls) -> "RawMessageCache":
+        return cls(DiskCache(
+            settings.RAW_MESSAGE_CACHE_PATH,
+            max_bytes=settings.RAW_MESSAGE_CACHE_MAX_MB * 1024 * 1024,
+            ttl_seconds=settings.RAW_MESSAGE_CACHE_TTL_HOURS * 3600,
+        ))
+
+    @staticmethod
+    def body_hash(body: str) -> str:
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def get(self, msg_id: str) -> Optional[Dict]:
+        """Return the cached email dict, or None on a miss"""
+        meta = self.store.get(f"msg:{msg_id}")
+        if meta is None:
+            return None
+        email = json.loads(meta)
+        body = self.store.get(f"body:{email.pop('body_hash')}")
+        if body is None:
+            # Body was evicted independently of its metadata
+            return None
+        email["body"] = body
+        return email
+
+    def put(self, email: Dict) -> None:
+        digest = self.body_hash(email["body"])
+        if not self.store.contains(f"body:{digest}"):
+            self.store.set(f"body:{digest}", email["body"])
+        meta = {key: value for key, value in email.items() if key != "body"}
+        meta["body_hash"] = digest
+        self.store.set(f"msg:{email['id']}", json.dumps(meta))
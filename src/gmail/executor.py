@@ -0,0 +1,297 @@
+import random
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+# Gmail per-method quota costs: https://developers.google.com/gmail/api/reference/quota
+QUOTA_UNITS = {
+    'gmail.users.messages.get': 5,
+    'gmail.users.messages.list': 5,
+    'gmail.users.messages.modify': 5,
+    'gmail.users.messages.send': 100,
+    'gmail.users.history.list': 2,
+    'gmail.users.labels.list': 1,
+    'gmail.users.getProfile': 1,
+}
+DEFAULT_UNITS = 5
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+# Gmail rejects batch HTTP requests with more parts than this
+MAX_BATCH_SIZE = 100
+
+
+class TokenBucket:
+    """Blocking token bucket refilled at `rate` units per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units: float) -> float:
+        """Take `units` tokens, sleeping until they are available. Returns seconds waited."""
+        # A request larger than the bucket would wait forever; let it drain the bucket instead
+        units = min(units, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= units:
+                    self._tokens -= units
+                    return waited
+                delay = (units - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class GmailRequestExecutor:
+    """Shared, rate-limited executor for Gmail API calls.
+
+    Calls are throttled by a token bucket sized to Gmail quota units, retried
+    with exponential backoff and full jitter on 429/5xx/rate-limit 403s (only
+    on outright rejections for non-idempotent calls), and
+    can be fanned out over a bounded thread pool. Per-method latency and
+    retry counts are recorded in `metrics()`.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        units_per_second: float,
+        max_retries: int,
+        base_delay: float = 0.5,
+        max_delay: float = 32.0,
+        http_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # httplib2 connections are not thread-safe, so worker threads each get
+        # their own authorized Http from this factory when it is provided.
+        self.http_factory = http_factory
+        self.bucket = TokenBucket(rate=units_per_second, capacity=units_per_second)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gmail")
+        self._local = threading.local()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._metrics_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, http_factory: Optional[Callable[[], Any]] = None) -> "GmailRequestExecutor":
+        return cls(
+            max_workers=settings.GMAIL_MAX_WORKERS,
+            units_per_second=settings.GMAIL_QUOTA_UNITS_PER_SECOND,
+            max_retries=settings.GMAIL_MAX_RETRIES,
+            http_factory=http_factory,
+        )
+
+    def execute(self, request, units: Optional[int] = None, idempotent: bool = True):
+        """Execute a googleapiclient request with rate limiting and retries.
+
+        Non-idempotent requests (messages.send) are only retried when Gmail
+        rejected them outright (429 or a rate-limit 403); a timeout, dropped
+        connection or 5xx may come after the request took effect.
+        """
+        name = self._method_name(request)
+        if units is None:
+            units = QUOTA_UNITS.get(name, DEFAULT_UNITS)
+
+        def _run():
+            http = self._thread_http()
+            return request.execute(http=http) if http is not None else request.execute()
+
+        return self.call(_run, units=units, name=name, idempotent=idempotent)
+
+    def execute_batch(self, new_batch: Callable[[Callable], Any], requests: Dict[str, Any],
+                      units_per_part: int = DEFAULT_UNITS) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """Execute idempotent requests as Gmail batch HTTP requests of at most MAX_BATCH_SIZE parts.
+
+        `new_batch(callback)` creates an empty BatchHttpRequest. Parts fail
+        independently: only those that failed with a retryable error are
+        batched again (after backoff), so no part is answered twice.
+        Returns ({request id: response}, {request id: error}).
+        """
+        responses: Dict[str, Any] = {}
+        errors: Dict[str, Exception] = {}
+        pending = dict(requests)
+        attempt = 0
+        while pending:
+            failed: Dict[str, Exception] = {}
+
+            def _collect(request_id, response, exception):
+                if exception is not None:
+                    failed[request_id] = exception
+                else:
+                    responses[request_id] = response
+
+            ids = list(pending)
+            for start in range(0, len(ids), MAX_BATCH_SIZE):
+                chunk = ids[start:start + MAX_BATCH_SIZE]
+                batch = new_batch(_collect)
+                for request_id in chunk:
+                    batch.add(pending[request_id], request_id=request_id)
+                try:
+                    self._attempt(self._batch_runner(batch), units=len(chunk) * units_per_part, name='batch')
+                except Exception as e:
+                    # The batch request itself failed: every part not answered failed with it
+                    for request_id in chunk:
+                        if request_id not in responses and request_id not in failed:
+                            failed[request_id] = e
+
+            retryable = {request_id: e for request_id, e in failed.items() if self.is_retryable(e)}
+            errors.update((request_id, e) for request_id, e in failed.items() if request_id not in retryable)
+            if not retryable or attempt >= self.max_retries:
+                errors.update(retryable)
+                break
+            delay = max(self._backoff(attempt, e) for e in retryable.values())
+            attempt += 1
+            self._record_retry('batch')
+            print(f"Gmail batch: {len(retryable)} parts failed; retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+            pending = {request_id: pending[request_id] for request_id in retryable}
+        return responses, errors
+
+    def call(self, fn: Callable[[], Any], units: int = DEFAULT_UNITS, name: str = 'call', idempotent: bool = True):
+        """Run `fn` under the rate limiter, retrying transient Gmail failures"""
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(fn, units, name)
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_retryable(e, idempotent):
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                self._record_retry(name)
+                print(f"Gmail {name} failed ({e.__class__.__name__}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def submit(self, request, units: Optional[int] = None, idempotent: bool = True) -> Future:
+        return self._pool.submit(self.execute, request, units, idempotent)
+
+    def map(self, requests: List, units: Optional[int] = None) -> List:
+        """Execute requests concurrently; results keep input order, first error is raised"""
+        futures = [self.submit(request, units) for request in requests]
+        return [future.result() for future in futures]
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Snapshot of per-method calls, failures, retries and latency"""
+        with self._metrics_lock:
+            snapshot = {name: dict(values) for name, values in self._metrics.items()}
+        for values in snapshot.values():
+            values['avg_seconds'] = values['total_seconds'] / values['calls'] if values['calls'] else 0.0
+        return snapshot
+
+    def format_metrics(self) -> str:
+        lines = []
+        for name, m in sorted(self.metrics().items()):
+            lines.append(
+                f"{name}: {int(m['calls'])} calls, {int(m['retries'])} retries, {int(m['failures'])} failures, "
+                f"avg {m['avg_seconds'] * 1000:.0f} ms, max {m['max_seconds'] * 1000:.0f} ms"
+            )
+        return "\n".join(lines)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def _attempt(self, fn: Callable[[], Any], units: int, name: str):
+        """One rate-limited, timed call of `fn`"""
+        self.bucket.acquire(units)
+        started = time.monotonic()
+        try:
+            result = fn()
+        except Exception:
+            self._record(name, time.monotonic() - started, failed=True)
+            raise
+        self._record(name, time.monotonic() - started, failed=False)
+        return result
+
+    def _batch_runner(self, batch) -> Callable[[], Any]:
+        def _run():
+            http = self._thread_http()
+            return batch.execute(http=http) if http is not None else batch.execute()
+        return _run
+
+    def _thread_http(self):
+        if self.http_factory is None:
+            return None
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = self.http_factory()
+        return http
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        from googleapiclient.errors import HttpError
+
+        if not isinstance(error, HttpError):
+            return None
+        value = error.resp.get('retry-after') if hasattr(error.resp, 'get') else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def is_retryable(error: Exception, idempotent: bool = True) -> bool:
+        """Transient failures; for non-idempotent calls only those where Gmail refused the request"""
+        from googleapiclient.errors import HttpError
+
+        if isinstance(error, HttpError):
+            status = error.resp.status
+            if status == 429:
+                return True
+            if status in RETRYABLE_STATUSES:
+                return idempotent
+            if status == 403:
+                reasons = {d.get('reason') for d in (error.error_details or []) if isinstance(d, dict)}
+                return bool(reasons & RATE_LIMIT_REASONS)
+            return False
+        return idempotent and isinstance(error, (ConnectionError, TimeoutError, socket.timeout))
+
+    @staticmethod
+    def _method_name(request) -> str:
+        return getattr(request, 'methodId', None) or type(request).__name__
+
+    def _record(self, name: str, seconds: float, failed: bool):
+        with self._metrics_lock:
+            m = self._metrics.setdefault(
+                name, {'calls': 0, 'failures': 0, 'retries': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+            )
+            m['calls'] += 1
+            m['failures'] += int(failed)
+            m['total_seconds'] += seconds
+            m['max_seconds'] = max(m['max_seconds'], seconds)
+
+    def _record_retry(self, name: str):
+        with self._metrics_lock:
+            self._metrics[name]['retries'] += 1
+
+
+_executor: Optional[GmailRequestExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> GmailRequestExecutor:
+    """Get or create the process-wide Gmail executor lazily"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = GmailRequestExecutor.from_settings()
+        return _executor
@@ -1,37 +1,300 @@
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional, Iterable, Iterator
 import base64
-from gmail.auth import GmailAuthenticator
+import queue
+import threading
+from gmail.auth import get_service_provider
+from gmail.cache import RawMessageCache
+from gmail.executor import MAX_BATCH_SIZE, GmailRequestExecutor, get_executor
+from config.settings import settings
+from database.connection import get_db_session
+from database.repositories import SyncCheckpointRepository
+
+def _prefetch(items: Iterable[Dict], max_buffered: int) -> Iterator[Dict]:
+    """Drain `items` on a background thread, buffering up to `max_buffered` ahead"""
+    buffer: queue.Queue = queue.Queue(maxsize=max_buffered)
+    stop = threading.Event()
+    done = object()
+    
+    def _put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _produce():
+        try:
+            for item in items:
+                if not _put((item, None)):
+                    return
+            _put((done, None))
+        except Exception as e:
+            _put((done, e))
+    
+    threading.Thread(target=_produce, daemon=True).start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # Consumer finished or bailed out early: let the producer exit
+        stop.set()
 
 class NewsletterFetcher:
-    def __init__(self):
-        self.service = GmailAuthenticator().authenticate()
+    LABEL_NAME = 'Newsletter'
+    CHECKPOINT_NAME = 'gmail_history'
+    
+    def __init__(self, service=None, batch_size: int = None, cache: RawMessageCache = None,
+                 executor: GmailRequestExecutor = None):
+        self.executor = executor or get_executor()
+        if service is None:
+            provider = get_service_provider()
+            service = provider.get_service()
+            if self.executor.http_factory is None:
+                self.executor.http_factory = provider.authorized_http
+        self.service = service
+        self.batch_size = min(settings.GMAIL_BATCH_SIZE if batch_size is None else batch_size, MAX_BATCH_SIZE)
+        if cache is None and settings.RAW_MESSAGE_CACHE_ENABLED:
+            cache = RawMessageCache.from_settings()
+        self.cache = cache
+        self.pending_history_id: Optional[str] = None
+    
+    def fetch_newsletters(self, keywords: List[str] = None) -> List[Dict]:
+        """Fetch newsletters using the configured sync mode"""
+        return list(self.iter_newsletters(keywords, prefetch=False))
+    
+    def iter_newsletters(self, keywords: List[str] = None, prefetch: bool = True) -> Iterator[Dict]:
+        """Yield newsletters as they are downloaded, using the configured sync mode.
+        
+        With `prefetch` the download runs in a background thread, so the
+        consumer can clean one message while the next batch is in flight.
+        """
+        if settings.GMAIL_SYNC_MODE == 'incremental':
+            messages = self.iter_sync_newsletters(keywords)
+        else:
+            messages = self.iter_yesterday_newsletters(keywords)
+        return _prefetch(messages, max(self.batch_size, 1)) if prefetch else messages
     
     def fetch_yesterday_newsletters(self, keywords: List[str] = None) -> List[Dict]:
         """Fetch unread newsletters from yesterday with label 'Newsletter'"""
+        return list(self.iter_yesterday_newsletters(keywords))
+    
+    def iter_yesterday_newsletters(self, keywords: List[str] = None) -> Iterator[Dict]:
+        """Yield yesterday's unread newsletters, following every result page"""
         yesterday = (datetime.now() - timedelta(1)).strftime('%Y/%m/%d')
         
         # Filter by keywords in sender's email
         keyword_query = " OR ".join([f"from:{kw}" for kw in (keywords or [])])
         query = f'is:unread label:Newsletter after:{yesterday} ({keyword_query})' # Gmail search query
         
-        results = self.service.users().messages().list(
-            userId='me', 
-            q=query,
-            maxResults=50
-        ).execute()
+        page_token = None
+        while True:
+            results = self.executor.execute(self.service.users().messages().list(
+                userId='me', 
+                q=query,
+                maxResults=settings.GMAIL_PAGE_SIZE,
+                pageToken=page_token
+            ))
+            
+            messages = results.get('messages', []) # 
+            yield from self._iter_messages([msg['id'] for msg in messages])
+            
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return
+    
+    def sync_newsletters(self, keywords: List[str] = None) -> List[Dict]:
+        """Fetch only newsletters added since the stored historyId checkpoint (see `commit_checkpoint`)"""
+        return list(self.iter_sync_newsletters(keywords))
+    
+    def iter_sync_newsletters(self, keywords: List[str] = None) -> Iterator[Dict]:
+        """Yield only newsletters added since the stored historyId checkpoint.
+        
+        Falls back to a full (date-based) sync when there is no checkpoint yet,
+        Gmail reports that it has expired, or the label doesn't exist. Once
+        every message has been yielded the new historyId is kept in
+        `pending_history_id`; callers save it with `commit_checkpoint` after
+        the run has succeeded, so a failed run fetches the same messages again.
+        """
+        from googleapiclient.errors import HttpError
         
-        messages = results.get('messages', []) # 
-        return [self._process_message(msg['id']) for msg in messages]
+        self.pending_history_id = None
+        with get_db_session() as session:
+            start_history_id = SyncCheckpointRepository(session).get_history_id(self.CHECKPOINT_NAME)
+        
+        history = None
+        if start_history_id:
+            label_id = self._get_label_id(self.LABEL_NAME)
+            if label_id is None:
+                # history.list without a labelId would return the whole mailbox
+                print(f"Label '{self.LABEL_NAME}' not found, falling back to full sync")
+            else:
+                try:
+                    history = self._list_history(start_history_id, label_id)
+                except HttpError as e:
+                    # 404 means the startHistoryId is too old (Gmail keeps roughly a week)
+                    if e.resp.status != 404:
+                        raise
+                    print(f"History checkpoint {start_history_id} expired, falling back to full sync")
+        
+        if history is None:
+            # Read the mailbox historyId *before* listing so nothing added during
+            # the full scan is skipped by the next incremental run.
+            latest_history_id = self.executor.execute(self.service.users().getProfile(userId='me'))['historyId']
+            yield from self.iter_yesterday_newsletters(keywords)
+        else:
+            msg_ids, latest_history_id = history
+            yield from self._filter_by_sender(self._iter_messages(msg_ids), keywords)
+        
+        self.pending_history_id = latest_history_id
+    
+    def commit_checkpoint(self) -> Optional[str]:
+        """Save the historyId reached by the last fully consumed incremental sync, if any"""
+        history_id, self.pending_history_id = self.pending_history_id, None
+        if history_id is not None:
+            with get_db_session() as session:
+                SyncCheckpointRepository(session).save_history_id(self.CHECKPOINT_NAME, history_id)
+        return history_id
+    
+    def _list_history(self, start_history_id: str, label_id: str):
+        """Return (unread newsletter message ids added since checkpoint, latest historyId)"""
+        msg_ids: List[str] = []
+        seen = set()
+        latest_history_id = start_history_id
+        page_token = None
+        
+        while True:
+            response = self.executor.execute(self.service.users().history().list(
+                userId='me',
+                startHistoryId=start_history_id,
+                historyTypes=['messageAdded'],
+                labelId=label_id,
+                pageToken=page_token
+            ))
+            
+            for record in response.get('history', []):
+                for added in record.get('messagesAdded', []):
+                    message = added['message']
+                    if 'UNREAD' not in message.get('labelIds', []) or message['id'] in seen:
+                        continue
+                    seen.add(message['id'])
+                    msg_ids.append(message['id'])
+            
+            latest_history_id = response.get('historyId', latest_history_id)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return msg_ids, latest_history_id
+    
+    def _get_label_id(self, name: str) -> Optional[str]:
+        """Resolve a user label name to its id (history.list filters by id)"""
+        labels = self.executor.execute(self.service.users().labels().list(userId='me')).get('labels', [])
+        for label in labels:
+            if label['name'] == name:
+                return label['id']
+        return None
+    
+    @staticmethod
+    def _filter_by_sender(emails: Iterable[Dict], keywords: List[str] = None) -> Iterator[Dict]:
+        """Apply the `from:` keyword filter locally (history.list has no query)"""
+        lowered = [kw.lower() for kw in (keywords or [])]
+        for email in emails:
+            if not lowered or any(kw in email['from'].lower() for kw in lowered):
+                yield email
+    
+    def _iter_messages(self, msg_ids: List[str]) -> Iterator[Dict]:
+        """Fetch and parse messages, batched when batch_size > 1.
+        
+        Without batching, gets run concurrently on the executor's thread pool
+        in windows of GMAIL_MAX_WORKERS.
+        """
+        chunk_size = self.batch_size if self.batch_size > 1 else settings.GMAIL_MAX_WORKERS
+        for start in range(0, len(msg_ids), chunk_size):
+            chunk = msg_ids[start:start + chunk_size]
+            cached = {msg_id: self._get_cached(msg_id) for msg_id in chunk}
+            misses = [msg_id for msg_id in chunk if cached[msg_id] is None]
+            if not misses:
+                emails = {}
+            elif self.batch_size > 1:
+                emails = self._get_messages_batched(misses)
+            else:
+                emails = self._get_messages_concurrently(misses)
+            for msg_id in chunk:
+                if cached[msg_id] is not None:
+                    yield cached[msg_id]
+                elif msg_id in emails:
+                    yield self._store(self._parse_message(msg_id, emails[msg_id]))
     
     def _process_message(self, msg_id: str) -> Dict:
-        """Extract email data"""
-        email = self.service.users().messages().get(
+        """Extract email data, reading the local raw-message cache first"""
+        cached = self._get_cached(msg_id)
+        if cached is not None:
+            return cached
+        email = self.executor.execute(self._get_request(msg_id))
+        return self._store(self._parse_message(msg_id, email))
+    
+    def _get_cached(self, msg_id: str) -> Optional[Dict]:
+        return self.cache.get(msg_id) if self.cache else None
+    
+    def _store(self, email: Dict) -> Dict:
+        if self.cache:
+            self.cache.put(email)
+        return email
+    
+    def _get_messages_batched(self, msg_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch raw message resources in Gmail batch HTTP requests.
+        
+        Parts of a batch can fail independently (e.g. per-user rate limits);
+        the executor re-batches only those, with backoff.
+        """
+        emails, errors = self.executor.execute_batch(
+            lambda callback: self.service.new_batch_http_request(callback=callback),
+            {msg_id: self._get_request(msg_id) for msg_id in msg_ids},
+        )
+        return self._skip_failed(emails, errors)
+    
+    def _get_messages_concurrently(self, msg_ids: List[str]) -> Dict[str, Dict]:
+        futures = {msg_id: self.executor.submit(self._get_request(msg_id)) for msg_id in msg_ids}
+        emails, errors = {}, {}
+        for msg_id, future in futures.items():
+            try:
+                emails[msg_id] = future.result()
+            except Exception as e:
+                errors[msg_id] = e
+        return self._skip_failed(emails, errors)
+    
+    def _skip_failed(self, emails: Dict[str, Dict], errors: Dict[str, Exception]) -> Dict[str, Dict]:
+        """Drop messages that failed for good (e.g. deleted between list and get).
+        
+        Errors still transient after retries, and auth errors (which every
+        other message would hit too), are raised instead: the run stops before
+        its checkpoint is saved, so those messages are fetched again next time.
+        """
+        if not errors:
+            return emails
+        for e in errors.values():
+            if self.executor.is_retryable(e) or getattr(getattr(e, 'resp', None), 'status', None) in (401, 403):
+                raise e
+        for msg_id, e in errors.items():
+            print(f"Skipping message {msg_id}: {e.__class__.__name__}: {e}")
+        return emails
+    
+    def _get_request(self, msg_id: str):
+        """Build (without executing) a full-format messages.get request"""
+        return self.service.users().messages().get(
             userId='me', 
             id=msg_id,
             format='full'
-        ).execute()
-        
+        )
+    
+    def _parse_message(self, msg_id: str, email: Dict) -> Dict:
+        """Convert a Gmail API message resource into our email dict"""
         # Find headers and body in the payload
         headers = {h['name']: h['value'] for h in email['payload']['headers']}
         body = self._get_body(email['payload'])
@@ -60,11 +323,11 @@ class NewsletterFetcher:
     
     def mark_as_read(self, msg_id: str):
         """Mark message as read"""
-        self.service.users().messages().modify(
+        self.executor.execute(self.service.users().messages().modify(
             userId='me',
             id=msg_id,
             body={'removeLabelIds': ['UNREAD']}
-        ).execute()
+        ))
 
 if __name__ == "__main__":
     newsletters = NewsletterFetcher()
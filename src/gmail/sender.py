@@ -2,32 +2,58 @@ from typing import List
 import base64
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from gmail.auth import GmailAuthenticator
+from gmail.auth import get_service_provider
+from gmail.executor import GmailRequestExecutor, get_executor
 
 class NewsletterSender:
-    def __init__(self):
-        self.service = GmailAuthenticator().authenticate()
+    def __init__(self, service=None, executor: GmailRequestExecutor = None):
+        self.executor = executor or get_executor()
+        if service is None:
+            provider = get_service_provider()
+            service = provider.get_service()
+            if self.executor.http_factory is None:
+                self.executor.http_factory = provider.authorized_http
+        self.service = service
     
-    def send_newsletter(self, recipients: List[str], subject: str, html_content: str):
-        """Send newsletter to multiple recipients"""
-        for email in recipients:
+    def send_newsletter(self, recipients: List[str], subject: str, html_content: str, text_content: str = None):
+        """Send newsletter to multiple recipients concurrently through the Gmail executor.
+        
+        Sends are not idempotent, so they are only retried when Gmail refused them
+        (a retried timeout could deliver the newsletter twice).
+        """
+        futures = [
+            (email, self.executor.submit(
+                self._build_send_request(email, subject, html_content, text_content), idempotent=False
+            ))
+            for email in recipients
+        ]
+        for email, future in futures:
             try:
-                self._send_single(email, subject, html_content)
+                future.result()
             except Exception as e:
                 print(f"Failed to send to {email}: {e}")
     
-    def _send_single(self, to: str, subject: str, html: str):
+    def _send_single(self, to: str, subject: str, html: str, text: str = None):
         """Send to single recipient"""
+        self.executor.execute(self._build_send_request(to, subject, html, text), idempotent=False)
+    
+    def _build_send_request(self, to: str, subject: str, html: str, text: str = None):
+        """Build (without executing) the messages.send request for one recipient.
+        
+        With `text`, a plain-text part comes before the HTML part (clients show the last one they support).
+        """
         message = MIMEMultipart('alternative')
         message['to'] = to
         message['subject'] = subject
         message['from'] = 'me'
         
+        if text is not None:
+            message.attach(MIMEText(text, 'plain', 'utf-8'))
         html_part = MIMEText(html, 'html')
         message.attach(html_part)
         
         raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
-        self.service.users().messages().send(
+        return self.service.users().messages().send(
             userId='me',
             body={'raw': raw}
-        ).execute()
+        )
@@ -0,0 +1,30 @@
+from typing import List, Dict
+
+from config.settings import settings
+from database.connection import get_db_session
+from database.repositories import SenderFingerprintRepository
+from processing.boilerplate import BoilerplateFilter
+from processing.cleaner import HTMLCleaner
+from graph.state import PipelineState
+
+
+def boilerplate_node(state: PipelineState) -> PipelineState:
+    """
+    Strip per-sender template text from state['cleaned_emails'] and trim bodies to CLEAN_MAX_CHARS.
+    """
+    emails: List[Dict] = state.get("cleaned_emails", [])  # type: ignore[assignment]
+
+    if not settings.BOILERPLATE_ENABLED or not emails:
+        for email in emails:
+            email["body"] = HTMLCleaner.truncate(email.get("body", ""), settings.CLEAN_MAX_CHARS)
+        return state
+
+    with get_db_session() as session:
+        stats = BoilerplateFilter(SenderFingerprintRepository(session)).apply(emails)
+
+    print(
+        f"Boilerplate: removed {stats['lines_removed']} lines, "
+        f"{stats['chars_before']} -> {stats['chars_after']} chars over {stats['emails']} emails"
+    )
+    state["cleaned_emails"] = emails
+    return state
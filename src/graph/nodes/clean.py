@@ -1,30 +1,34 @@
-from typing import List, Dict
+from typing import List, Dict, Iterable
 
+from processing.boilerplate import clean_max_chars
+from processing.cache import get_clean_cache
 from processing.cleaner import HTMLCleaner
 from graph.state import PipelineState
 
 
 def clean_node(state: PipelineState) -> PipelineState:
     """
-    Clean HTML bodies using HTMLCleaner and store result in state['cleaned_emails'].
+    Clean HTML bodies using HTMLCleaner and store result in state['cleaned_emails'],
+    with each email's links and images in state['email_links'].
     """
-    raw_emails: List[Dict] = state.get("raw_emails", [])  # type: ignore[assignment]
+    raw_emails: Iterable[Dict] = state.get("raw_emails", [])  # type: ignore[assignment]
     cleaned: List[Dict] = []
+    links: Dict[str, Dict] = {}
 
-    for email in raw_emails:
-        raw_body = email.get("body", "") or ""
-        cleaned_body = HTMLCleaner.clean(raw_body)
-        truncated_body = HTMLCleaner.truncate(cleaned_body)
-
+    # Bodies are cleaned in batches across worker processes as the fetch stream yields them
+    for email, document in HTMLCleaner.extract_emails(raw_emails, clean_max_chars(), cache=get_clean_cache()):
+        links[email.get("id", "")] = {"links": document["links"], "images": document["images"]}
         cleaned.append(
             {
                 "id": email.get("id", ""),
                 "from": email.get("from", ""),
                 "subject": email.get("subject", ""),
                 "date": email.get("date", ""),
-                "body": truncated_body,
+                "body": document["text"],
+                "source_body": document["text"],  # body before batch-dependent stripping; keys extractions
             }
         )
 
     state["cleaned_emails"] = cleaned
+    state["email_links"] = links
     return state
\ No newline at end of file
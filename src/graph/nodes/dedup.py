@@ -0,0 +1,24 @@
+from typing import List, Dict
+
+from config.settings import settings
+from processing.dedup import NearDuplicateFilter, format_report
+from graph.state import PipelineState
+
+
+def dedup_node(state: PipelineState) -> PipelineState:
+    """
+    Keep one copy of stories covered by several newsletters in state['cleaned_emails'].
+
+    Emails whose stories were all covered elsewhere are dropped; the merged
+    clusters are kept in state['dedup_report'].
+    """
+    emails: List[Dict] = state.get("cleaned_emails", [])  # type: ignore[assignment]
+
+    if not settings.DEDUP_ENABLED or len(emails) < 2:
+        return state
+
+    report = NearDuplicateFilter().apply(emails)
+    print(format_report(report))
+    state["cleaned_emails"] = [email for email in emails if email.get("body")]
+    state["dedup_report"] = report
+    return state
@@ -1,18 +1,47 @@
 # src/graph/nodes/fetch.py
-from typing import List, Dict
+from datetime import datetime, timedelta
+from typing import Iterator, Dict
 
-from gmail.fetcher import NewsletterFetcher
+from config.settings import settings
 from graph.state import PipelineState
 
 
-fetcher = NewsletterFetcher()
+# Lazily created on first run so importing the graph doesn't authenticate with Gmail
+_fetcher = None
+
+
+def create_fetcher():
+    """Build the fetcher selected by settings.FETCH_BACKEND"""
+    if settings.FETCH_BACKEND == "archive":
+        from ingest.archive import ArchiveFetcher
+        since = None
+        if settings.ARCHIVE_SINCE_DAYS:
+            since = datetime.now() - timedelta(days=settings.ARCHIVE_SINCE_DAYS)
+        return ArchiveFetcher(settings.ARCHIVE_PATH, since=since)
+    from gmail.fetcher import NewsletterFetcher
+    return NewsletterFetcher()
+
+
+def get_fetcher():
+    """Get or create the fetcher used by fetch_node"""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = create_fetcher()
+    return _fetcher
+
+
+def set_fetcher(fetcher) -> None:
+    """Inject a fetcher (e.g. a fake in tests); None resets to the lazy default"""
+    global _fetcher
+    _fetcher = fetcher
 
 
 def fetch_node(state: PipelineState) -> PipelineState:
     """
-    Fetch unread newsletters from yesterday and store them in state['raw_emails'].
+    Fetch unread newsletters (date window or incremental sync) and store them in state['raw_emails'].
+    The emails are a stream: downloading continues while clean_node consumes them.
     """
 
-    emails: List[Dict] = fetcher.fetch_yesterday_newsletters()
+    emails: Iterator[Dict] = get_fetcher().iter_newsletters()
     state["raw_emails"] = emails
     return state
\ No newline at end of file
@@ -0,0 +1,28 @@
+from typing import List, Dict
+
+from config.settings import settings
+from database.connection import get_db_session
+from database.repositories import NewsItemRepository
+from processing.relevance import RelevanceFilter, format_report, load_model
+from graph.state import PipelineState
+
+
+def relevance_node(state: PipelineState) -> PipelineState:
+    """
+    Score state['cleaned_emails'] for ML relevance and drop or trim the off-topic ones.
+
+    The model is trained on categorised news_items each run; scores and the
+    threshold are kept in state['relevance_report'].
+    """
+    emails: List[Dict] = state.get("cleaned_emails", [])  # type: ignore[assignment]
+
+    if settings.RELEVANCE_MODE == "off" or not emails:
+        return state
+
+    with get_db_session() as session:
+        model = load_model(NewsItemRepository(session))
+    kept, report = RelevanceFilter(model).apply(emails)
+    print(format_report(report))
+    state["cleaned_emails"] = kept
+    state["relevance_report"] = report
+    return state
@@ -1,11 +1,32 @@
 from datetime import datetime
 from typing import List, Dict
 
+from config.settings import settings
+from database.connection import get_db_session
+from database.repositories import ItemFingerprintRepository, NewsItemRepository
+from processing.extractions import ExtractionStore
+from processing.published import PublishedItemFilter, format_stats
+from processing.relevance import load_model
 from processing.summarizer import NewsletterSummarizer
 from graph.state import PipelineState
 
 
-summarizer = NewsletterSummarizer()
+# Lazily created on first run so importing the graph doesn't configure Gemini
+_summarizer = None
+
+
+def get_summarizer() -> NewsletterSummarizer:
+    """Get or create the summarizer used by summarize_node"""
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = NewsletterSummarizer()
+    return _summarizer
+
+
+def set_summarizer(summarizer) -> None:
+    """Inject a summarizer (e.g. a fake in tests); None resets to the lazy default"""
+    global _summarizer
+    _summarizer = summarizer
 
 
 def summarize_node(state: PipelineState) -> PipelineState:
@@ -23,6 +44,28 @@ def summarize_node(state: PipelineState) -> PipelineState:
         }
         return state
 
-    summary = summarizer.summarize_batch(emails)
+    # Attach the links found while cleaning so item urls are taken from the newsletters
+    links: Dict[str, Dict] = state.get("email_links", {})  # type: ignore[assignment]
+    emails = [dict(email, links=links.get(email.get("id", ""), {}).get("links", [])) for email in emails]
+
+    # Reuse items extracted from these emails by earlier runs
+    extractions = ExtractionStore() if settings.SUMMARIZE_INCREMENTAL else None
+
+    # Section mode classifies content with centroids trained on published items
+    topic_model = None
+    if settings.SUMMARIZE_MODE == "sections":
+        with get_db_session() as session:
+            topic_model = load_model(NewsItemRepository(session))
+
+    summary = get_summarizer().summarize_batch(emails, extractions, topic_model=topic_model)
+
+    # Drop (or mark) stories published in recent issues; saving records this issue's
+    if settings.ITEM_DEDUP_MODE != "off":
+        with get_db_session() as session:
+            stats = PublishedItemFilter(ItemFingerprintRepository(session)).apply_summary(summary)
+        print(format_stats(stats))
+        if stats['dropped']:
+            # The headline was written before the filter; don't lead with a dropped story
+            get_summarizer().refresh_overview(summary)
     state["summary_json"] = summary
     return state
\ No newline at end of file
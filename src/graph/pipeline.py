@@ -1,27 +1,37 @@
-from langgraph.graph import StateGraph
-
 from graph.state import PipelineState
 from graph.nodes.fetch import fetch_node
 from graph.nodes.clean import clean_node
+from graph.nodes.boilerplate import boilerplate_node
+from graph.nodes.relevance import relevance_node
+from graph.nodes.dedup import dedup_node
 from graph.nodes.summarize import summarize_node
 
 
 def build_pipeline():
     """
     Build and compile the LangGraph pipeline:
-    fetch -> clean -> summarize
+    fetch -> clean -> boilerplate -> relevance -> dedup -> summarize
     """
+    # Deferred: langgraph is heavy and only needed when a graph is actually built
+    from langgraph.graph import StateGraph
+
     workflow = StateGraph(PipelineState)
 
     # Register nodes
     workflow.add_node("fetch", fetch_node)
     workflow.add_node("clean", clean_node)
+    workflow.add_node("boilerplate", boilerplate_node)
+    workflow.add_node("relevance", relevance_node)
+    workflow.add_node("dedup", dedup_node)
     workflow.add_node("summarize", summarize_node)
 
     # Define graph structure
     workflow.set_entry_point("fetch")
     workflow.add_edge("fetch", "clean")
-    workflow.add_edge("clean", "summarize")
+    workflow.add_edge("clean", "boilerplate")
+    workflow.add_edge("boilerplate", "relevance")
+    workflow.add_edge("relevance", "dedup")
+    workflow.add_edge("dedup", "summarize")
 
     app = workflow.compile()
     return app
\ No newline at end of file
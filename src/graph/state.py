@@ -1,8 +1,11 @@
-from typing import TypedDict, List, Dict, Optional
+from typing import TypedDict, List, Dict, Optional, Iterable
 
 # PipelineState is a dictionary that contains the state of the pipeline.
 class PipelineState(TypedDict, total=False):
     """Shared state passed between LangGraph nodes."""
-    raw_emails: List[Dict]
-    cleaned_emails: List[Dict]
+    raw_emails: Iterable[Dict]  # lazily downloaded; consumed once by clean_node
+    cleaned_emails: List[Dict]  # 'body' is trimmed by later nodes; 'source_body' keeps the cleaned text
+    email_links: Dict[str, Dict]  # email id -> {'links': [{'url', 'text'}], 'images': [url]}
+    relevance_report: Dict  # per-email relevance scores and the threshold applied (see processing.relevance)
+    dedup_report: Dict  # near-duplicate clusters merged before summarizing (see processing.dedup)
     summary_json: Dict
\ No newline at end of file
@@ -0,0 +1,136 @@
+import mmap
+import os
+from datetime import datetime
+from email import policy
+from email.feedparser import BytesFeedParser
+from email.message import EmailMessage
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import List, Dict, Iterator, Optional, Tuple
+
+# Bytes handed to the email parser per step; bounds per-message buffering
+CHUNK_SIZE = 64 * 1024
+
+
+class ArchiveFetcher:
+    """Offline stand-in for NewsletterFetcher that reads mbox files or Maildir directories.
+
+    Archives are memory-mapped and parsed one message at a time, so multi-GB
+    mailboxes are never loaded whole. Records have the same
+    {'id','from','subject','body','date'} shape as the Gmail fetcher.
+    """
+
+    def __init__(self, path: str, since: Optional[datetime] = None):
+        self.path = Path(path)
+        self.since = since
+        if not self.path.exists():
+            raise FileNotFoundError(f"Mail archive not found: {self.path}")
+
+    def fetch_newsletters(self, keywords: List[str] = None) -> List[Dict]:
+        return list(self.iter_newsletters(keywords))
+
+    def iter_newsletters(self, keywords: List[str] = None, prefetch: bool = False) -> Iterator[Dict]:
+        """Yield archived newsletters, optionally filtered by sender keywords and date.
+
+        `prefetch` is accepted for interface parity; local reads need no overlap.
+        """
+        lowered = [kw.lower() for kw in (keywords or [])]
+        for key, message in self._iter_messages():
+            email = self._to_record(key, message)
+            if lowered and not any(kw in email['from'].lower() for kw in lowered):
+                continue
+            if self.since and not self._is_since(email['date']):
+                continue
+            yield email
+
+    def mark_as_read(self, msg_id: str):
+        """Archives are read-only; nothing to mark"""
+        pass
+
+    def commit_checkpoint(self):
+        """Archives have no sync checkpoint"""
+        return None
+
+    def _iter_messages(self) -> Iterator[Tuple[str, EmailMessage]]:
+        if self.path.is_dir():
+            return self._iter_maildir()
+        return self._iter_mbox()
+
+    def _iter_mbox(self) -> Iterator[Tuple[str, EmailMessage]]:
+        """Split an mbox on 'From ' separator lines without reading it into memory"""
+        if self.path.stat().st_size == 0:
+            return
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0 if mm[:5] == b'From ' else mm.find(b'\nFrom ')
+            while start != -1:
+                if mm[start:start + 1] == b'\n':
+                    start += 1
+                # Skip the 'From sender date' envelope line itself
+                body_start = mm.find(b'\n', start)
+                if body_start == -1:
+                    return
+                end = mm.find(b'\nFrom ', body_start)
+                stop = len(mm) if end == -1 else end
+                yield f"mbox-{start}", self._parse(mm, body_start + 1, stop)
+                start = end
+
+    def _iter_maildir(self) -> Iterator[Tuple[str, EmailMessage]]:
+        for sub in ('new', 'cur'):
+            folder = self.path / sub
+            if not folder.is_dir():
+                continue
+            for name in sorted(os.listdir(folder)):
+                file_path = folder / name
+                size = file_path.stat().st_size
+                if size == 0:
+                    continue
+                with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # Maildir keys drop the ':2,<flags>' info suffix
+                    yield name.split(':', 1)[0], self._parse(mm, 0, size)
+
+    @staticmethod
+    def _parse(mm: mmap.mmap, start: int, stop: int) -> EmailMessage:
+        parser = BytesFeedParser(policy=policy.default)
+        view = memoryview(mm)
+        try:
+            for offset in range(start, stop, CHUNK_SIZE):
+                parser.feed(bytes(view[offset:min(offset + CHUNK_SIZE, stop)]))
+        finally:
+            view.release()
+        return parser.close()
+
+    @staticmethod
+    def _to_record(key: str, message: EmailMessage) -> Dict:
+        message_id = (message.get('Message-ID') or '').strip().strip('<>')
+        return {
+            'id': message_id or key,
+            'from': str(message.get('From', '')),
+            'subject': str(message.get('Subject', '')),
+            'body': ArchiveFetcher._get_body(message),
+            'date': str(message.get('Date', '')),
+        }
+
+    @staticmethod
+    def _get_body(message: EmailMessage) -> str:
+        """Prefer the HTML alternative, like the Gmail fetcher"""
+        part = message.get_body(preferencelist=('html', 'plain'))
+        if part is None:
+            return ""
+        try:
+            return part.get_content()
+        except (LookupError, UnicodeDecodeError):
+            # Unknown or lying charset declarations are common in old archives
+            payload = part.get_payload(decode=True) or b''
+            return payload.decode('utf-8', errors='replace')
+
+    def _is_since(self, date_header: str) -> bool:
+        try:
+            sent = parsedate_to_datetime(date_header)
+        except (TypeError, ValueError):
+            return True
+        since = self.since
+        if sent.tzinfo is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=sent.tzinfo)
+        elif sent.tzinfo is None and since.tzinfo is not None:
+            sent = sent.replace(tzinfo=since.tzinfo)
+        return sent >= since
@@ -0,0 +1,121 @@
+import hashlib
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from email.utils import parseaddr
+from typing import Dict, List, Set, Tuple
+
+from config.settings import settings
+from processing.cleaner import HTMLCleaner
+
+DIGITS = re.compile(r'\d+')
+SPACES = re.compile(r'\s+')
+
+
+def clean_max_chars() -> int:
+    """Budget for the clean stage; leaves headroom when boilerplate is stripped afterwards"""
+    if settings.BOILERPLATE_ENABLED:
+        return settings.CLEAN_MAX_CHARS * settings.BOILERPLATE_HEADROOM
+    return settings.CLEAN_MAX_CHARS
+
+
+def sender_key(from_header: str) -> str:
+    """Lower-cased address from a From header, so display-name changes don't split a sender"""
+    address = parseaddr(from_header or '')[1]
+    return (address or from_header or '').strip().lower()[:255]
+
+
+class BoilerplateFilter:
+    """Learns each sender's template text and strips it from new issues.
+
+    Cleaned bodies are split into paragraphs (`HTMLCleaner.paragraphs`) and
+    their lines, each hashed after normalising case, whitespace and digits
+    (so "Issue #212" matches "Issue #213"). A segment that appeared in at least `min_issues` other
+    issues from the same sender, stored or in the current batch, is dropped.
+    """
+
+    def __init__(self, repository, max_chars: int = None, min_issues: int = None, retention_days: int = None):
+        self.repository = repository
+        self.max_chars = max_chars or settings.CLEAN_MAX_CHARS
+        self.min_issues = min_issues or settings.BOILERPLATE_MIN_ISSUES
+        self.retention_days = settings.BOILERPLATE_RETENTION_DAYS if retention_days is None else retention_days
+
+    @staticmethod
+    def fingerprint(segment: str) -> str:
+        normalized = SPACES.sub(' ', DIGITS.sub('0', segment.lower())).strip()
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+    @staticmethod
+    def segments(text: str) -> List[Tuple[str, List[str]]]:
+        """(paragraph, lines) pairs over the cleaner's paragraphs"""
+        return [(block, block.split('\n')) for block in HTMLCleaner.paragraphs(text)]
+
+    @classmethod
+    def fingerprints(cls, text: str) -> Set[str]:
+        prints = set()
+        for block, lines in cls.segments(text):
+            if len(lines) > 1:
+                prints.add(cls.fingerprint(block))
+            prints.update(cls.fingerprint(line) for line in lines)
+        return prints
+
+    @classmethod
+    def strip(cls, text: str, boilerplate: Set[str]) -> Tuple[str, int]:
+        """Remove paragraphs and lines whose fingerprint is in `boilerplate`; returns (text, lines removed)"""
+        kept_blocks = []
+        removed = 0
+        for block, lines in cls.segments(text):
+            if len(lines) > 1 and cls.fingerprint(block) in boilerplate:
+                removed += len(lines)
+                continue
+            kept = [line for line in lines if cls.fingerprint(line) not in boilerplate]
+            removed += len(lines) - len(kept)
+            if kept:
+                kept_blocks.append('\n'.join(kept))
+        return '\n'.join(kept_blocks), removed
+
+    def apply(self, emails: List[Dict]) -> Dict[str, int]:
+        """Strip boilerplate from each email body in place, then learn this batch's segments"""
+        senders = [sender_key(email.get('from', '')) for email in emails]
+        prints = [self.fingerprints(email.get('body', '') or '') for email in emails]
+        stored = self.repository.get_counts(senders)
+        learned_ids = self.repository.get_learned_ids(email.get('id') for email in emails if email.get('id'))
+
+        # Count each message once, even if it was fetched twice
+        seen_ids: Set[str] = set()
+        new_issues: Dict[str, str] = {}
+        new_prints: Dict[str, Counter] = {}
+        batch: Dict[str, Counter] = {sender: Counter() for sender in senders}
+        for email, sender, email_prints in zip(emails, senders, prints):
+            message_id = email.get('id')
+            if message_id:
+                if message_id in seen_ids:
+                    continue
+                seen_ids.add(message_id)
+            batch[sender].update(email_prints)
+            if message_id and message_id not in learned_ids:
+                new_issues[message_id] = sender
+                new_prints.setdefault(sender, Counter()).update(email_prints)
+
+        stats = {'emails': len(emails), 'lines_removed': 0, 'chars_before': 0, 'chars_after': 0}
+        for email, sender, email_prints in zip(emails, senders, prints):
+            # Issues seen elsewhere: stored and batch counts, less this email's own contribution
+            own = 1 + (1 if email.get('id') in learned_ids else 0)
+            boilerplate = {
+                fp for fp in email_prints
+                if stored[sender].get(fp, 0) + batch[sender][fp] - own >= self.min_issues
+            }
+            body = email.get('body', '') or ''
+            stripped, removed = self.strip(body, boilerplate)
+            if not stripped:
+                # Nothing new at all; keep the issue rather than summarising an empty body
+                stripped, removed = body, 0
+            email['body'] = HTMLCleaner.truncate(stripped, self.max_chars)
+            stats['lines_removed'] += removed
+            stats['chars_before'] += len(body)
+            stats['chars_after'] += len(email['body'])
+
+        self.repository.record(new_issues, new_prints)
+        if self.retention_days:
+            self.repository.prune(datetime.utcnow() - timedelta(days=self.retention_days))
+        return stats
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from cache.disk import DiskCache
+from config.settings import settings
+
+VERSION_KEY = "clean-version"
+
+
+def cleaner_version() -> str:
+    """Fingerprint of the cleaning rules: the cleaner and link sources plus the Python minor version.
+
+    Any edit to processing/cleaner.py or processing/links.py (or a new
+    html.parser) changes this, so results produced by older rules are never served.
+    """
+    digest = hashlib.sha256()
+    for name in ("cleaner.py", "links.py"):
+        digest.update(Path(__file__).with_name(name).read_bytes())
+    digest.update(f"{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    return digest.hexdigest()[:16]
+
+
+class CleanedTextCache:
+    """Two-tier memo of `HTMLCleaner.extract_document` output: an in-memory LRU in front of a DiskCache.
+
+    Entries are keyed by the SHA-256 of the raw HTML and the truncation
+    budget. The disk tier records the cleaner version it was filled with and
+    is cleared when that no longer matches the running code.
+    """
+
+    def __init__(self, store: Optional[DiskCache], memory_items: int, version: Optional[str] = None):
+        self.store = store
+        self.memory_items = memory_items
+        self.version = version or cleaner_version()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        if store is not None and store.get(VERSION_KEY) != self.version:
+            store.clear()
+            store.set(VERSION_KEY, self.version)
+
+    @classmethod
+    def from_settings(cls) -> "CleanedTextCache":
+        return cls(
+            DiskCache(settings.CLEAN_CACHE_PATH, max_bytes=settings.CLEAN_CACHE_MAX_MB * 1024 * 1024),
+            memory_items=settings.CLEAN_CACHE_MEMORY_ITEMS,
+        )
+
+    @staticmethod
+    def key(html: str, max_chars: int) -> str:
+        return f"clean:{max_chars}:{hashlib.sha256(html.encode('utf-8', 'surrogatepass')).hexdigest()}"
+
+    def get(self, html: str, max_chars: int) -> Optional[Dict]:
+        """Return the cleaned document, or None on a miss in both tiers"""
+        key = self.key(html, max_chars)
+        with self._lock:
+            document = self._memory.get(key)
+            if document is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return document
+        value = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            document = json.loads(value)
+            self._remember(key, document)
+        return document
+
+    def put(self, html: str, max_chars: int, document: Dict) -> None:
+        key = self.key(html, max_chars)
+        with self._lock:
+            self._remember(key, document)
+        if self.store is not None:
+            self.store.set(key, json.dumps(document))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_items": len(self._memory),
+            }
+
+    def _remember(self, key: str, document: Dict) -> None:
+        self._memory[key] = document
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+
+_clean_cache: Optional[CleanedTextCache] = None
+
+
+def get_clean_cache() -> Optional[CleanedTextCache]:
+    """Get or create the process-wide cleaned-text cache; None when disabled"""
+    global _clean_cache
+    if not settings.CLEAN_CACHE_ENABLED:
+        return None
+    if _clean_cache is None:
+        _clean_cache = CleanedTextCache.from_settings()
+    return _clean_cache
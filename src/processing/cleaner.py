@@ -1,5 +1,196 @@
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from html.parser import HTMLParser
+from itertools import islice
+from typing import TYPE_CHECKING, List, Dict, Iterable, Iterator, Optional, Tuple
+import atexit
+import multiprocessing
+import os
 import re
+import threading
+from config.settings import settings
+from processing.links import is_tracking_pixel, merge_links, normalize_url
+
+if TYPE_CHECKING:
+    from processing.cache import CleanedTextCache
+
+# Subtrees whose text never reaches the output. script/style/header/footer/nav
+# are decomposed by `clean`; BeautifulSoup's get_text also leaves out strings
+# inside template/rt/rp, so the streaming extractor skips those too.
+SKIPPED_TAGS = {'script', 'style', 'header', 'footer', 'nav', 'template', 'rt', 'rp'}
+
+# Elements that never have children, so they must not be pushed on the open-tag stack
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr',
+}
+
+# Characters fed to the incremental parser at a time
+FEED_CHUNK_SIZE = 16 * 1024
+
+# Per-email caps on collected links and candidate images
+MAX_LINKS = 50
+MAX_IMAGES = 10
+
+# A cleaned line ending in one of these closes its paragraph
+SENTENCE_END = ('.', '!', '?', ':', ';', '"', '\u201d', ')', ']')
+
+
+# Shared worker pool for parallel cleaning, created on first use
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Get or create the shared cleaning pool.
+    
+    Workers are spawned rather than forked: the Gmail prefetch thread is
+    usually still downloading while we clean, and forking a process with
+    live threads can deadlock the child.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+class _BudgetReached(Exception):
+    """Raised from inside the parser to stop once max_chars is exceeded"""
+
+
+class _TextExtractor(HTMLParser):
+    """Incremental HTML-to-text extractor matching `HTMLCleaner.clean` output.
+
+    Text runs are stripped, whitespace-normalised and joined with newlines as
+    they complete, and parsing stops as soon as the text is longer than
+    `max_chars`. Anchors and images in the visible part of the document are
+    collected along the way.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.length = 0  # len('\n'.join(self.parts))
+        self.links: List[Dict[str, str]] = []
+        self.images: List[str] = []
+        self._pending: List[str] = []
+        self._open_tags: List[str] = []
+        self._closed_voids: List[str] = []
+        self._skip_depth = 0
+        self._anchor: Optional[Tuple[str, List[str]]] = None
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if not self._skip_depth:
+            self._collect(tag, attrs)
+        if tag in VOID_TAGS:
+            # BeautifulSoup closes these at once and swallows one matching end tag later
+            self._closed_voids.append(tag)
+            return
+        self._open_tags.append(tag)
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+        if not self._skip_depth:
+            self._collect(tag, attrs)
+            if tag == 'a':
+                self.finish_anchor()
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_voids:
+            # `<br>text</br>`: the end tag of an already-closed void element doesn't split the text
+            self._closed_voids.remove(tag)
+            return
+        self._flush()
+        if tag == 'a':
+            self.finish_anchor()
+        # Like BeautifulSoup, an end tag closes everything opened after its start tag
+        # and stray end tags are ignored.
+        if tag not in self._open_tags:
+            return
+        while self._open_tags:
+            opened = self._open_tags.pop()
+            if opened in SKIPPED_TAGS:
+                self._skip_depth -= 1
+            if opened == tag:
+                break
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._pending.append(data)
+            if self._anchor is not None:
+                self._anchor[1].append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.startswith('CDATA[') and not self._skip_depth:
+            self._pending.append(data[len('CDATA['):])
+            self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def finish_anchor(self):
+        if self._anchor is None:
+            return
+        url, text = self._anchor
+        self._anchor = None
+        self.links.append({'url': url, 'text': ' '.join(''.join(text).split())})
+
+    def _collect(self, tag, attrs):
+        if tag == 'a':
+            # Anchors don't nest; a new one implicitly closes the last
+            self.finish_anchor()
+            url = normalize_url(dict(attrs).get('href'))
+            if url:
+                self._anchor = (url, [])
+        elif tag == 'img' and len(self.images) < MAX_IMAGES:
+            attributes = dict(attrs)
+            url = normalize_url(attributes.get('src'))
+            if url and url not in self.images and not is_tracking_pixel(attributes):
+                self.images.append(url)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        text = ''.join(self._pending).strip()
+        self._pending.clear()
+        if not text:
+            return
+        # Same normalisation as `clean`; it never spans the '\n' joins because
+        # every run is already stripped.
+        text = re.sub(r'\n\s*\n', '\n\n', text)
+        text = re.sub(r' +', ' ', text)
+        self.length += len(text) + (1 if self.parts else 0)
+        self.parts.append(text)
+        if self.length > self.max_chars:
+            raise _BudgetReached()
+
 
 class HTMLCleaner:
     @staticmethod
@@ -23,4 +214,120 @@ class HTMLCleaner:
     @staticmethod
     def truncate(text: str, max_chars: int = 3000) -> str:
         """Truncate long text"""
-        return text[:max_chars] + "..." if len(text) > max_chars else text
\ No newline at end of file
+        return text[:max_chars] + "..." if len(text) > max_chars else text
+    
+    @staticmethod
+    def paragraphs(text: str) -> List[str]:
+        """Split cleaned text into story-sized paragraphs.
+        
+        Cleaned text has one line per HTML text run and rarely any blank
+        lines, so every line starts a paragraph, except that a run broken up by
+        inline markup ("Read the <a>paper</a> here.") is joined back: a line
+        continues the previous one when that one doesn't end a sentence and
+        the line starts in lower case or with punctuation.
+        """
+        paragraphs: List[List[str]] = []
+        previous = ''
+        for line in text.split('\n'):
+            stripped = line.strip()
+            if not stripped:
+                previous = ''
+                continue
+            first = stripped[0]
+            if previous and not previous.endswith(SENTENCE_END) and (first.islower() or not first.isalnum()):
+                paragraphs[-1].append(line)
+            else:
+                paragraphs.append([line])
+            previous = stripped
+        return ['\n'.join(lines) for lines in paragraphs]
+    
+    @staticmethod
+    def extract(html: str, max_chars: int = 3000) -> str:
+        """Single-pass equivalent of `truncate(clean(html), max_chars)`.
+        
+        Streams the HTML through the stdlib incremental parser and stops
+        reading once `max_chars` of text have been produced, so long
+        marketing emails are never parsed past the part we keep.
+        """
+        return HTMLCleaner.extract_document(html, max_chars)['text']
+    
+    @staticmethod
+    def extract_document(html: str, max_chars: int = 3000) -> Dict:
+        """`extract` plus the links and images found in the same pass.
+        
+        Returns {'text', 'links': [{'url', 'text'}], 'images': [url]} with
+        URLs normalised (redirects unwrapped, tracking parameters removed).
+        Only the part of the email that made it into `text` is scanned.
+        """
+        parser = _TextExtractor(max_chars)
+        try:
+            for start in range(0, len(html), FEED_CHUNK_SIZE):
+                parser.feed(html[start:start + FEED_CHUNK_SIZE])
+            parser.close()
+        except _BudgetReached:
+            pass
+        parser.finish_anchor()
+        return {
+            'text': HTMLCleaner.truncate('\n'.join(parser.parts), max_chars),
+            'links': merge_links(parser.links, MAX_LINKS),
+            'images': parser.images,
+        }
+    
+    @staticmethod
+    def extract_many(bodies: List[str], max_chars: int = 3000, workers: int = None,
+                     cache: "CleanedTextCache" = None) -> List[Dict]:
+        """`extract_document` over many bodies, fanned out over a process pool.
+        
+        Output order matches input order. Bodies found in `cache` are not
+        re-cleaned. Batches smaller than CLEAN_PARALLEL_THRESHOLD (or a single
+        worker) are cleaned serially, where pool start-up and pickling would
+        cost more than they save.
+        """
+        results: List[Optional[Dict]] = [None] * len(bodies)
+        pending: Dict[str, List[int]] = {}
+        for i, body in enumerate(bodies):
+            cached = cache.get(body, max_chars) if cache is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                # Identical bodies in one batch are only cleaned once
+                pending.setdefault(body, []).append(i)
+        
+        todo = list(pending)
+        if workers is None:
+            workers = settings.CLEAN_WORKERS or os.cpu_count() or 1
+        extract = partial(HTMLCleaner.extract_document, max_chars=max_chars)
+        if workers <= 1 or len(todo) < settings.CLEAN_PARALLEL_THRESHOLD:
+            cleaned = [extract(body) for body in todo]
+        else:
+            # A few chunks per worker: large enough to amortise pickling, small
+            # enough that one slow email doesn't leave other workers idle.
+            chunksize = max(1, len(todo) // (workers * 4))
+            cleaned = list(_get_pool(workers).map(extract, todo, chunksize=chunksize))
+        
+        for body, document in zip(todo, cleaned):
+            if cache is not None:
+                cache.put(body, max_chars, document)
+            for i in pending[body]:
+                results[i] = document
+        return results
+    
+    @staticmethod
+    def extract_emails(emails: Iterable[Dict], max_chars: int = 3000, batch_size: int = None,
+                       cache: "CleanedTextCache" = None) -> Iterator[Tuple[Dict, Dict]]:
+        """Yield (email, cleaned document) pairs from a possibly streaming source.
+        
+        Emails are taken from the stream in batches of CLEAN_BATCH_SIZE and each
+        batch is cleaned with `extract_many`, so cleaning keeps pace with
+        downloading instead of waiting for the whole mailbox.
+        """
+        batch_size = batch_size or settings.CLEAN_BATCH_SIZE
+        iterator = iter(emails)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            documents = HTMLCleaner.extract_many(
+                [email.get('body', '') or '' for email in batch], max_chars, cache=cache
+            )
+            yield from zip(batch, documents)
@@ -0,0 +1,162 @@
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from config.settings import settings
+from processing.cleaner import HTMLCleaner
+from processing.reducer import sender_name
+
+WORD = re.compile(r'\w+')
+
+# Words per shingle; three keeps rephrased sentences about the same story similar
+SHINGLE_SIZE = 3
+
+# Short greetings and sign-offs; an email left with only these has no story of its own
+SALUTATION = re.compile(
+    r'^(hi|hello|hey|dear|welcome|good (morning|afternoon|evening)|happy \w+day|thanks|thank you|cheers|'
+    r'best|regards|see you|until next time|talk soon)\b[^\n]{0,60}$',
+    re.IGNORECASE,
+)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """64-bit hashes of the word `size`-grams of `text`, ignoring case and punctuation"""
+    words = WORD.findall(text.lower())
+    if len(words) < size:
+        words = words + [''] * (size - len(words))
+    return {
+        int.from_bytes(hashlib.blake2b(' '.join(words[i:i + size]).encode('utf-8'), digest_size=8).digest(), 'big')
+        for i in range(len(words) - size + 1)
+    }
+
+
+class MinHasher:
+    """MinHash signatures, with each permutation a fixed random XOR mask over 64-bit shingle hashes"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.masks = [rng.getrandbits(64) for _ in range(num_perm)]
+
+    def signature(self, hashes: Set[int]) -> Tuple[int, ...]:
+        return tuple(min(map(mask.__xor__, hashes)) for mask in self.masks)
+
+    @staticmethod
+    def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity: the share of positions where the signatures agree"""
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class LSHIndex:
+    """Banded locality-sensitive hashing: signatures sharing any whole band become candidates"""
+
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self.buckets: Dict[Tuple, List[int]] = defaultdict(list)
+
+    def add(self, key: int, signature: Tuple[int, ...]) -> Set[int]:
+        """Index `signature` under `key`; returns keys already indexed in a shared bucket"""
+        candidates: Set[int] = set()
+        for band in range(self.bands):
+            bucket = self.buckets[(band, signature[band * self.rows:(band + 1) * self.rows])]
+            candidates.update(bucket)
+            bucket.append(key)
+        return candidates
+
+
+class NearDuplicateFilter:
+    """Keeps one copy of each story that several newsletters cover.
+
+    Paragraphs (`HTMLCleaner.paragraphs` of the cleaned body) of at least
+    `min_words` words are MinHashed and clustered
+    through an LSH index; pairs whose estimated Jaccard similarity reaches
+    `threshold` join a cluster. The longest paragraph of a cluster stays
+    and the rest are removed from their emails; the keeping email lists the
+    other newsletters in `also_covered_by`. An email left with nothing but
+    greetings and sign-offs is emptied so callers can skip it.
+    """
+
+    def __init__(self, threshold: float = None, min_words: int = None, num_perm: int = None, bands: int = None):
+        self.threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+        self.min_words = settings.DEDUP_MIN_WORDS if min_words is None else min_words
+        num_perm = num_perm or settings.DEDUP_NUM_PERM
+        self.bands = bands or settings.DEDUP_BANDS
+        self.rows = max(1, num_perm // self.bands)
+        self.hasher = MinHasher(self.bands * self.rows)
+
+    def clusters(self, texts: Iterable[str]) -> List[List[int]]:
+        """Groups (of two or more) of indexes into `texts` that are near-duplicates of each other"""
+        index = LSHIndex(self.bands, self.rows)
+        signatures = []
+        parent: Dict[int, int] = {}
+
+        def find(key: int) -> int:
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for key, text in enumerate(texts):
+            signature = self.hasher.signature(shingles(text))
+            signatures.append(signature)
+            parent[key] = key
+            for other in index.add(key, signature):
+                if find(other) != find(key) and MinHasher.similarity(signature, signatures[other]) >= self.threshold:
+                    parent[find(key)] = find(other)
+
+        grouped: Dict[int, List[int]] = defaultdict(list)
+        for key in parent:
+            grouped[find(key)].append(key)
+        return [members for members in grouped.values() if len(members) > 1]
+
+    def apply(self, emails: List[Dict]) -> Dict:
+        """Remove duplicate paragraphs from email bodies in place; returns a report of what was merged"""
+        paragraphs: List[Tuple[int, int]] = []  # (email index, paragraph index)
+        texts: List[str] = []
+        blocks = [HTMLCleaner.paragraphs(email.get('body', '') or '') for email in emails]
+        for e, email_blocks in enumerate(blocks):
+            for p, block in enumerate(email_blocks):
+                if len(WORD.findall(block)) >= self.min_words:
+                    paragraphs.append((e, p))
+                    texts.append(block)
+
+        removed: Set[Tuple[int, int]] = set()
+        notes: Dict[int, List[str]] = defaultdict(list)
+        report = {'emails': len(emails), 'paragraphs': len(texts), 'clusters': [], 'paragraphs_removed': 0,
+                  'chars_before': sum(len(email.get('body', '') or '') for email in emails), 'chars_after': 0}
+        for members in self.clusters(texts):
+            keep = max(members, key=lambda key: (len(texts[key]), -key))
+            kept = paragraphs[keep]
+            others = [paragraphs[key] for key in members if key != keep]
+            removed.update(others)
+            for e, _ in others:
+                name = sender_name(emails[e].get('from', ''))
+                if e != kept[0] and name not in notes[kept[0]]:
+                    notes[kept[0]].append(name)
+            report['clusters'].append({
+                'kept': emails[kept[0]].get('id', ''),
+                'merged': [emails[e].get('id', '') for e, _ in others],
+                'preview': texts[keep][:80],
+            })
+
+        for e, email in enumerate(emails):
+            kept_blocks = [block for p, block in enumerate(blocks[e]) if (e, p) not in removed]
+            if len(kept_blocks) != len(blocks[e]):
+                # Only greetings and sign-offs left: the email's stories are all covered elsewhere
+                if all(SALUTATION.match(block.strip()) for block in kept_blocks):
+                    kept_blocks = []
+                email['body'] = '\n'.join(kept_blocks)
+            if notes.get(e):
+                email['also_covered_by'] = notes[e]
+            report['chars_after'] += len(email.get('body', '') or '')
+        report['paragraphs_removed'] = len(removed)
+        return report
+
+
+def format_report(report: Dict) -> str:
+    return (
+        f"Near-duplicates: {len(report['clusters'])} clusters over {report['paragraphs']} paragraphs, "
+        f"{report['paragraphs_removed']} removed, {report['chars_before']} -> {report['chars_after']} chars"
+    )
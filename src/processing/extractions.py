@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from config.settings import settings
+from database.connection import get_db_session
+from database.repositories import EmailExtractionRepository
+
+
+class ExtractionStore:
+    """Per-email extraction storage for incremental summarization.
+
+    Each call runs in its own short session, so no transaction is held open
+    while the model works. Entries older than EXTRACTION_RETENTION_DAYS are
+    pruned on save.
+    """
+
+    def get_many(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[dict]]:
+        with get_db_session() as session:
+            return EmailExtractionRepository(session).get_many(keys)
+
+    def save_many(self, extractions: List[Tuple[str, str, List[dict]]]) -> None:
+        with get_db_session() as session:
+            repository = EmailExtractionRepository(session)
+            repository.save_many(extractions)
+            repository.prune(datetime.utcnow() - timedelta(days=settings.EXTRACTION_RETENTION_DAYS))
@@ -1,69 +1,106 @@
-from typing import Dict
+import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from typing import Callable, Dict, Iterable, List, TextIO, Tuple
 
-class NewsletterFormatter:
-    @staticmethod
-    def to_html(data: Dict) -> str:
-        """Convert JSON to HTML newsletter"""
-        html = f"""
+from config.settings import settings
+
+PLACEHOLDER = re.compile(r'\{\{\s*(\w+)(\|raw)?\s*\}\}')
+
+SAFE_SCHEMES = ('http://', 'https://', 'mailto:')
+
+
+def _plain(value) -> str:
+    return value if type(value) is str else str(value)
+
+
+def _html(value) -> str:
+    """`html.escape(value, quote=True)`, inlined: it runs for every field of every item"""
+    if type(value) is not str:
+        value = str(value)
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;') \
+        .replace('"', '&quot;').replace("'", '&#x27;')
+
+
+class Template:
+    """A template compiled once into (literal, field, converter) parts.
+
+    `{{ name }}` is replaced by the escaped field value, `{{ name|raw }}` by
+    the value as given. `render_into` writes each literal and value straight
+    to a writer (list.append, stream.write), so documents are built from
+    chunks instead of repeated concatenation.
+    """
+
+    def __init__(self, source: str, escaper: Callable[[object], str] = _html):
+        pieces = PLACEHOLDER.split(source)
+        self.parts = [
+            (pieces[i], pieces[i + 1], escaper if pieces[i + 2] is None else _plain)
+            for i in range(0, len(pieces) - 1, 3)
+        ]
+        self.tail = pieces[-1]
+
+    def render(self, values: Dict) -> str:
+        chunks = []
+        self.render_into(chunks.append, values)
+        return ''.join(chunks)
+
+    def render_into(self, write: Callable[[str], object], values: Dict) -> None:
+        for literal, name, convert in self.parts:
+            write(literal)
+            write(convert(values[name]))
+        write(self.tail)
+
+    def render_each(self, write: Callable[[str], object], rows: Iterable[Dict]) -> None:
+        """`render_into` for every values dict in `rows` (one loop, no call per row)"""
+        parts, tail = self.parts, self.tail
+        for values in rows:
+            for literal, name, convert in parts:
+                write(literal)
+                write(convert(values[name]))
+            write(tail)
+
+
+HEAD = Template("""
 <!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <style>
-        body {{ 
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-            max-width: 680px; 
-            margin: 0 auto; 
+            max-width: 680px;
+            margin: 0 auto;
             padding: 20px;
             background: #f5f5f5;
-        }}
-        .container {{ background: white; padding: 40px; border-radius: 8px; }}
-        h1 {{ color: #1a1a1a; font-size: 28px; }}
-        .date {{ color: #666; font-size: 14px; margin-bottom: 20px; }}
-        .section {{ margin: 30px 0; }}
-        .section h2 {{ color: #333; font-size: 20px; border-bottom: 2px solid #007aff; padding-bottom: 8px; }}
-        .item {{ 
-            background: #f8f9fa; 
-            padding: 15px; 
-            margin: 10px 0; 
+        }
+        .container { background: white; padding: 40px; border-radius: 8px; }
+        h1 { color: #1a1a1a; font-size: 28px; }
+        .date { color: #666; font-size: 14px; margin-bottom: 20px; }
+        .section { margin: 30px 0; }
+        .section h2 { color: #333; font-size: 20px; border-bottom: 2px solid #007aff; padding-bottom: 8px; }
+        .item {
+            background: #f8f9fa;
+            padding: 15px;
+            margin: 10px 0;
             border-radius: 6px;
             border-left: 3px solid #007aff;
-        }}
-        .item-title {{ font-weight: 600; color: #1a1a1a; margin-bottom: 5px; }}
-        .item-snippet {{ color: #555; font-size: 14px; line-height: 1.5; }}
-        .source {{ color: #999; font-size: 12px; margin-top: 8px; }}
-        a {{ color: #007aff; text-decoration: none; }}
-        .footer {{ margin-top: 40px; padding-top: 20px; border-top: 1px solid #ddd; color: #999; font-size: 12px; }}
+        }
+        .item-title { font-weight: 600; color: #1a1a1a; margin-bottom: 5px; }
+        .item-snippet { color: #555; font-size: 14px; line-height: 1.5; }
+        .source { color: #999; font-size: 12px; margin-top: 8px; }
+        a { color: #007aff; text-decoration: none; }
+        .footer { margin-top: 40px; padding-top: 20px; border-top: 1px solid #ddd; color: #999; font-size: 12px; }
     </style>
 </head>
 <body>
     <div class="container">
-        <h1>{data['headline']}</h1>
-        <div class="date">{data.get('date', datetime.now().strftime('%B %d, %Y'))}</div>
-        <p><strong>{data.get('summary', '')}</strong></p>
-"""
-        
-        for section in data.get('sections', []):
-            html += f'<div class="section"><h2>{section["title"]}</h2>'
-            
-            for item in section.get('items', []):
-                title = item.get('title', '')
-                snippet = item.get('snippet', '')
-                source = item.get('source', '')
-                url = item.get('url', '#')
-                
-                html += f"""
-                <div class="item">
-                    <div class="item-title"><a href="{url}">{title}</a></div>
-                    <div class="item-snippet">{snippet}</div>
-                    <div class="source">Source: {source}</div>
-                </div>
-                """
-            
-            html += '</div>'
-        
-        html += """
+        <h1>{{ headline }}</h1>
+        <div class="date">{{ date }}</div>
+        <p><strong>{{ summary }}</strong></p>
+""")
+
+FOOTER = """
         <div class="footer">
             You're receiving this because you subscribed to ML Daily Digest.
             <a href="#">Unsubscribe</a>
@@ -72,4 +109,197 @@ class NewsletterFormatter:
 </body>
 </html>
 """
-        return html
\ No newline at end of file
+
+SECTION_HEAD = Template('<div class="section"><h2>{{ title }}</h2>')
+
+ITEM = Template("""
+                <div class="item">
+                    <div class="item-title"><a href="{{ url }}">{{ title }}</a></div>
+                    <div class="item-snippet">{{ snippet }}</div>
+                    <div class="source">Source: {{ source }}</div>
+                </div>
+                """)
+
+SECTION_TAIL = '</div>'
+
+TEXT_HEAD = Template("{{ headline }}\n{{ date }}\n\n{{ summary }}\n", _plain)
+
+TEXT_SECTION_HEAD = Template("\n{{ title }}\n{{ rule }}\n", _plain)
+
+TEXT_ITEM = Template("\n- {{ title }}\n", _plain)
+
+TEXT_FOOTER = "\n--\nYou're receiving this because you subscribed to ML Daily Digest.\n"
+
+
+def digest_key(data: Dict) -> Tuple:
+    """Render cache key for a digest: the fields the renderers read, as nested tuples.
+
+    Building it is a small fraction of a render (no serialising or hashing
+    the whole digest up front), and tuple keys compare exactly, so a hash
+    collision can never serve another digest's output.
+    """
+    return (
+        data.get('headline'), data.get('date'), data.get('summary'),
+        tuple(section_key(section) for section in data.get('sections', [])),
+    )
+
+
+def section_key(section: Dict) -> Tuple:
+    return (section.get('title'), tuple(
+        (item.get('title'), item.get('snippet'), item.get('source'), item.get('url'), bool(item.get('follow_up')))
+        for item in section.get('items', [])
+    ))
+
+
+def safe_url(url: str) -> str:
+    """The url if it is an absolute http(s)/mailto link, otherwise '#'"""
+    url = (url or '').strip()
+    return url if url[:8].lower().startswith(SAFE_SCHEMES) else '#'
+
+
+def _item_values(item: Dict) -> Dict:
+    # Models emit null for missing fields; render those as empty, not "None"
+    source = item.get('source') or ''
+    if item.get('follow_up'):
+        source = f"Follow-up · {source}"
+    return {
+        'title': item.get('title') or '',
+        'snippet': item.get('snippet') or '',
+        'source': source,
+        'url': safe_url(item.get('url')),
+    }
+
+
+def _head_values(data: Dict) -> Dict:
+    return {
+        'headline': data.get('headline') or '',
+        'date': data.get('date') or datetime.now().strftime('%B %d, %Y'),
+        'summary': data.get('summary') or '',
+    }
+
+
+class RenderCache:
+    """In-memory LRU of rendered output keyed by what was rendered (see `digest_key`)"""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: Tuple, render: Callable[[], str]) -> str:
+        try:
+            hash(key)
+        except TypeError:
+            # A field the model returned as a list or object; render it uncached
+            return render()
+        if self.max_items <= 0:
+            return render()
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = render()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class NewsletterFormatter:
+    # Shared by every formatter instance
+    cache = RenderCache(settings.FORMATTER_CACHE_ITEMS)
+
+    @staticmethod
+    def write_chunks(write: Callable[[str], object], data: Dict, sections_html: List[str] = None) -> None:
+        """Pass the HTML newsletter to `write` in chunks, without building one string.
+
+        `sections_html` takes sections already rendered with `section_html`
+        (e.g. while the summary was still streaming) instead of rendering them here.
+        """
+        HEAD.render_into(write, _head_values(data))
+        if sections_html is None:
+            for section in data.get('sections', []):
+                _write_section(write, section)
+        else:
+            for html in sections_html:
+                write(html)
+        write(FOOTER)
+
+    @staticmethod
+    def to_html(data: Dict, sections_html: List[str] = None) -> str:
+        """Convert JSON to HTML newsletter.
+
+        Field values are HTML-escaped and item urls limited to http(s)/mailto.
+        Documents rendered from JSON alone are cached by `digest_key`.
+        """
+        if sections_html is not None:
+            return _join(NewsletterFormatter.write_chunks, data, sections_html)
+        values = dict(data, date=_head_values(data)['date'])
+        return NewsletterFormatter.cache.get_or_render(
+            ('html', digest_key(values)), lambda: _join(NewsletterFormatter.write_chunks, values)
+        )
+
+    @staticmethod
+    def write_html(data: Dict, stream: TextIO, sections_html: List[str] = None) -> None:
+        """Write the HTML newsletter to a text stream chunk by chunk"""
+        NewsletterFormatter.write_chunks(stream.write, data, sections_html)
+
+    @staticmethod
+    def section_html(section: Dict) -> str:
+        """Render one digest section (cached by `section_key`)"""
+        return NewsletterFormatter.cache.get_or_render(
+            ('section', section_key(section)), lambda: _render_section(section)
+        )
+
+    @staticmethod
+    def to_text(data: Dict) -> str:
+        """Plain-text rendering of the newsletter, sent as the multipart alternative to the HTML"""
+        values = dict(data, date=_head_values(data)['date'])
+        return NewsletterFormatter.cache.get_or_render(
+            ('text', digest_key(values)), lambda: _render_text(values)
+        )
+
+
+def _join(write_chunks: Callable, *args) -> str:
+    chunks = []
+    write_chunks(chunks.append, *args)
+    return ''.join(chunks)
+
+
+def _write_section(write: Callable[[str], object], section: Dict) -> None:
+    SECTION_HEAD.render_into(write, {'title': section.get('title') or ''})
+    ITEM.render_each(write, map(_item_values, section.get('items', [])))
+    write(SECTION_TAIL)
+
+
+def _render_section(section: Dict) -> str:
+    return _join(_write_section, section)
+
+
+def _render_text(data: Dict) -> str:
+    chunks = [TEXT_HEAD.render(_head_values(data))]
+    for section in data.get('sections', []):
+        title = section.get('title') or ''
+        TEXT_SECTION_HEAD.render_into(chunks.append, {'title': title, 'rule': '-' * len(title)})
+        for item in section.get('items', []):
+            values = _item_values(item)
+            TEXT_ITEM.render_into(chunks.append, values)
+            if values['snippet']:
+                chunks.append(f"  {values['snippet']}\n")
+            chunks.append(f"  Source: {values['source']}\n")
+            if values['url'] != '#':
+                chunks.append(f"  {values['url']}\n")
+    chunks.append(TEXT_FOOTER)
+    return ''.join(chunks)
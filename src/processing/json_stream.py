@@ -0,0 +1,105 @@
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Path = Tuple[Any, ...]
+
+
+class IncrementalJSONParser:
+    """Scans a JSON document as it arrives and reports values the moment they close.
+
+    `on_value(path, value)` is called for every completed object, and for
+    string fields of the top-level object, with `path` the keys and array
+    indexes leading to it, e.g. ("sections", 0, "items", 2). Anything
+    before the first '{' (such as a ```json fence) is ignored, as is
+    anything after the top-level object closes.
+    """
+
+    def __init__(self, on_value: Callable[[Path, Any], None]):
+        self.on_value = on_value
+        self.done = False
+        self._text = ""
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        # Open containers: {'kind', 'start', 'path', 'key', 'index', 'expect_key'}
+        self._stack: List[Dict] = []
+
+    def feed(self, chunk: str) -> None:
+        if self.done or not chunk:
+            return
+        offset = len(self._text)
+        self._text += chunk
+        for position in range(offset, len(self._text)):
+            self._step(self._text[position], position)
+            if self.done:
+                return
+
+    def _step(self, char: str, position: int) -> None:
+        if not self._started:
+            if char != '{':
+                return
+            self._started = True
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                self._close_string(position)
+            return
+
+        frame = self._stack[-1] if self._stack else None
+        if char == '"':
+            self._in_string = True
+            self._string_start = position
+        elif char in '{[':
+            path = self._child_path(frame)
+            self._stack.append({
+                'kind': 'object' if char == '{' else 'array',
+                'start': position,
+                'path': path,
+                'key': None,
+                'index': 0,
+                'expect_key': char == '{',
+            })
+        elif char in '}]':
+            closed = self._stack.pop()
+            if closed['kind'] == 'object':
+                self._emit(closed['path'], self._text[closed['start']:position + 1])
+            if not self._stack:
+                self.done = True
+        elif char == ',' and frame is not None:
+            if frame['kind'] == 'array':
+                frame['index'] += 1
+            else:
+                frame['expect_key'] = True
+        elif char == ':' and frame is not None and frame['kind'] == 'object':
+            frame['expect_key'] = False
+
+    def _close_string(self, position: int) -> None:
+        frame = self._stack[-1] if self._stack else None
+        if frame is None or frame['kind'] != 'object':
+            return
+        raw = self._text[self._string_start:position + 1]
+        if frame['expect_key']:
+            frame['key'] = json.loads(raw)
+        elif len(self._stack) == 1:
+            self._emit((frame['key'],), raw)
+
+    def _child_path(self, parent: Optional[Dict]) -> Path:
+        if parent is None:
+            return ()
+        if parent['kind'] == 'array':
+            return parent['path'] + (parent['index'],)
+        return parent['path'] + (parent['key'],)
+
+    def _emit(self, path: Path, raw: str) -> None:
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            # Not valid JSON on its own (e.g. a trailing comma); the final parse decides
+            return
+        self.on_value(path, value)
@@ -0,0 +1,120 @@
+import re
+from typing import Dict, List, Optional
+from urllib.parse import SplitResult, parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only identify the campaign or subscriber
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', '_hsenc', '_hsmi',
+    'mkt_tok', 'oly_enc_id', 'oly_anon_id', 'vero_id', 'vero_conv', 'ck_subscriber_id',
+    'ref_src', 'igshid', 's_cid', 'trk', 'trkcampaign', '__s',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+# Parameters click-tracking services use to carry the real destination
+REDIRECT_PARAMS = ('url', 'u', 'q', 'target', 'dest', 'destination', 'redirect', 'redirect_url', 'redirect_uri', 'link', 'r')
+
+# Hosts (and their subdomains) known to be redirectors or click trackers
+REDIRECT_DOMAINS = {
+    'google.com', 'l.facebook.com', 'lm.facebook.com', 't.co', 'lnkd.in', 'linkedin.com', 'youtube.com',
+    'out.reddit.com', 'slack-redir.net', 'list-manage.com', 'mailchi.mp', 'convertkit-mail.com',
+    'convertkit-mail2.com', 'ck.page', 'substack.com', 'beehiiv.com', 'mlsend.com', 'sendgrid.net',
+    'hubspotlinks.com', 'hs-analytics.net', 'mailgun.org', 'rs6.net', 'cmail19.com', 'cmail20.com',
+    'safelinks.protection.outlook.com',
+}
+# First labels of the tracking subdomains newsletter platforms send clicks through (click.example.com)
+REDIRECT_SUBDOMAINS = {
+    'click', 'clicks', 'link', 'links', 'track', 'tracking', 'trk', 'go', 'out', 'redirect', 'r', 'l', 'email', 'url',
+}
+
+# Anchors that point at list management rather than content
+SKIPPED_LINK_TEXT = re.compile(
+    r'unsubscribe|view (this email )?in (your )?browser|manage (your )?(preferences|subscription)|update (your )?preferences',
+    re.IGNORECASE,
+)
+
+MAX_UNWRAP_DEPTH = 5
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """Canonical http(s) URL with redirect wrappers and tracking parameters removed.
+
+    Returns None for anything that isn't a web link (mailto:, tel:, anchors,
+    javascript:, data: URIs).
+    """
+    url = (url or '').strip()
+    for _ in range(MAX_UNWRAP_DEPTH):
+        parts = urlsplit(url)
+        if not _is_web(parts):
+            return None
+        target = _redirect_target(parts.query) if is_redirector(parts.hostname or '') else None
+        if target is None:
+            break
+        url = target
+    else:
+        # Still unwrapping after MAX_UNWRAP_DEPTH hops: keep the innermost URL reached
+        parts = urlsplit(url)
+        if not _is_web(parts):
+            return None
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    netloc = parts.netloc.lower()
+    if parts.scheme.lower() == 'http' and netloc.endswith(':80'):
+        netloc = netloc[:-3]
+    elif parts.scheme.lower() == 'https' and netloc.endswith(':443'):
+        netloc = netloc[:-4]
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path or '/', urlencode(query), ''))
+
+
+def _is_web(parts: SplitResult) -> bool:
+    return parts.scheme.lower() in ('http', 'https') and bool(parts.netloc)
+
+
+def is_redirector(host: str) -> bool:
+    """Whether `host` is a known redirector or a click-tracking subdomain.
+
+    Only these have a URL-valued query parameter unwrapped; elsewhere
+    (a search page's `?q=https://...`) the URL is kept as it is.
+    """
+    labels = host.lower().rstrip('.').split('.')
+    if any('.'.join(labels[i:]) in REDIRECT_DOMAINS for i in range(len(labels))):
+        return True
+    return len(labels) >= 3 and labels[0] in REDIRECT_SUBDOMAINS
+
+
+def _redirect_target(query: str) -> Optional[str]:
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    for key in REDIRECT_PARAMS:
+        # parse_qsl has already percent-decoded the value once; decoding again would corrupt %25/%2F
+        value = params.get(key, '').strip()
+        if value.lower().startswith(('http://', 'https://')):
+            return value
+    return None
+
+
+def is_tracking_pixel(attrs: Dict[str, str]) -> bool:
+    """1x1 (or hidden) images used for open tracking"""
+    for dimension in ('width', 'height'):
+        value = (attrs.get(dimension) or '').strip().lower().rstrip('px')
+        if value in ('0', '1'):
+            return True
+    style = (attrs.get('style') or '').replace(' ', '').lower()
+    return 'display:none' in style or 'visibility:hidden' in style
+
+
+def merge_links(links: List[Dict[str, str]], limit: int) -> List[Dict[str, str]]:
+    """Drop list-management anchors and duplicate URLs, keeping the first non-empty text per URL"""
+    merged: Dict[str, Dict[str, str]] = {}
+    for link in links:
+        if SKIPPED_LINK_TEXT.search(link['text']):
+            continue
+        existing = merged.get(link['url'])
+        if existing is None:
+            if len(merged) >= limit:
+                continue
+            merged[link['url']] = dict(link)
+        elif not existing['text']:
+            existing['text'] = link['text']
+    return list(merged.values())
@@ -0,0 +1,191 @@
+import json
+import re
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+from config.settings import settings
+from processing.packing import estimate_tokens
+
+# What a prompt asks for; lets backends that don't read prose (the local one) answer in the right shape
+TASK_DIGEST = "digest"
+TASK_ITEMS = "items"
+TASK_HEADLINE = "headline"
+TASK_SECTIONS = "sections"
+
+
+class LLMBackend(ABC):
+    """Text-in, text-out model interface behind NewsletterSummarizer.
+
+    `name` identifies the model in cache keys. `stream` yields text chunks;
+    backends without native streaming return the whole response as one chunk.
+    `schema` (see processing.structured) asks for schema-constrained JSON;
+    backends that can't enforce it rely on the prompt alone.
+    """
+
+    name = "backend"
+
+    @abstractmethod
+    def generate(self, prompt: str, task: str = TASK_DIGEST, schema: Dict = None) -> str:
+        """The complete response to `prompt`"""
+
+    def stream(self, prompt: str, task: str = TASK_DIGEST, schema: Dict = None) -> Iterator[str]:
+        yield self.generate(prompt, task, schema)
+
+
+class GeminiBackend(LLMBackend):
+    """google.generativeai model, or any object with the same generate_content API.
+
+    Schemas are passed as response_schema only when `structured` is set;
+    by default that is when the installed client supports it and the model
+    was created here rather than injected.
+    """
+
+    def __init__(self, model=None, structured: bool = None):
+        if model is None:
+            # Imported here: google.generativeai is slow to import and only needed once we summarize
+            import google.generativeai as genai
+
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            model = genai.GenerativeModel(settings.GEMINI_MODEL)
+            if structured is None:
+                structured = "response_schema" in getattr(genai.types.GenerationConfig, "__dataclass_fields__", {})
+        self.model = model
+        self.name = getattr(model, "model_name", settings.GEMINI_MODEL)
+        self.structured = bool(structured)
+
+    def generate(self, prompt: str, task: str = TASK_DIGEST, schema: Dict = None) -> str:
+        return self.model.generate_content(prompt, **self._options(schema)).text
+
+    def stream(self, prompt: str, task: str = TASK_DIGEST, schema: Dict = None) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, stream=True, **self._options(schema)):
+            yield chunk.text
+
+    def _options(self, schema: Dict = None) -> Dict:
+        if schema is None or not self.structured:
+            return {}
+        return {"generation_config": {"response_mime_type": "application/json", "response_schema": schema}}
+
+
+class LocalBackend(LLMBackend):
+    """Deterministic offline stand-in that builds schema-valid answers from the prompt itself.
+
+    Each email block in the prompt yields up to `items_per_email` items: the
+    first line of a paragraph becomes the title, the rest the snippet, and
+    the email's LINKS supply urls. Categories come from keyword rules.
+    Responses are delayed by `latency` seconds plus output tokens divided by
+    `tokens_per_second`, and streamed at that rate, so timing behaves like a
+    real model while the content is identical on every run.
+    """
+
+    name = "local"
+
+    CATEGORY_KEYWORDS = [
+        ("research", ("paper", "arxiv", "model", "benchmark", "study", "research")),
+        ("industry", ("funding", "raises", "launch", "acquire", "startup", "announces", "release")),
+        ("learning", ("tutorial", "course", "guide", "dataset", "learn", "how to")),
+        ("events", ("conference", "webinar", "deadline", "workshop", "summit", "meetup")),
+    ]
+
+    def __init__(self, latency: float = None, tokens_per_second: float = None, items_per_email: int = 3):
+        self.latency = settings.LOCAL_LLM_LATENCY_MS / 1000 if latency is None else latency
+        self.tokens_per_second = settings.LOCAL_LLM_TOKENS_PER_SECOND if tokens_per_second is None else tokens_per_second
+        self.items_per_email = items_per_email
+
+    def generate(self, prompt: str, task: str = TASK_DIGEST, schema: Dict = None) -> str:
+        text = self._answer(prompt, task)
+        time.sleep(self.latency + self._generation_seconds(text))
+        return text
+
+    def stream(self, prompt: str, task: str = TASK_DIGEST, schema: Dict = None) -> Iterator[str]:
+        text = self._answer(prompt, task)
+        time.sleep(self.latency)
+        chunk_size = 64
+        for start in range(0, len(text), chunk_size):
+            chunk = text[start:start + chunk_size]
+            time.sleep(self._generation_seconds(chunk))
+            yield chunk
+
+    def _generation_seconds(self, text: str) -> float:
+        if not self.tokens_per_second:
+            return 0.0
+        return estimate_tokens(text) / self.tokens_per_second
+
+    def _answer(self, prompt: str, task: str) -> str:
+        if task == TASK_HEADLINE:
+            titles = re.findall(r'^- (.+)$', prompt, re.MULTILINE)
+            headline = titles[0] if titles else "Today in ML"
+            if len(titles) > 1:
+                headline = f"{headline} and {len(titles) - 1} more stories"
+            return json.dumps({"headline": headline, "summary": f"{len(titles)} stories from today's newsletters."})
+
+        items = [item for position, block in enumerate(self._email_blocks(prompt)) for item in self._items(position, block)]
+        if task == TASK_ITEMS:
+            return json.dumps({"items": items}, ensure_ascii=False)
+
+        from processing.reducer import build_sections
+
+        for item in items:
+            item.pop("email", None)
+        if task == TASK_SECTIONS:
+            wanted = re.search(r'^SECTIONS: (.*)$', prompt, re.MULTILINE)
+            titles = [title.strip() for title in wanted.group(1).split("|")] if wanted else []
+            sections = [section for section in build_sections(items) if section["title"] in titles]
+            return json.dumps({"sections": sections}, ensure_ascii=False)
+        return json.dumps({
+            "headline": items[0]["title"] if items else "No newsletters today",
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "sections": build_sections(items),
+        }, ensure_ascii=False)
+
+    @staticmethod
+    def _email_blocks(prompt: str) -> List[str]:
+        start = prompt.find("\nSOURCE: ")
+        label = prompt.rfind("EMAIL: ", 0, start + 1) if start != -1 else -1
+        if label != -1 and prompt.count("\n", label, start) <= 1:
+            start = label
+        end = prompt.rfind("\nOutput as JSON")
+        if start == -1:
+            return []
+        return prompt[start:end if end > start else len(prompt)].split("---EMAIL_SEPARATOR---")
+
+    def _items(self, position: int, block: str) -> List[Dict]:
+        number = re.search(r'^EMAIL: (\d+)$', block, re.MULTILINE)
+        source = re.search(r'^SOURCE: (.*)$', block, re.MULTILINE)
+        content = block.split("\nCONTENT:\n", 1)[-1]
+        content, _, links_text = content.partition("\nLINKS:\n")
+        links = re.findall(r'^- .*: (https?://\S+)$', links_text, re.MULTILINE)
+
+        items = []
+        for paragraph in re.split(r'\n\s*\n', content):
+            lines = [line.strip() for line in paragraph.strip().split("\n") if line.strip()]
+            if not lines or len(lines[0]) < 12:
+                continue
+            snippet = " ".join(lines[1:])[:280] or lines[0]
+            items.append({
+                "email": int(number.group(1)) if number else position,
+                "category": self._category(" ".join(lines)),
+                "title": lines[0][:120],
+                "snippet": snippet,
+                "source": source.group(1).strip() if source else "",
+                "url": links[len(items)] if len(items) < len(links) else "",
+                "summary": snippet,
+            })
+            if len(items) >= self.items_per_email:
+                break
+        return items
+
+    def _category(self, text: str) -> str:
+        lowered = text.lower()
+        for category, keywords in self.CATEGORY_KEYWORDS:
+            if any(keyword in lowered for keyword in keywords):
+                return category
+        return "developers"
+
+
+def create_backend() -> LLMBackend:
+    """Backend selected by settings.LLM_BACKEND ("gemini" or "local")"""
+    if settings.LLM_BACKEND == "local":
+        return LocalBackend()
+    return GeminiBackend()
@@ -0,0 +1,60 @@
+import hashlib
+from typing import Optional
+
+from cache.disk import DiskCache
+from config.settings import settings
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode when a prompt has no recorded response"""
+
+
+class ResponseCache:
+    """Local record of model responses, keyed by model, prompt version and prompt text.
+
+    In "replay" mode a miss raises ReplayMiss instead of calling the model,
+    which makes tests and benchmarks deterministic and offline.
+    """
+
+    def __init__(self, store: DiskCache, replay_only: bool = False):
+        self.store = store
+        self.replay_only = replay_only
+
+    @classmethod
+    def from_settings(cls) -> Optional["ResponseCache"]:
+        """Cache configured by LLM_CACHE_MODE; None when it is "off\""""
+        if settings.LLM_CACHE_MODE == "off":
+            return None
+        return cls(
+            DiskCache(
+                settings.LLM_CACHE_PATH,
+                max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+                ttl_seconds=settings.LLM_CACHE_TTL_HOURS * 3600,
+            ),
+            replay_only=settings.LLM_CACHE_MODE == "replay",
+        )
+
+    @staticmethod
+    def key(model_name: str, prompt_version: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model_name, prompt_version, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return f"llm:{digest.hexdigest()}"
+
+    def get(self, key: str) -> Optional[str]:
+        response = self.store.get(key)
+        if response is None and self.replay_only:
+            raise ReplayMiss(f"No recorded response for {key}")
+        return response
+
+    def put(self, key: str, response: str) -> None:
+        self.store.set(key, response)
+
+    @property
+    def hits(self) -> int:
+        return self.store.hits
+
+    @property
+    def misses(self) -> int:
+        return self.store.misses
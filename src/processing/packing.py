@@ -0,0 +1,185 @@
+import math
+import re
+from typing import Dict, List
+
+# Rough characters per token for English prose; close enough for budgeting
+CHARS_PER_TOKEN = 4
+TOKENS_PER_WORD = 1.3
+# Least body an email is sent with; emails that can't get it are dropped whole
+MIN_BODY_TOKENS = 50
+
+WORD = re.compile(r'\w+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: the larger of the character- and word-based guesses"""
+    if not text:
+        return 0
+    words = len(WORD.findall(text))
+    return max(math.ceil(len(text) / CHARS_PER_TOKEN), math.ceil(words * TOKENS_PER_WORD))
+
+
+def content_density(text: str) -> float:
+    """Share of distinct words, floored at 0.1; repetitive or link-dump text scores low"""
+    words = WORD.findall(text.lower())
+    if not words:
+        return 0.1
+    return max(0.1, len(set(words)) / len(words))
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text at a word boundary so it estimates at no more than `tokens`"""
+    if estimate_tokens(text) <= tokens:
+        return text
+    if tokens <= 0:
+        return ""
+    chars = tokens * CHARS_PER_TOKEN
+    while chars > 0:
+        cut = text.rfind(' ', 0, chars)
+        candidate = text[:cut if cut > 0 else chars].rstrip() + "..."
+        if estimate_tokens(candidate) <= tokens:
+            return candidate
+        chars = int(chars * 0.9)
+    return ""
+
+
+def allocate(needs: List[int], weights: List[float], budget: int, floor: int = 0) -> List[int]:
+    """Split `budget` tokens across emails in proportion to `weights`, never giving one more than it needs.
+
+    Every email first gets up to `floor` tokens (evenly scaled down if even
+    that doesn't fit); whatever an email doesn't need is redistributed to
+    the rest (water-filling).
+    """
+    count = len(needs)
+    if not count:
+        return []
+    floor = min(floor, budget // count)
+    granted = [min(need, floor) for need in needs]
+    remaining = budget - sum(granted)
+    active = {i for i in range(count) if granted[i] < needs[i]}
+
+    while active and remaining > 0:
+        total_weight = sum(weights[i] for i in active)
+        shares = {i: remaining * weights[i] / total_weight for i in active}
+        satisfied = [i for i in active if needs[i] - granted[i] <= shares[i]]
+        if not satisfied:
+            for i in active:
+                granted[i] += int(shares[i])
+            break
+        for i in satisfied:
+            remaining -= needs[i] - granted[i]
+            granted[i] = needs[i]
+            active.discard(i)
+    return granted
+
+
+def first_fit_decreasing(sizes: List[int], capacity: int, max_items: int = 0) -> List[List[int]]:
+    """Pack item indices into as few bins of `capacity` as first-fit decreasing manages.
+
+    `max_items` (when set) also caps items per bin. Bins list their items in
+    original order.
+    """
+    bins: List[List[int]] = []
+    loads: List[int] = []
+    for i in sorted(range(len(sizes)), key=lambda i: sizes[i], reverse=True):
+        for b, load in enumerate(loads):
+            if load + sizes[i] <= capacity and (not max_items or len(bins[b]) < max_items):
+                bins[b].append(i)
+                loads[b] += sizes[i]
+                break
+        else:
+            bins.append([i])
+            loads.append(sizes[i])
+    return [sorted(items) for items in bins]
+
+
+class PromptPacker:
+    """Fits cleaned email bodies into a per-prompt token budget.
+
+    `pack_single` squeezes every email into one prompt, giving denser emails
+    a larger share; `pack_groups` keeps bodies whole (up to a prompt) and
+    bin-packs them into as few prompts as possible. Both return a plan with
+    the bodies to send, the email groups, and utilisation stats.
+
+    An email is never sent with less than MIN_BODY_TOKENS of body (or its
+    whole body, if shorter): when the headers alone leave no room for that,
+    whole emails are dropped instead, least dense first, and listed under
+    `dropped` (they are in no group).
+    """
+
+    def __init__(self, budget: int, min_email_tokens: int = 0):
+        self.budget = budget
+        self.min_email_tokens = min_email_tokens
+
+    def pack_single(self, emails: List[Dict], overheads: List[int]) -> Dict:
+        bodies = [email.get('body', '') or '' for email in emails]
+        needs = [estimate_tokens(body) for body in bodies]
+        densities = [content_density(body) for body in bodies]
+        kept = list(range(len(emails)))
+        dropped = []
+        while kept and sum(overheads[i] + self._minimum(needs[i]) for i in kept) > self.budget:
+            least = min(reversed(kept), key=lambda i: densities[i])
+            kept.remove(least)
+            dropped.append(least)
+        granted = allocate(
+            [needs[i] for i in kept],
+            [densities[i] for i in kept],
+            self.budget - sum(overheads[i] for i in kept),
+            self.min_email_tokens,
+        )
+        allocations = [0] * len(emails)
+        for i, allocation in zip(kept, granted):
+            allocations[i] = allocation
+        return self._plan(bodies, allocations, overheads, [kept] if kept else [], sorted(dropped))
+
+    def pack_groups(self, emails: List[Dict], overheads: List[int], max_emails: int = 0) -> Dict:
+        bodies = [email.get('body', '') or '' for email in emails]
+        allocations = [
+            min(estimate_tokens(body), max(0, self.budget - overhead))
+            for body, overhead in zip(bodies, overheads)
+        ]
+        dropped = [
+            i for i, body in enumerate(bodies)
+            if overheads[i] + self._minimum(estimate_tokens(body)) > self.budget
+        ]
+        kept = [i for i in range(len(emails)) if i not in dropped]
+        sizes = [allocations[i] + overheads[i] for i in kept]
+        groups = [[kept[position] for position in group] for group in first_fit_decreasing(sizes, self.budget, max_emails)]
+        return self._plan(bodies, allocations, overheads, groups, dropped)
+
+    @staticmethod
+    def _minimum(need: int) -> int:
+        return min(need, MIN_BODY_TOKENS)
+
+    def _plan(self, bodies: List[str], allocations: List[int], overheads: List[int], groups: List[List[int]],
+              dropped: List[int]) -> Dict:
+        packed = [
+            "" if i in dropped else truncate_to_tokens(body, allocation)
+            for i, (body, allocation) in enumerate(zip(bodies, allocations))
+        ]
+        used = [sum(estimate_tokens(packed[i]) + overheads[i] for i in group) for group in groups]
+        needed = sum(estimate_tokens(body) for body in bodies)
+        sent = sum(estimate_tokens(body) for body in packed)
+        return {
+            'bodies': packed,
+            'groups': groups,
+            'dropped': dropped,
+            'stats': {
+                'emails': len(bodies),
+                'prompts': len(groups),
+                'budget': self.budget,
+                'tokens_used': used,
+                'utilisation': sum(used) / (self.budget * len(groups)) if groups else 0.0,
+                'truncated': sum(packed[i] != bodies[i] for i in range(len(bodies)) if i not in dropped),
+                'dropped': len(dropped),
+                'tokens_dropped': max(0, needed - sent),
+            },
+        }
+
+
+def format_stats(stats: Dict) -> str:
+    return (
+        f"Prompt packing: {stats['emails']} emails in {stats['prompts']} prompt(s) of {stats['budget']} tokens, "
+        f"{stats['utilisation']:.0%} utilised, {stats['truncated']} truncated, "
+        f"{stats['dropped']} dropped, ~{stats['tokens_dropped']} tokens dropped"
+    )
@@ -0,0 +1,100 @@
+import hashlib
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from config.settings import settings
+from processing.links import normalize_url
+
+NON_WORD = re.compile(r'[^a-z0-9]+')
+
+# Titles shorter than this many words ("Top stories", "Read more") are too generic to match on
+MIN_TITLE_WORDS = 3
+
+
+def _digest(kind: str, value: str) -> str:
+    return f"{kind}:" + hashlib.blake2b(value.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def item_fingerprints(item: Dict) -> List[str]:
+    """Fingerprints identifying an item across days: its canonical url and its normalised title"""
+    prints = []
+    url = normalize_url(item.get('url') or '')
+    if url:
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        path = parts.path.rstrip('/')
+        prints.append(_digest('u', f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"))
+    title = NON_WORD.sub(' ', (item.get('title') or '').lower()).strip()
+    if len(title.split()) >= MIN_TITLE_WORDS:
+        prints.append(_digest('t', title))
+    return prints
+
+
+class PublishedItemFilter:
+    """Stops stories published in recent issues from being published again.
+
+    Items whose url or title fingerprint was first published within
+    `window_days` are dropped (mode "drop") or kept with `follow_up` set
+    (mode "mark"). Each check is a single set-membership query for the whole
+    batch. Digests are filtered once, right after summarizing.
+    """
+
+    def __init__(self, repository, mode: str = None, window_days: int = None):
+        self.repository = repository
+        self.mode = mode or settings.ITEM_DEDUP_MODE
+        self.window_days = settings.ITEM_DEDUP_WINDOW_DAYS if window_days is None else window_days
+
+    def published(self, items: List[Dict]) -> List[bool]:
+        """Whether each item was already published within the window"""
+        prints = [item_fingerprints(item) for item in items]
+        since = datetime.utcnow() - timedelta(days=self.window_days)
+        recent = self.repository.find_recent({fp for item_prints in prints for fp in item_prints}, since)
+        return [any(fp in recent for fp in item_prints) for item_prints in prints]
+
+    def apply(self, items: List[Dict]) -> List[Dict]:
+        """Items to publish: repeats dropped, or marked as follow-ups"""
+        if self.mode == "off" or not items:
+            return items
+        kept = []
+        for item, seen in zip(items, self.published(items)):
+            if not seen:
+                kept.append(item)
+            elif self.mode == "mark":
+                item['follow_up'] = True
+                kept.append(item)
+        return kept
+
+    def apply_summary(self, summary: Dict) -> Dict[str, int]:
+        """Filter every section of a digest in place, removing sections left empty"""
+        sections = summary.get('sections', [])
+        items = [item for section in sections for item in section.get('items', [])]
+        kept = {id(item) for item in self.apply(items)}
+        for section in sections:
+            section['items'] = [item for item in section.get('items', []) if id(item) in kept]
+        summary['sections'] = [section for section in sections if section['items']]
+        return {
+            'items': len(items),
+            'dropped': len(items) - len(kept),
+            'follow_ups': sum(1 for item in items if item.get('follow_up')),
+        }
+
+    def record(self, items: List[Dict], published_at: datetime = None) -> None:
+        """Remember newly published items, and forget fingerprints first published before the window.
+        
+        Follow-ups are skipped: their story is already indexed, and the window
+        counts from when it was first published.
+        """
+        if self.mode == "off":
+            return
+        now = datetime.utcnow()
+        prints = {fp for item in items if not item.get('follow_up') for fp in item_fingerprints(item)}
+        self.repository.record(prints, published_at or now)
+        self.repository.prune(now - timedelta(days=self.window_days))
+
+
+def format_stats(stats: Dict[str, int]) -> str:
+    return f"Published before: {stats['dropped']} of {stats['items']} items dropped, {stats['follow_ups']} follow-ups"
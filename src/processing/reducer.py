@@ -0,0 +1,81 @@
+import re
+from email.utils import parseaddr
+from typing import Dict, List
+
+# Map-step categories and the section titles they are published under, in order
+SECTIONS = [
+    ("research", "🔬 Research Highlights"),
+    ("industry", "💼 Industry News"),
+    ("learning", "📚 Learning Resources"),
+    ("events", "📅 Events"),
+    ("developers", "💻 Developers"),
+    ("other", "Other"),
+]
+SECTION_TITLES = dict(SECTIONS)
+
+NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def item_key(item: Dict) -> str:
+    """Identity used for de-duplication: the link when there is one, else the normalised title"""
+    url = (item.get('url') or '').strip().lower().rstrip('/')
+    if url and url != '#':
+        return f"url:{url.split('://', 1)[-1]}"
+    return f"title:{NON_WORD.sub(' ', (item.get('title') or '').lower()).strip()}"
+
+
+def category_key(title: str) -> str:
+    """Map-step category for a stored section title, with or without its emoji ("Industry News" -> "industry")"""
+    normalized = NON_WORD.sub(' ', (title or '').lower()).strip()
+    for category, section_title in SECTIONS:
+        if normalized == NON_WORD.sub(' ', section_title.lower()).strip() or normalized == category:
+            return category
+    for category, _ in SECTIONS:
+        if category.rstrip('s') in normalized:
+            return category
+    return 'other'
+
+
+def sender_name(from_header: str) -> str:
+    name, address = parseaddr(from_header or '')
+    return name or address or from_header or ''
+
+
+def merge_items(items: List[Dict]) -> List[Dict]:
+    """Merge map-step items describing the same story.
+
+    The first occurrence wins its position; later duplicates only fill in
+    missing fields, contribute a longer summary, and add their source emails.
+    """
+    merged: Dict[str, Dict] = {}
+    for item in items:
+        if not (item.get('title') or '').strip():
+            continue
+        key = item_key(item)
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = dict(item, source_ids=list(item.get('source_ids', [])))
+            continue
+        for field in ('snippet', 'url', 'source', 'category'):
+            if not existing.get(field) and item.get(field):
+                existing[field] = item[field]
+        if len(item.get('summary') or '') > len(existing.get('summary') or ''):
+            existing['summary'] = item['summary']
+        for source_id in item.get('source_ids', []):
+            if source_id not in existing['source_ids']:
+                existing['source_ids'].append(source_id)
+    return list(merged.values())
+
+
+def build_sections(items: List[Dict]) -> List[Dict]:
+    """Group merged items into the newsletter's sections, dropping empty ones"""
+    grouped: Dict[str, List[Dict]] = {category: [] for category, _ in SECTIONS}
+    for item in items:
+        category = (item.get('category') or '').strip().lower()
+        grouped[category if category in grouped else 'other'].append(
+            {key: value for key, value in item.items() if key != 'category'}
+        )
+    return [
+        {'title': SECTION_TITLES[category], 'items': grouped[category]}
+        for category, _ in SECTIONS if grouped[category]
+    ]
@@ -0,0 +1,208 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from processing.cleaner import HTMLCleaner
+from processing.reducer import SECTIONS, category_key
+
+TOKEN = re.compile(r'[a-z][a-z0-9+\-]+')
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can could do does for from has have how if in
+into is it its just more most new no not now of on one or our out over so some than that the their them
+then there these this to up us was we were what when which who will with you your
+""".split())
+
+# Keyword documents per category, so the model works before any news_items exist and keeps ML vocabulary in view
+SEED_KEYWORDS = {
+    "research": "paper papers arxiv research researchers model models neural network transformer llm llms "
+                "benchmark benchmarks training architecture reinforcement learning diffusion attention "
+                "fine-tuning pretraining inference reasoning multimodal evaluation sota",
+    "industry": "launch launches release released funding raises startup acquisition company companies "
+                "product api pricing enterprise openai anthropic google deepmind meta microsoft nvidia gpu chips",
+    "learning": "tutorial tutorials course courses guide dataset datasets tool tools library open-source "
+                "notebook walkthrough explained learn lecture python pytorch",
+    "events": "conference conferences workshop webinar deadline deadlines neurips icml iclr cvpr acl summit "
+              "meetup talk talks registration call papers",
+    "developers": "developer developers code coding engineering agents agent framework sdk github deploy "
+                  "production prompt prompting rag vector database mlops blog opinion",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN.findall((text or '').lower()) if token not in STOPWORDS]
+
+
+class TfidfVectorizer:
+    """Minimal TF-IDF over a fitted vocabulary, producing sparse rows as NumPy COO triples.
+
+    Term weights are log(1 + count) * smoothed idf and every row is
+    L2-normalised, so a dot product of two rows is their cosine similarity.
+    """
+
+    def __init__(self, max_features: int = 20000):
+        self.max_features = max_features
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+
+    def fit(self, documents: Sequence[str]) -> 'TfidfVectorizer':
+        counts = [Counter(tokenize(document)) for document in documents]
+        df = Counter(term for count in counts for term in count)
+        terms = sorted(df, key=lambda term: (-df[term], term))[:self.max_features]
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        doc_freq = np.array([df[term] for term in terms], dtype=np.float32)
+        self.idf = np.log((1 + len(documents)) / (1 + doc_freq)) + 1
+        return self
+
+    def transform(self, documents: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(row index, term index, weight) arrays for the known terms of each document"""
+        rows, cols, counts = [], [], []
+        for row, document in enumerate(documents):
+            for term, count in Counter(tokenize(document)).items():
+                col = self.vocabulary.get(term)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    counts.append(count)
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        values = np.log1p(np.array(counts, dtype=np.float32)) * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(documents)))
+        return rows, cols, (values / norms[rows]).astype(np.float32)
+
+
+class CentroidModel:
+    """Per-category TF-IDF centroids; scores texts by cosine similarity to each category.
+
+    Trained from (text, stored category) pairs, e.g. published news_items,
+    plus the SEED_KEYWORDS documents.
+    """
+
+    def __init__(self, max_features: int = None):
+        self.vectorizer = TfidfVectorizer(max_features or settings.RELEVANCE_MAX_FEATURES)
+        self.categories = [category for category, _ in SECTIONS]
+        self.centroids = np.zeros((len(self.categories), 0), dtype=np.float32)
+        self.training_size = 0
+
+    def fit(self, labelled: Sequence[Tuple[str, str]]) -> 'CentroidModel':
+        texts = [text for text, _ in labelled] + list(SEED_KEYWORDS.values())
+        categories = [category_key(category) for _, category in labelled] + list(SEED_KEYWORDS)
+        labels = np.array([self.categories.index(category) for category in categories], dtype=np.int64)
+        self.vectorizer.fit(texts)
+        rows, cols, values = self.vectorizer.transform(texts)
+
+        size = len(self.vectorizer.vocabulary)
+        flat = np.bincount(labels[rows] * size + cols, weights=values, minlength=len(self.categories) * size)
+        centroids = flat.reshape(len(self.categories), size)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = (centroids / np.where(norms == 0, 1, norms)).astype(np.float32)
+        self.training_size = len(labelled)
+        return self
+
+    def similarities(self, texts: Sequence[str]) -> np.ndarray:
+        """(texts x categories) cosine similarities"""
+        rows, cols, values = self.vectorizer.transform(texts)
+        scores = np.zeros((len(texts), len(self.categories)), dtype=np.float32)
+        np.add.at(scores, rows, values[:, None] * self.centroids[:, cols].T)
+        return scores
+
+
+def email_text(email: Dict) -> str:
+    return f"{email.get('subject', '')}\n{email.get('body', '')}"
+
+
+def load_model(repository) -> CentroidModel:
+    """Model trained on the most recent RELEVANCE_TRAINING_ITEMS categorised news_items"""
+    return CentroidModel().fit(repository.get_labelled_texts(settings.RELEVANCE_TRAINING_ITEMS))
+
+
+def assign_sections(emails: List[Dict], model: CentroidModel = None) -> Dict[str, Dict[int, str]]:
+    """Split every email's paragraphs (`HTMLCleaner.paragraphs`) between the categories
+    they are most similar to.
+
+    Returns {category: {email index: that email's paragraphs for the category}}.
+    Paragraphs with no known terms ("Read more", a bare link) follow the
+    paragraph before them, or the email's overall best category.
+    """
+    model = model or CentroidModel().fit([])
+    paragraphs = [HTMLCleaner.paragraphs(email.get('body', '') or '') for email in emails]
+    flat = [block for blocks in paragraphs for block in blocks]
+    similarities = model.similarities(flat)
+    email_best = model.similarities([email_text(email) for email in emails]).argmax(axis=1).tolist()
+
+    assigned: Dict[str, Dict[int, List[str]]] = {}
+    position = 0
+    for index, blocks in enumerate(paragraphs):
+        current = email_best[index]
+        for block in blocks:
+            row = similarities[position]
+            position += 1
+            if row.max() > 0:
+                current = int(row.argmax())
+            assigned.setdefault(model.categories[current], {}).setdefault(index, []).append(block)
+    return {
+        category: {index: '\n'.join(blocks) for index, blocks in by_email.items()}
+        for category, by_email in assigned.items()
+    }
+
+
+class RelevanceFilter:
+    """Scores emails against the category centroids and handles the off-topic ones.
+
+    An email's score is its best cosine similarity to any category. Below
+    `threshold` it is dropped (mode "drop") or trimmed to `low_max_chars`
+    (mode "downweight") so it costs few prompt tokens.
+    """
+
+    def __init__(self, model: CentroidModel, mode: str = None, threshold: float = None, low_max_chars: int = None):
+        self.model = model
+        self.mode = mode or settings.RELEVANCE_MODE
+        self.threshold = settings.RELEVANCE_THRESHOLD if threshold is None else threshold
+        self.low_max_chars = low_max_chars or settings.RELEVANCE_LOW_MAX_CHARS
+
+    def apply(self, emails: List[Dict]) -> Tuple[List[Dict], Dict]:
+        """Returns (emails to summarize, report)"""
+        similarities = self.model.similarities([email_text(email) for email in emails])
+        best = similarities.argmax(axis=1)
+        scores = similarities.max(axis=1)
+
+        kept, rows = [], []
+        for email, score, category in zip(emails, scores.tolist(), best.tolist()):
+            relevant = score >= self.threshold
+            email['relevance'] = round(score, 4)
+            if relevant or self.mode != "drop":
+                if not relevant and self.mode == "downweight":
+                    email['body'] = HTMLCleaner.truncate(email.get('body', ''), self.low_max_chars)
+                kept.append(email)
+            rows.append({
+                'id': email.get('id', ''),
+                'subject': email.get('subject', ''),
+                'score': round(score, 4),
+                'category': self.model.categories[category],
+                'relevant': relevant,
+            })
+        report = {
+            'mode': self.mode,
+            'threshold': self.threshold,
+            'training_items': self.model.training_size,
+            'emails': len(emails),
+            'low': sum(1 for row in rows if not row['relevant']),
+            'dropped': len(emails) - len(kept),
+            'scores': rows,
+        }
+        return kept, report
+
+
+def format_report(report: Dict, limit: Optional[int] = 10) -> str:
+    lines = [
+        f"Relevance ({report['mode']}, threshold {report['threshold']}, "
+        f"{report['training_items']} training items): {report['low']} of {report['emails']} emails below threshold, "
+        f"{report['dropped']} dropped"
+    ]
+    for row in sorted(report['scores'], key=lambda row: row['score'])[:limit]:
+        marker = ' ' if row['relevant'] else '-'
+        lines.append(f"  {marker} {row['score']:.3f} {row['category']:<10} {row['subject'][:70]}")
+    return "\n".join(lines)
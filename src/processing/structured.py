@@ -0,0 +1,190 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Response schemas in the OpenAPI subset Gemini accepts for schema-constrained output
+ITEM_FIELDS = ["title", "snippet", "source", "url", "summary"]
+
+ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {field: {"type": "string"} for field in ITEM_FIELDS},
+    "required": ["title"],
+}
+
+SECTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "items": {"type": "array", "items": ITEM_SCHEMA},
+    },
+    "required": ["title", "items"],
+}
+
+DIGEST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "headline": {"type": "string"},
+        "date": {"type": "string"},
+        "sections": {"type": "array", "items": SECTION_SCHEMA},
+    },
+    "required": ["headline", "sections"],
+}
+
+SECTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {"sections": {"type": "array", "items": SECTION_SCHEMA}},
+    "required": ["sections"],
+}
+
+MAP_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": dict(ITEM_SCHEMA["properties"], email={"type": "integer"}, category={"type": "string"}),
+    "required": ["email", "category", "title"],
+}
+
+ITEMS_SCHEMA = {
+    "type": "object",
+    "properties": {"items": {"type": "array", "items": MAP_ITEM_SCHEMA}},
+    "required": ["items"],
+}
+
+HEADLINE_SCHEMA = {
+    "type": "object",
+    "properties": {"headline": {"type": "string"}, "summary": {"type": "string"}},
+    "required": ["headline"],
+}
+
+TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+CLOSERS = {'{': '}', '[': ']'}
+
+
+def problems(value: Any, schema: Dict, path: str = "$") -> List[str]:
+    """Ways `value` breaks `schema` (types, required keys, array items); empty when it conforms"""
+    expected = TYPES.get(schema.get("type", "").lower())
+    if expected and (not isinstance(value, expected) or (expected is int and isinstance(value, bool))):
+        return [f"{path}: expected {schema['type']}"]
+    found = []
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                found.append(f"{path}.{key}: missing")
+        for key, child in schema.get("properties", {}).items():
+            if key in value and value[key] is not None:
+                found.extend(problems(value[key], child, f"{path}.{key}"))
+    elif isinstance(value, list) and "items" in schema:
+        for index, element in enumerate(value):
+            found.extend(problems(element, schema["items"], f"{path}[{index}]"))
+    return found
+
+
+def parse_json(text: str) -> Tuple[Any, int]:
+    """Parse the first JSON object in a model response, repairing it if needed.
+
+    Returns (value, closed). Text around the object (```json fences,
+    chatter) is ignored and trailing commas are dropped. A truncated
+    document is cut back to its last complete value and closed; `closed`
+    counts the containers that had to be closed that way (0 when the
+    response was complete), so 3 in a digest means its last section was
+    cut short. Raises ValueError when nothing can be salvaged.
+    """
+    start = text.find('{')
+    if start == -1:
+        raise ValueError("No JSON object in response")
+    try:
+        # Fast path: well-formed output, possibly followed by a closing fence
+        value, _ = json.JSONDecoder().raw_decode(text, start)
+        return value, 0
+    except ValueError:
+        pass
+    return repair_json(text[start:])
+
+
+def repair_json(text: str) -> Tuple[Any, int]:
+    """Rebuild a malformed JSON object; see parse_json"""
+    out: List[str] = []
+    stack: List[str] = []
+    # (length of `out`, open containers) at which the output can be closed and still be valid
+    safe: List[Tuple[int, str]] = []
+    in_string = escape = False
+
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+                if stack and stack[-1] == '[':
+                    safe.append((len(out), ''.join(stack)))
+            continue
+        if char in ' \t\r\n':
+            continue
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char in '{[':
+            # An array element that is cut short is dropped rather than closed empty
+            if not stack or stack[-1] != '[':
+                safe.append((len(out) + 1, ''.join(stack) + char))
+            stack.append(char)
+            out.append(char)
+        elif char in '}]':
+            if not stack or CLOSERS[stack[-1]] != char:
+                continue
+            _drop_trailing_comma(out)
+            stack.pop()
+            out.append(char)
+            if not stack:
+                return json.loads(''.join(out)), 0
+            safe.append((len(out), ''.join(stack)))
+        elif char == ',':
+            _drop_trailing_comma(out)
+            if out and out[-1] not in '{[':
+                # The value before this comma is complete
+                safe.append((len(out), ''.join(stack)))
+                out.append(char)
+        else:
+            out.append(char)
+
+    # Truncated: close the string in progress, then fall back through the safe points
+    candidates = []
+    if in_string and not escape:
+        candidates.append((''.join(out) + '"', ''.join(stack)))
+    for length, opened in reversed(safe):
+        candidates.append((''.join(out[:length]), opened))
+    for candidate, opened in candidates:
+        try:
+            return json.loads(candidate + _closers(opened)), len(opened)
+        except ValueError:
+            continue
+    raise ValueError("Response JSON could not be repaired")
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    if out and out[-1] == ',':
+        out.pop()
+
+
+def _closers(opened: str) -> str:
+    return ''.join(CLOSERS[char] for char in reversed(opened))
+
+
+def valid_sections(sections: Any) -> Tuple[List[Dict], List[Optional[str]]]:
+    """Split digest sections into those that conform and the titles (None if unknown) of those that don't"""
+    good, failed = [], []
+    for section in sections if isinstance(sections, list) else []:
+        if problems(section, SECTION_SCHEMA):
+            title = section.get("title") if isinstance(section, dict) else None
+            failed.append(title if isinstance(title, str) else None)
+        else:
+            good.append(section)
+    return good, failed
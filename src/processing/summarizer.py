@@ -1,33 +1,449 @@
-import google.generativeai as genai
-from typing import List, Dict
-import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, List, Dict, Optional, Set, Tuple
+import hashlib
 from config.settings import settings
-import re
+from processing.json_stream import IncrementalJSONParser
+from processing.llm import TASK_DIGEST, TASK_HEADLINE, TASK_ITEMS, TASK_SECTIONS, GeminiBackend, LLMBackend, create_backend
+from processing.llm_cache import ReplayMiss, ResponseCache
+from processing.packing import PromptPacker, estimate_tokens, format_stats
+from processing.relevance import assign_sections
+from processing.reducer import SECTIONS, SECTION_TITLES, build_sections, merge_items, sender_name
+from processing.structured import (
+    DIGEST_SCHEMA, HEADLINE_SCHEMA, ITEM_SCHEMA, ITEMS_SCHEMA, SECTION_SCHEMA, SECTIONS_SCHEMA,
+    parse_json, problems, valid_sections,
+)
+
+# Links per email listed in the prompt, so item urls come from the source instead of being invented
+MAX_PROMPT_LINKS = 15
+
+# Item titles shown to the reduce-step headline call
+MAX_HEADLINE_TITLES = 40
+
+EMAIL_SEPARATOR = "\n\n---EMAIL_SEPARATOR---\n\n"
+
+# Bump when prompts or response handling change in ways the prompt text alone doesn't capture
+PROMPT_VERSION = "2"
+
+RESPONSE_SCHEMAS = {
+    TASK_DIGEST: DIGEST_SCHEMA,
+    TASK_ITEMS: ITEMS_SCHEMA,
+    TASK_HEADLINE: HEADLINE_SCHEMA,
+    TASK_SECTIONS: SECTIONS_SCHEMA,
+}
+
+# Containers a truncated digest response had open when its last section was cut short: root, sections, section
+SECTION_DEPTH = 3
 
 class NewsletterSummarizer:
-    def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+    def __init__(self, model=None, cache: ResponseCache = None, backend: LLMBackend = None):
+        """`model` wraps a Gemini-style model object; otherwise `backend` or the LLM_BACKEND setting is used"""
+        if backend is None:
+            backend = GeminiBackend(model) if model is not None else create_backend()
+        self.backend = backend
+        self.model_name = backend.name
+        self.cache = cache if cache is not None else ResponseCache.from_settings()
+        self.packer = PromptPacker(settings.PROMPT_TOKEN_BUDGET, settings.PROMPT_MIN_EMAIL_TOKENS)
+        self.last_packing: Dict = {}
     
-    def summarize_batch(self, emails: List[Dict]) -> Dict:
-        """Batch summarize all emails"""
-        combined = self._combine_emails(emails)
+    def summarize_batch(self, emails: List[Dict], extractions=None,
+                        on_item: Callable[[int, Dict], None] = None,
+                        on_section: Callable[[Dict], None] = None,
+                        topic_model=None) -> Dict:
+        """Batch summarize all emails.
+        
+        Passing an `extractions` store (see EmailExtractionRepository) reuses
+        per-email items from earlier runs; that implies map-reduce mode, since
+        only per-email extraction can be reused.
+        
+        In "sections" mode `topic_model` (a processing.relevance.CentroidModel)
+        assigns content to sections; without one a keyword-seeded model is used.
+        
+        `on_item(section_index, item)` and `on_section(section)` are called for
+        every item and section of the result. With SUMMARIZE_STREAM in
+        single-prompt mode they fire while the model is still generating.
+        """
+        if settings.SUMMARIZE_MODE == "sections" and extractions is None:
+            summary = self.summarize_sections(emails, topic_model)
+            self._replay_callbacks(summary, on_item, on_section)
+            return summary
+        
+        if settings.SUMMARIZE_MODE == "map_reduce" or extractions is not None:
+            summary = self.summarize_map_reduce(emails, extractions)
+            self._replay_callbacks(summary, on_item, on_section)
+            return summary
+        
+        # Spread the prompt token budget over the emails instead of a fixed slice each
+        plan = self.packer.pack_single(emails, self._overheads(emails))
+        self._report_packing(plan)
+        kept = plan['groups'][0] if plan['groups'] else []
+        combined = self._combine_emails([emails[i] for i in kept], [plan['bodies'][i] for i in kept])
         prompt = self._build_prompt(combined)
         
-        response = self.model.generate_content(prompt)
-        return self._parse_response(response.text)
+        if not settings.SUMMARIZE_STREAM:
+            summary, closed = self._generate_json(prompt, task=TASK_DIGEST)
+            summary, _ = self._complete_digest(summary, closed, combined)
+            self._replay_callbacks(summary, on_item, on_section)
+            return summary
+        
+        def on_value(path, value):
+            # Malformed sections are reported once _complete_digest has re-asked for them
+            if len(path) == 2 and path[0] == "sections" and on_section and not problems(value, SECTION_SCHEMA):
+                on_section(value)
+            elif len(path) == 4 and path[0] == "sections" and path[2] == "items" and on_item \
+                    and not problems(value, ITEM_SCHEMA):
+                on_item(path[1], value)
+        
+        summary, closed = self._generate_json(prompt, on_value, task=TASK_DIGEST)
+        summary, streamed = self._complete_digest(summary, closed, combined)
+        self._replay_callbacks(summary, on_item, on_section, start=streamed)
+        return summary
+    
+    def _complete_digest(self, summary: Dict, closed: int, content: str) -> Tuple[Dict, int]:
+        """Re-ask the model for just the sections a digest response got wrong.
+        
+        Sections that break the schema are re-requested; if the response was
+        cut off, so are its unfinished last section and any standard section
+        it never reached. Returns the digest and how many of its sections came
+        from the first response (those come first).
+        """
+        sections, failed = valid_sections(summary.get("sections"))
+        if closed >= SECTION_DEPTH and sections:
+            failed.append(sections.pop()["title"])
+        wanted = [title for title in failed if title]
+        if closed:
+            present = {section["title"] for section in sections}
+            wanted += [title for _, title in SECTIONS[:-1] if title not in present and title not in wanted]
+        if not wanted:
+            return dict(summary, sections=sections), len(sections)
+        
+        print(f"Digest response was {'cut off' if closed else 'malformed'}; re-asking for {len(wanted)} section(s)")
+        kept = len(sections)
+        if settings.STRUCTURED_REASKS > 0:
+            try:
+                reasked, _ = self._generate_json(self._build_sections_prompt(content, wanted), task=TASK_SECTIONS)
+                extra, _ = valid_sections(reasked.get("sections"))
+                sections += [section for section in extra if section["title"] in wanted and section["items"]]
+            except ReplayMiss:
+                raise
+            except Exception as e:
+                print(f"Section re-ask failed ({e.__class__.__name__}: {e}); keeping the valid sections")
+        return dict(summary, sections=sections), kept
+    
+    def summarize_map_reduce(self, emails: List[Dict], extractions=None) -> Dict:
+        """Extract items from groups of emails concurrently, then merge and section them.
+        
+        Emails are bin-packed into as few PROMPT_TOKEN_BUDGET prompts as fit
+        (at most SUMMARIZE_GROUP_SIZE emails each), with at most
+        SUMMARIZE_MAX_CONCURRENCY calls in flight. The reduce step de-duplicates
+        and sections items locally; only the headline needs one more, small call.
+        A failed group is reported and skipped unless every group fails.
+        
+        With an `extractions` store, emails whose (id, extraction hash) was
+        extracted before are not sent to the model again, and fresh
+        extractions are saved for the next run.
+        """
+        hashes = [self.extraction_hash(email) for email in emails]
+        known: Dict = {}
+        if extractions is not None:
+            known = extractions.get_many([(email.get("id"), h) for email, h in zip(emails, hashes) if email.get("id")])
+        per_email: Dict[int, List[Dict]] = {}
+        todo = []
+        for i, (email, h) in enumerate(zip(emails, hashes)):
+            if (email.get("id"), h) in known:
+                per_email[i] = known[(email.get("id"), h)]
+            else:
+                todo.append(i)
+        if extractions is not None:
+            print(f"Incremental extraction: {len(per_email)} emails reused, {len(todo)} sent to the model")
+        
+        fresh, unattributed, failed = self._map_emails(emails, todo)
+        per_email.update(fresh)
+        if extractions is not None:
+            extractions.save_many([
+                (emails[i]["id"], hashes[i], fresh.get(i, []))
+                for i in todo if emails[i].get("id") and i not in failed
+            ])
+        
+        items = [item for i in sorted(per_email) for item in per_email[i]] + unattributed
+        merged = merge_items(items)
+        overview = self._reduce_overview(merged)
+        return {
+            "headline": overview["headline"],
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "summary": overview["summary"],
+            "sections": build_sections(merged),
+        }
+    
+    def summarize_sections(self, emails: List[Dict], topic_model=None) -> Dict:
+        """Classify content into sections locally, then summarize every section with its own concurrent call.
+        
+        Each call sees only the paragraphs assigned to its section (packed to
+        PROMPT_TOKEN_BUDGET), at most SUMMARIZE_MAX_CONCURRENCY run at once,
+        and the results are merged and assembled in section order. A failed
+        section is reported and skipped unless every section fails.
+        """
+        assignments = assign_sections(emails, topic_model)
+        categories = [category for category, _ in SECTIONS if assignments.get(category)]
+        if not categories:
+            return self.summarize_map_reduce(emails)
+        print("Section pre-grouping: " + ", ".join(f"{category} {len(assignments[category])} emails" for category in categories))
+        
+        items: Dict[str, List[Dict]] = {}
+        failed = []
+        workers = max(1, min(settings.SUMMARIZE_MAX_CONCURRENCY, len(categories)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summarize") as pool:
+            futures = [pool.submit(self._summarize_section, emails, category, assignments[category]) for category in categories]
+            for category, future in zip(categories, futures):
+                try:
+                    items[category] = future.result()
+                except ReplayMiss:
+                    raise
+                except Exception as e:
+                    failed.append(category)
+                    print(f"Section call failed for {category} ({e.__class__.__name__}: {e})")
+        if len(failed) == len(categories):
+            raise RuntimeError("Every section summarization call failed")
+        
+        merged = merge_items([item for category in categories for item in items.get(category, [])])
+        overview = self._reduce_overview(merged)
+        return {
+            "headline": overview["headline"],
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "summary": overview["summary"],
+            "sections": build_sections(merged),
+        }
+    
+    def _summarize_section(self, emails: List[Dict], category: str, bodies: Dict[int, str]) -> List[Dict]:
+        """Items for one section from the paragraphs assigned to it, attributed to their emails"""
+        indices = sorted(bodies)
+        subset = [dict(emails[i], body=bodies[i]) for i in indices]
+        plan = self.packer.pack_single(subset, self._overheads(subset, numbers=indices))
+        packed = dict(zip(indices, plan['bodies']))
+        kept = [indices[position] for group in plan['groups'] for position in group]
+        if not kept:
+            return []
+        items = []
+        for _, item in self._map_group(emails, kept, packed, category=category):
+            item["category"] = category
+            items.append(item)
+        return items
+    
+    def extraction_hash(self, email: Dict) -> str:
+        """Identity of one email's extraction: its cleaned content plus the model and prompt version.
+        
+        Keyed on `source_body` (the body as cleaned, before boilerplate and
+        duplicate stripping) when present, since what those remove depends on
+        the rest of the batch.
+        """
+        digest = hashlib.sha256()
+        body = email.get("source_body", email.get("body", ""))
+        for part in (self.model_name, PROMPT_VERSION, email.get("subject", ""), body):
+            digest.update((part or "").encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def _map_emails(self, emails: List[Dict], indices: List[int]):
+        """Run the map step over `indices`; returns (items per email, unattributed items, failed indices)"""
+        per_email: Dict[int, List[Dict]] = {}
+        unattributed: List[Dict] = []
+        failed: Set[int] = set()
+        if not indices:
+            return per_email, unattributed, failed
+        
+        subset = [emails[i] for i in indices]
+        plan = self.packer.pack_groups(
+            subset, self._overheads(subset, numbers=indices), max(1, settings.SUMMARIZE_GROUP_SIZE)
+        )
+        self._report_packing(plan)
+        bodies = dict(zip(indices, plan['bodies']))
+        groups = [[indices[position] for position in group] for group in plan['groups']]
+        # Emails too big to fit a prompt aren't summarized; leave them out of the extraction cache
+        failed.update(indices[position] for position in plan['dropped'])
+        workers = max(1, min(settings.SUMMARIZE_MAX_CONCURRENCY, len(groups)))
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summarize") as pool:
+            futures = [pool.submit(self._map_group, emails, group, bodies) for group in groups]
+            for group, future in zip(groups, futures):
+                try:
+                    extracted = future.result()
+                except ReplayMiss:
+                    raise
+                except Exception as e:
+                    failed.update(group)
+                    print(f"Map step failed for one email group ({e.__class__.__name__}: {e})")
+                    continue
+                for number, item in extracted:
+                    if number is None:
+                        unattributed.append(item)
+                    else:
+                        per_email.setdefault(number, []).append(item)
+        if len(failed) == len(indices):
+            raise RuntimeError("Every map-step summarization call failed")
+        return per_email, unattributed, failed
+    
+    def _map_group(self, emails: List[Dict], indices: List[int], bodies: Dict[int, str],
+                   reasks: int = None, category: str = None) -> List[Tuple[Optional[int], Dict]]:
+        """Extract items from one group of emails as (email index, item), attributed to the email they came from.
+        
+        With `category` only stories for that section are asked for.
+        Up to `reasks` (STRUCTURED_REASKS) follow-up calls are made: for the
+        whole group if its response can't be parsed, and for only the emails
+        it never reached (plus the last one it did) if it was cut off.
+        """
+        reasks = settings.STRUCTURED_REASKS if reasks is None else reasks
+        combined = self._combine_emails([emails[i] for i in indices], [bodies[i] for i in indices], numbers=indices)
+        prompt = self._build_section_prompt(category, combined) if category else self._build_map_prompt(combined)
+        try:
+            data, closed = self._generate_json(prompt, task=TASK_ITEMS)
+        except ValueError:
+            if reasks <= 0:
+                raise
+            print(f"Unparseable map-step response for {len(indices)} email(s); asking again")
+            return self._map_group(emails, indices, bodies, reasks - 1, category)
+        items = data.get("items", []) if isinstance(data, dict) else []
+        
+        extracted = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                number = int(item.pop("email", None))
+            except (TypeError, ValueError):
+                number = None
+            if number in indices:
+                email = emails[number]
+                item["source_ids"] = [email.get("id", "")]
+                item["source"] = item.get("source") or sender_name(email.get("from", ""))
+            else:
+                number = None
+            extracted.append((number, item))
+        
+        reached = [number for number, _ in extracted if number is not None]
+        if closed and reasks > 0:
+            retry = [i for i in indices if i not in reached or i == reached[-1]]
+            if retry and len(retry) < len(indices):
+                print(f"Map-step response was cut off; re-asking for {len(retry)} of {len(indices)} email(s)")
+                try:
+                    reasked = self._map_group(emails, retry, bodies, reasks - 1, category)
+                    # The last email reached may have been cut mid-item; its re-asked items replace it
+                    extracted = [pair for pair in extracted if pair[0] != reached[-1]] + reasked
+                except ValueError as e:
+                    print(f"Map-step re-ask failed ({e}); keeping the partial response")
+        return extracted
+    
+    def refresh_overview(self, summary: Dict) -> Dict:
+        """Choose the headline and overview again from the items a digest still has.
+        
+        For after stories were filtered out (e.g. published in a recent issue),
+        so the digest doesn't lead with one it no longer contains.
+        """
+        items = [item for section in summary.get("sections", []) for item in section.get("items", [])]
+        summary.update(self._reduce_overview(items))
+        return summary
+    
+    def _reduce_overview(self, items: List[Dict]) -> Dict:
+        """Headline and overview for the merged items; falls back to the top item"""
+        fallback = {
+            "headline": items[0]["title"] if items else "No newsletters today",
+            "summary": "",
+        }
+        if not items:
+            return fallback
+        titles = "\n".join(f"- {item['title']}" for item in items[:MAX_HEADLINE_TITLES])
+        try:
+            overview, _ = self._generate_json(self._build_headline_prompt(titles), task=TASK_HEADLINE)
+        except ReplayMiss:
+            raise
+        except Exception as e:
+            print(f"Headline call failed ({e.__class__.__name__}: {e}); using the top item")
+            return fallback
+        return {
+            "headline": overview.get("headline") or fallback["headline"],
+            "summary": overview.get("summary", ""),
+        }
+    
+    def _generate_json(self, prompt: str, on_value: Callable = None, task: str = TASK_DIGEST) -> Tuple[Dict, int]:
+        """Call the model (or replay a cached response) and parse the JSON it returns.
+        
+        Returns the parsed response and how many containers had to be closed
+        to repair it (0 if it was complete; see processing.structured.parse_json).
+        With STRUCTURED_OUTPUT the backend is asked for JSON matching the
+        task's schema. With `on_value` the response is streamed and fed
+        through an IncrementalJSONParser, so completed objects are reported
+        before the model finishes. Only responses that parse are cached, so an
+        unsalvageable answer is retried on the next run instead of being replayed.
+        """
+        parser = IncrementalJSONParser(on_value) if on_value is not None else None
+        key = ResponseCache.key(self.model_name, PROMPT_VERSION, prompt)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if parser is not None:
+                    parser.feed(cached)
+                return self._parse_response(cached)
+        
+        schema = RESPONSE_SCHEMAS.get(task) if settings.STRUCTURED_OUTPUT else None
+        if parser is None:
+            text = self.backend.generate(prompt, task, schema)
+        else:
+            chunks = []
+            for chunk in self.backend.stream(prompt, task, schema):
+                chunks.append(chunk)
+                parser.feed(chunk)
+            text = "".join(chunks)
+        parsed = self._parse_response(text)
+        if self.cache is not None:
+            self.cache.put(key, text)
+        return parsed
+    
+    @staticmethod
+    def _replay_callbacks(summary: Dict, on_item: Callable = None, on_section: Callable = None, start: int = 0) -> None:
+        sections = summary.get("sections", [])
+        for index in range(start, len(sections)):
+            section = sections[index]
+            if on_item:
+                for item in section.get("items", []):
+                    on_item(index, item)
+            if on_section:
+                on_section(section)
     
-    def _combine_emails(self, emails: List[Dict]) -> str:
-        """Combine emails with separators"""
+    def _combine_emails(self, emails: List[Dict], bodies: List[str], numbers: List[int] = None) -> str:
+        """Combine emails with separators; `numbers` labels each email for attribution"""
         parts = []
-        for email in emails:
-            parts.append(f"""
-SOURCE: {email['from']}
+        for position, email in enumerate(emails):
+            number = numbers[position] if numbers is not None else None
+            parts.append(self._render_email(email, bodies[position], number))
+        return EMAIL_SEPARATOR.join(parts)
+    
+    def _render_email(self, email: Dict, body: str, number: int = None) -> str:
+        label = f"EMAIL: {number}\n" if number is not None else ""
+        covered = email.get('also_covered_by')
+        note = f"ALSO COVERED BY: {', '.join(covered)}\n" if covered else ""
+        return f"""
+{label}SOURCE: {email['from']}
 SUBJECT: {email['subject']}
-CONTENT:
-{email['body'][:2000]}
-""")
-        return "\n\n---EMAIL_SEPARATOR---\n\n".join(parts)
+{note}CONTENT:
+{body}
+{self._format_links(email.get('links', []))}"""
+    
+    def _overheads(self, emails: List[Dict], numbers: List[int] = None) -> List[int]:
+        """Prompt tokens each email costs besides its body (headers, links, separator)"""
+        return [
+            estimate_tokens(self._render_email(email, "", numbers[i] if numbers is not None else None) + EMAIL_SEPARATOR)
+            for i, email in enumerate(emails)
+        ]
+    
+    def _report_packing(self, plan: Dict) -> None:
+        self.last_packing = plan['stats']
+        print(format_stats(plan['stats']))
+    
+    def _format_links(self, links: List[Dict]) -> str:
+        """List an email's extracted links for the prompt"""
+        if not links:
+            return ""
+        lines = [f"- {link['text'] or 'link'}: {link['url']}" for link in links[:MAX_PROMPT_LINKS]]
+        return "LINKS:\n" + "\n".join(lines) + "\n"
     
     def _build_prompt(self, content: str) -> str:
         """Create summarization prompt"""
@@ -55,17 +471,87 @@ Output as JSON:
         {{"title": "...", "snippet": "...", "source": "...", "url": "...", "summary": "..." }}
       ]
     }}
-  ],
+  ]
 }}
 
+Take each item's url from the LINKS listed under its newsletter; leave it empty if none fits.
 Be concise. Focus on actionable insights and information rich content for ML community.
 Use the summary field to provide a brief 1 or 2 paragraph overview of the item."""
     
-    def _parse_response(self, response: str) -> Dict:
-        """Parse AI response"""
-        # Extract JSON from markdown code blocks
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
-        return json.loads(response)
+    def _build_map_prompt(self, content: str) -> str:
+        """Create the map-step prompt: items only, no sectioning"""
+        categories = ", ".join(f'"{category}"' for category, _ in SECTIONS)
+        return f"""You are a well Known journalist.
+        You are collecting stories for a daily ML newsletter that is read by 10,000+ ML practitioners.
+Extract every story relevant to the ML community from the newsletters below: new papers, models,
+techniques, product launches, funding, tutorials, tools, datasets, conferences and opinion pieces.
+
+Input newsletters:
+{content}
+
+Output as JSON:
+{{
+  "items": [
+    {{"email": 0, "category": "research", "title": "...", "snippet": "...", "source": "...", "url": "...", "summary": "..."}}
+  ]
+}}
+
+"email" is the EMAIL number the story came from. "category" is one of {categories}.
+Take each item's url from the LINKS listed under its newsletter; leave it empty if none fits.
+Be concise. Use the summary field for a brief 1 or 2 paragraph overview of the item."""
+    
+    def _build_section_prompt(self, category: str, content: str) -> str:
+        """Create the prompt for one pre-grouped section"""
+        return f"""You are a well Known journalist.
+        You are writing the "{SECTION_TITLES[category]}" section of a daily ML newsletter read by 10,000+ ML practitioners.
+The excerpts below were picked from today's newsletters for this section. Extract every story that belongs in it.
+
+Input newsletters:
+{content}
+
+Output as JSON:
+{{
+  "items": [
+    {{"email": 0, "category": "{category}", "title": "...", "snippet": "...", "source": "...", "url": "...", "summary": "..."}}
+  ]
+}}
+
+"email" is the EMAIL number the story came from.
+Take each item's url from the LINKS listed under its newsletter; leave it empty if none fits.
+Be concise. Use the summary field for a brief 1 or 2 paragraph overview of the item."""
+    
+    def _build_sections_prompt(self, content: str, titles: List[str]) -> str:
+        """Create the re-ask prompt for sections a digest response got wrong"""
+        return f"""You are a well Known journalist curating a daily ML newsletter for ML practitioners.
+SECTIONS: {" | ".join(titles)}
+
+Input newsletters:
+{content}
+
+Output as JSON, with one entry per section listed in SECTIONS above, using those exact titles:
+{{
+  "sections": [
+    {{
+      "title": "...",
+      "items": [
+        {{"title": "...", "snippet": "...", "source": "...", "url": "...", "summary": "..." }}
+      ]
+    }}
+  ]
+}}
+
+Leave a section's items empty if none of the newsletters fits it.
+Take each item's url from the LINKS listed under its newsletter; leave it empty if none fits."""
+    
+    def _build_headline_prompt(self, titles: str) -> str:
+        """Create the reduce-step prompt for the issue headline"""
+        return f"""You are editing today's ML newsletter. Its stories are:
+{titles}
+
+Output as JSON:
+{{"headline": "Brief catchy headline", "summary": "Two or three sentence overview of the issue"}}"""
+    
+    def _parse_response(self, response: str) -> Tuple[Dict, int]:
+        """Parse AI response, repairing trailing commas and truncation"""
+        return parse_json(response)
 
@@ -2,9 +2,11 @@
 import json
 from datetime import datetime
 from graph.pipeline import build_pipeline
+from graph.nodes.fetch import get_fetcher
 from database.connection import init_db, get_db_session
-from database.repositories import NewsletterRepository, NewsItemRepository
+from database.repositories import NewsletterRepository, NewsItemRepository, ItemFingerprintRepository
 from processing.formatter import NewsletterFormatter
+from processing.published import PublishedItemFilter
 from export_to_json import export_news_to_json
 
 
@@ -35,6 +37,7 @@ def save_to_database(summary_json: dict) -> None:
     with get_db_session() as session:
         newsletter_repo = NewsletterRepository(session)
         newsitem_repo = NewsItemRepository(session)
+        published = PublishedItemFilter(ItemFingerprintRepository(session))
         
         # Save newsletter
         newsletter = newsletter_repo.save(
@@ -44,7 +47,7 @@ def save_to_database(summary_json: dict) -> None:
             json_data=summary_json
         )
         
-        # Extract and save news items from sections
+        # Extract and save news items from sections (summarize_node already filtered published stories)
         news_items = []
         for section in summary_json.get("sections", []):
             section_title = section.get("title", "General")
@@ -52,6 +55,9 @@ def save_to_database(summary_json: dict) -> None:
             category = section_title.replace("🔬", "").replace("💼", "").replace("📚", "").replace("📅", "").replace("💻", "").strip()
             
             for item in section.get("items", []):
+                # Follow-ups (mark mode) repeat a stored story; they stay in this issue's JSON/HTML only
+                if item.get("follow_up"):
+                    continue
                 news_items.append({
                     "title": item.get("title", ""),
                     "snippet": item.get("snippet", "") or item.get("summary", ""),
@@ -64,6 +70,7 @@ def save_to_database(summary_json: dict) -> None:
         # Save news items in batch
         if news_items:
             newsitem_repo.save_batch(newsletter.id, news_items)
+            published.record(news_items)
             print(f"Saved {len(news_items)} news items to database")
         
         print(f"Newsletter saved to database with ID: {newsletter.id}")
@@ -94,6 +101,9 @@ def main() -> None:
     print("Saving to database...")
     save_to_database(summary)
     
+    # Only now is it safe for the next incremental sync to start after these messages
+    get_fetcher().commit_checkpoint()
+    
     # Export to JSON file for static frontend
     print("Exporting to JSON file for static frontend...")
     try:
@@ -1,11 +1,19 @@
 from gmail.fetcher import NewsletterFetcher
 from gmail.sender import NewsletterSender
+from processing.boilerplate import BoilerplateFilter, clean_max_chars
+from processing.cache import get_clean_cache
 from processing.cleaner import HTMLCleaner
+from processing.dedup import NearDuplicateFilter, format_report as format_dedup_report
+from processing.extractions import ExtractionStore
+from processing.published import PublishedItemFilter, format_stats
+from processing.relevance import RelevanceFilter, load_model, format_report as format_relevance_report
 from processing.summarizer import NewsletterSummarizer
 from processing.formatter import NewsletterFormatter
 from database.connection import get_db_session
-from database.repositories import SubscriberRepository, NewsletterRepository, NewsItemRepository
+from database.repositories import SubscriberRepository, NewsletterRepository, NewsItemRepository, SenderFingerprintRepository, ItemFingerprintRepository
+from config.settings import settings
 from datetime import datetime
+from typing import Callable, Dict
 
 class NewsletterPipeline:
     def __init__(self):
@@ -15,26 +23,93 @@ class NewsletterPipeline:
         self.formatter = NewsletterFormatter()
         self.sender = NewsletterSender()
     
-    def run(self):
-        """Execute daily newsletter pipeline"""
+    def run(self, on_section: Callable[[Dict], None] = None):
+        """Execute daily newsletter pipeline.
+        
+        `on_section` is called with each digest section as soon as it is
+        available (mid-generation when SUMMARIZE_STREAM is on).
+        """
         print(f"[{datetime.now()}] Starting pipeline...")
         
-        # 1. Fetch emails
-        emails = self.fetcher.fetch_yesterday_newsletters()
+        # 1-2. Fetch emails and clean them in parallel batches as they arrive
+        emails = []
+        for email, document in self.cleaner.extract_emails(self.fetcher.iter_newsletters(), clean_max_chars(), cache=get_clean_cache()):
+            email['body'] = document['text']
+            email['source_body'] = document['text']
+            email['links'] = document['links']
+            email['images'] = document['images']
+            emails.append(email)
         if not emails:
             print("No newsletters found")
+            self.fetcher.commit_checkpoint()
             return
         
-        # 2. Clean content
-        for email in emails:
-            email['body'] = self.cleaner.clean(email['body'])
-            email['body'] = self.cleaner.truncate(email['body'])
+        # 2b. Strip template text learned from each sender's earlier issues
+        if settings.BOILERPLATE_ENABLED:
+            with get_db_session() as session:
+                BoilerplateFilter(SenderFingerprintRepository(session)).apply(emails)
+        
+        # 2c. Drop or trim off-topic emails using a local model trained on published items
+        to_summarize = emails
+        model = None
+        if settings.RELEVANCE_MODE != "off" or settings.SUMMARIZE_MODE == "sections":
+            with get_db_session() as session:
+                model = load_model(NewsItemRepository(session))
+        if settings.RELEVANCE_MODE != "off":
+            to_summarize, report = RelevanceFilter(model).apply(emails)
+            print(format_relevance_report(report))
+        
+        # 2d. Keep one copy of stories several newsletters cover
+        if settings.DEDUP_ENABLED:
+            print(format_dedup_report(NearDuplicateFilter().apply(to_summarize)))
+            to_summarize = [email for email in to_summarize if email['body']]
+        
+        # 3. Summarize (only emails without a stored extraction go to the model when incremental;
+        #    in section mode the same model pre-groups content into sections)
+        extractions = ExtractionStore() if settings.SUMMARIZE_INCREMENTAL else None
+        # Sections are filtered against recent issues (3b) and rendered as they arrive, overlapping
+        # formatting with generation; every section of the digest passes through here exactly once
+        rendered_sections = []
+        filtered_sections = []
+        published_stats = {'items': 0, 'dropped': 0, 'follow_ups': 0}
+        
+        def section_ready(section):
+            # 3b. Drop (or mark) stories published in recent issues before anything is emitted
+            if settings.ITEM_DEDUP_MODE != "off":
+                with get_db_session() as session:
+                    published = PublishedItemFilter(ItemFingerprintRepository(session))
+                    stats = published.apply_summary({'sections': [section]})
+                for key in published_stats:
+                    published_stats[key] += stats[key]
+            filtered_sections.append(section)
+            if not section.get('items'):
+                return
+            rendered_sections.append(self.formatter.section_html(section))
+            if on_section:
+                on_section(section)
+        
+        summary = self.summarizer.summarize_batch(
+            to_summarize, extractions, on_section=section_ready, topic_model=model
+        )
         
-        # 3. Summarize
-        summary = self.summarizer.summarize_batch(emails)
+        if len(filtered_sections) == len(summary.get('sections', [])):
+            summary['sections'] = [section for section in filtered_sections if section.get('items')]
+        elif settings.ITEM_DEDUP_MODE != "off":
+            # Not every section was reported: filter the final digest instead
+            with get_db_session() as session:
+                published_stats = PublishedItemFilter(ItemFingerprintRepository(session)).apply_summary(summary)
+            rendered_sections = None
+        if settings.ITEM_DEDUP_MODE != "off":
+            print(format_stats(published_stats))
+            if published_stats['dropped']:
+                # The headline was written before the filter; don't lead with a dropped story
+                self.summarizer.refresh_overview(summary)
         
-        # 4. Format HTML
-        html = self.formatter.to_html(summary)
+        # 4. Format HTML and the plain-text alternative (re-render if the final JSON disagrees with what was streamed)
+        if rendered_sections is None or len(rendered_sections) != len(summary.get('sections', [])):
+            rendered_sections = None
+        html = self.formatter.to_html(summary, rendered_sections)
+        text = self.formatter.to_text(summary)
         
         # 5. Save to database
         with get_db_session() as session:
@@ -46,27 +121,38 @@ class NewsletterPipeline:
                 json_data=summary
             )
             
-            # Save individual news items
+            # Save individual news items (already filtered at 3b); follow-ups live only in this issue's
+            # JSON/HTML, since their story is already stored
             items_repo = NewsItemRepository(session)
             all_items = []
             for section in summary.get('sections', []):
                 for item in section.get('items', []):
                     item['category'] = section['title']
-                    all_items.append(item)
+                    if not item.get('follow_up'):
+                        all_items.append(item)
             items_repo.save_batch(newsletter.id, all_items)
+            PublishedItemFilter(ItemFingerprintRepository(session)).record(all_items)
             
             # 6. Send to subscribers
             subscriber_repo = SubscriberRepository(session)
-            emails = subscriber_repo.get_active_emails()
+            recipients = subscriber_repo.get_active_emails()
         
         self.sender.send_newsletter(
-            recipients=emails,
+            recipients=recipients,
             subject=summary['headline'],
-            html_content=html
+            html_content=html,
+            text_content=text
         )
         
-        # 7. Mark emails as read
+        # 7. Mark emails as read, then move the sync checkpoint past them
         for email in emails:
             self.fetcher.mark_as_read(email['id'])
+        self.fetcher.commit_checkpoint()
         
-        print(f"✅ Sent to {len(emails)} subscribers")
\ No newline at end of file
+        print(f"✅ Sent to {len(recipients)} subscribers")
+        print(self.fetcher.executor.format_metrics())
+        clean_cache = get_clean_cache()
+        if clean_cache is not None:
+            print(f"Clean cache: {clean_cache.stats()}")
+        if self.summarizer.cache is not None:
+            print(f"LLM cache: {self.summarizer.cache.hits} hits, {self.summarizer.cache.misses} misses")
\ No newline at end of file
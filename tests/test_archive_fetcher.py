@@ -0,0 +1,56 @@
+"""
+Tests for the offline mbox/Maildir ingestion backend.
+"""
+import mailbox
+import sys
+from datetime import datetime
+from email.message import EmailMessage
+from pathlib import Path
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from ingest.archive import ArchiveFetcher  # noqa: E402
+
+
+def _make_message(i: int, date: str = "Mon, 15 Jan 2024 08:00:00 +0000") -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = f"Digest {i} <digest{i}@news.com>"
+    message["Subject"] = f"Issue {i}"
+    message["Date"] = date
+    message["Message-ID"] = f"<issue-{i}@news.com>"
+    message.set_content(f"Plain text {i}\nFrom the desk of the editor")
+    message.add_alternative(f"<html><body><p>Story {i}</p></body></html>", subtype="html")
+    return message
+
+
+def test_mbox_records_match_fetcher_shape(tmp_path):
+    path = tmp_path / "newsletters.mbox"
+    box = mailbox.mbox(str(path))
+    for i in range(3):
+        box.add(_make_message(i))
+    box.flush()
+    box.close()
+
+    emails = ArchiveFetcher(str(path)).fetch_newsletters()
+
+    assert [e["id"] for e in emails] == ["issue-0@news.com", "issue-1@news.com", "issue-2@news.com"]
+    assert set(emails[0]) == {"id", "from", "subject", "body", "date"}
+    assert emails[1]["from"] == "Digest 1 <digest1@news.com>"
+    assert emails[1]["subject"] == "Issue 1"
+    assert emails[1]["body"].strip() == "<html><body><p>Story 1</p></body></html>"
+
+
+def test_maildir_filters_by_sender_and_date(tmp_path):
+    box = mailbox.Maildir(str(tmp_path / "Maildir"))
+    box.add(_make_message(1, date="Mon, 01 Jan 2024 08:00:00 +0000"))
+    box.add(_make_message(2, date="Mon, 15 Jan 2024 08:00:00 +0000"))
+    box.add(_make_message(3, date="Mon, 15 Jan 2024 09:00:00 +0000"))
+
+    fetcher = ArchiveFetcher(str(tmp_path / "Maildir"), since=datetime(2024, 1, 10))
+    emails = fetcher.fetch_newsletters(keywords=["digest2", "DIGEST1"])
+
+    assert [e["subject"] for e in emails] == ["Issue 2"]
@@ -0,0 +1,115 @@
+"""
+Tests for per-sender boilerplate learning and stripping.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from database.models import Base  # noqa: E402
+from database.repositories import SenderFingerprintRepository  # noqa: E402
+from processing.boilerplate import BoilerplateFilter, sender_key  # noqa: E402
+from processing.cleaner import HTMLCleaner  # noqa: E402
+
+TEMPLATE_TOP = '<p><a href="https://daily.ai/web">View in browser</a></p><h1>The Daily AI — Issue #{n}</h1>'
+SPONSOR = '<p>Presented by <a href="https://acme.example">acme.cloud</a>: GPUs by the hour, no contracts.</p>'
+FOOTER = (
+    "<p>You are receiving this because you subscribed.</p>"
+    '<p><a href="https://daily.ai/u">Unsubscribe</a> | <a href="https://daily.ai/p">Manage preferences</a></p>'
+)
+
+
+def issue(n, story):
+    """An issue whose body is the cleaner's output for the newsletter HTML, one <p> per story line"""
+    paragraphs = "".join(f"<p>{line}</p>" for line in story.split("\n"))
+    html = f"<table><tr><td>{TEMPLATE_TOP.format(n=n)}</td></tr><tr><td>{paragraphs}</td></tr>" \
+           f"<tr><td>{SPONSOR}{FOOTER}</td></tr></table>"
+    return {"id": f"msg{n}", "from": "The Daily AI <news@daily.ai>", "body": HTMLCleaner.extract_document(html)["text"]}
+
+
+@pytest.fixture
+def repository():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield SenderFingerprintRepository(session)
+    session.close()
+
+
+def test_sender_key_ignores_display_name():
+    assert sender_key("The Daily AI <News@Daily.ai>") == sender_key("Daily AI Team <news@daily.ai>")
+
+
+def test_segments_seen_in_earlier_issues_are_dropped(repository):
+    first = [issue(1, "OpenAI ships a new model.")]
+    BoilerplateFilter(repository, max_chars=3000).apply(first)
+    second = [issue(2, "Google open-sources a dataset.")]
+    BoilerplateFilter(repository, max_chars=3000).apply(second)
+    # One earlier issue isn't enough to call a segment boilerplate
+    assert "acme.cloud" in second[0]["body"]
+
+    third = [issue(3, "Anthropic raises a new round.\nDetails inside.")]
+    stats = BoilerplateFilter(repository, max_chars=3000).apply(third)
+
+    assert third[0]["body"] == "Anthropic raises a new round.\nDetails inside."
+    assert stats["lines_removed"] == 9
+
+
+def test_segments_follow_the_cleaners_paragraphs():
+    body = issue(1, "Story one.")["body"]
+    assert "\n\n" not in body
+
+    segments = BoilerplateFilter.segments(body)
+
+    sponsor = "Presented by\nacme.cloud\n: GPUs by the hour, no contracts."
+    assert (sponsor, sponsor.split("\n")) in segments
+    assert len(segments) == 7
+    assert BoilerplateFilter.fingerprint(sponsor) in BoilerplateFilter.fingerprints(body)
+
+
+def test_story_repeated_in_two_issues_is_kept(repository):
+    story = "Meta releases Llama weights under a new licence.\nBenchmarks and a model card are included."
+    BoilerplateFilter(repository, max_chars=3000).apply([issue(1, story)])
+    follow_up = [issue(2, story + "\nUpdate: the licence now allows commercial use.")]
+    BoilerplateFilter(repository, max_chars=3000).apply(follow_up)
+
+    assert story in follow_up[0]["body"]
+
+
+def test_rerunning_an_issue_does_not_match_itself(repository):
+    BoilerplateFilter(repository, max_chars=3000).apply([issue(1, "Story one.")])
+    rerun = [issue(1, "Story one.")]
+    BoilerplateFilter(repository, max_chars=3000).apply(rerun)
+
+    assert rerun[0]["body"] == issue(1, "Story one.")["body"]
+
+
+def test_repeats_within_one_batch_count_as_other_issues(repository):
+    emails = [issue(3, "Story three."), issue(4, "Story four."), issue(5, "Story five.")]
+    BoilerplateFilter(repository, max_chars=3000).apply(emails)
+
+    assert [e["body"] for e in emails] == ["Story three.", "Story four.", "Story five."]
+
+
+def test_senders_are_learned_separately(repository):
+    BoilerplateFilter(repository, max_chars=3000).apply([issue(1, "Story one.")])
+    other = dict(issue(2, "Story two."), **{"from": "other@example.com"})
+    BoilerplateFilter(repository, max_chars=3000).apply([other])
+
+    assert "acme.cloud" in other["body"]
+
+
+def test_output_is_truncated_after_stripping(repository):
+    BoilerplateFilter(repository, max_chars=3000).apply([issue(1, "Story one."), issue(3, "Story three.")])
+    long_issue = [issue(2, "word " * 100)]
+    BoilerplateFilter(repository, max_chars=50).apply(long_issue)
+
+    assert long_issue[0]["body"] == ("word " * 100).strip()[:50] + "..."
@@ -0,0 +1,75 @@
+"""
+Tests for the two-tier cleaned-text cache.
+"""
+import sys
+from pathlib import Path
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from cache.disk import DiskCache  # noqa: E402
+from processing.cache import CleanedTextCache, cleaner_version  # noqa: E402
+from processing.cleaner import HTMLCleaner  # noqa: E402
+
+
+def make_cache(tmp_path, memory_items=8, version=None):
+    store = DiskCache(str(tmp_path / "clean.sqlite"), max_bytes=1024 * 1024)
+    return CleanedTextCache(store, memory_items=memory_items, version=version)
+
+
+def test_memory_then_disk_tier(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get("<p>a</p>", 3000) is None
+    document = {"text": "a", "links": [{"url": "https://a.example/", "text": "a"}], "images": []}
+    cache.put("<p>a</p>", 3000, document)
+    assert cache.get("<p>a</p>", 3000) == document
+
+    # A fresh process only has the disk tier
+    reopened = make_cache(tmp_path)
+    assert reopened.get("<p>a</p>", 3000) == document
+    assert reopened.get("<p>a</p>", 3000) == document
+    assert reopened.stats() == {"memory_hits": 1, "disk_hits": 1, "misses": 0, "memory_items": 1}
+
+
+def test_budget_is_part_of_the_key(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("<p>abc</p>", 3000, {"text": "abc", "links": [], "images": []})
+    assert cache.get("<p>abc</p>", 2) is None
+
+
+def test_memory_tier_is_lru_bounded(tmp_path):
+    cache = CleanedTextCache(None, memory_items=2)
+    for body in ("a", "b", "c"):
+        cache.put(body, 10, {"text": body})
+    assert cache.get("a", 10) is None
+    assert cache.get("c", 10) == {"text": "c"}
+
+
+def test_changed_cleaner_version_invalidates_disk_tier(tmp_path):
+    cache = make_cache(tmp_path, version="old-rules")
+    cache.put("<p>a</p>", 3000, {"text": "stale output"})
+
+    assert make_cache(tmp_path, version="new-rules").get("<p>a</p>", 3000) is None
+    assert len(cleaner_version()) == 16
+
+
+def test_extract_many_only_cleans_misses(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path)
+    cache.put("<p>known</p>", 3000, {"text": "from cache", "links": [], "images": []})
+    calls = []
+    original = HTMLCleaner.extract_document
+
+    def counting_extract(html, max_chars=3000):
+        calls.append(html)
+        return original(html, max_chars)
+
+    monkeypatch.setattr(HTMLCleaner, "extract_document", staticmethod(counting_extract))
+    bodies = ["<p>known</p>", "<p>new</p>", "<p>new</p>"]
+
+    for _ in range(2):
+        documents = HTMLCleaner.extract_many(bodies, workers=1, cache=cache)
+        assert [d["text"] for d in documents] == ["from cache", "new", "new"]
+        assert calls == ["<p>new</p>"]
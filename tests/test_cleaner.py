@@ -0,0 +1,89 @@
+"""
+The streaming extractor must produce exactly what the BeautifulSoup path does.
+"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from processing.cleaner import HTMLCleaner  # noqa: E402
+
+SAMPLES = [
+    "",
+    "plain text, no markup",
+    "<p>Hello   <b>world</b></p><p>\n\n  second   paragraph \n\n\n third</p>",
+    "<html><head><title>Digest</title><style>p {color: red}</style></head>"
+    "<body><script>var x = '<p>not text</p>';</script><p>Visible</p></body></html>",
+    "<header>Logo</header><nav><a href='#'>Home</a></nav><main>Story</main><footer>Unsubscribe</footer>",
+    "<div>Fish &amp; chips &lt;3 &nbsp;&nbsp; caf&eacute; &#8212; &#x2603;</div>",
+    "<p>before<!-- a comment -->after</p><![CDATA[raw cdata]]>",
+    "<nav><div>inside nav</nav>after nav",
+    "<div><nav>unclosed nav</div>outside again",
+    "<p>stray</span> end tag</p><br/><img src='x.png'>tail",
+    "<template><p>hidden</p></template><ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby>",
+    "<table><tr><td>a</td><td>b</td></tr></table><p>unterminated <b>bold",
+    "<p>" + "word " * 2000 + "</p>",
+]
+
+# Stray end tags, void ones especially, must not split a text run
+STRAY_END_TAGS = ["<br>;</br>d", "<p>Read</img> more</p>", "<td>a</br>b</td>", "x</span>y</b>z", "<a href='u'>li</br>nk</a>"]
+
+
+@pytest.mark.parametrize("html", STRAY_END_TAGS)
+def test_extract_matches_clean_with_stray_end_tags(html):
+    assert HTMLCleaner.extract(html) == HTMLCleaner.clean(html)
+
+
+@pytest.mark.parametrize("html", SAMPLES)
+@pytest.mark.parametrize("max_chars", [10, 3000])
+def test_extract_matches_clean_and_truncate(html, max_chars):
+    expected = HTMLCleaner.truncate(HTMLCleaner.clean(html), max_chars)
+    assert HTMLCleaner.extract(html, max_chars) == expected
+
+
+def test_extract_matches_on_random_documents():
+    rng = random.Random(7)
+    tags = ["p", "div", "span", "nav", "header", "footer", "script", "style", "b", "td", "br", "img"]
+    texts = ["alpha", "  beta  ", "\n\ngamma\n \n", "d&amp;e", "", "  ", "x" * 50]
+    for _ in range(300):
+        html = "".join(
+            rng.choice([f"<{rng.choice(tags)}>", f"</{rng.choice(tags)}>", rng.choice(texts), "<!-- c -->"])
+            for _ in range(rng.randint(1, 40))
+        )
+        for max_chars in (5, 40, 3000):
+            assert HTMLCleaner.extract(html, max_chars) == HTMLCleaner.truncate(HTMLCleaner.clean(html), max_chars), html
+
+
+def test_extract_many_in_worker_processes_keeps_order(monkeypatch):
+    from config.settings import settings
+
+    monkeypatch.setattr(settings, "CLEAN_PARALLEL_THRESHOLD", 2)
+    bodies = [f"<p>email {i}</p>" + html for i, html in enumerate(SAMPLES * 3)]
+    expected = [HTMLCleaner.extract_document(body, 200) for body in bodies]
+
+    assert HTMLCleaner.extract_many(bodies, 200, workers=2) == expected
+
+
+def test_extract_emails_batches_a_stream(monkeypatch):
+    from config.settings import settings
+
+    monkeypatch.setattr(settings, "CLEAN_PARALLEL_THRESHOLD", 1000)
+    pulled = []
+
+    def stream():
+        for i in range(5):
+            pulled.append(i)
+            yield {"id": str(i), "body": f"<b>{i}</b>"}
+
+    results = HTMLCleaner.extract_emails(stream(), batch_size=2)
+    email, document = next(results)
+    assert (email["id"], document["text"]) == ("0", "0")
+    assert pulled == [0, 1]
+    assert [document["text"] for _, document in results] == ["1", "2", "3", "4"]
@@ -0,0 +1,122 @@
+"""
+Tests for near-duplicate story detection across newsletters.
+"""
+import sys
+from pathlib import Path
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from config.settings import settings  # noqa: E402
+from graph.nodes.dedup import dedup_node  # noqa: E402
+from processing.cleaner import HTMLCleaner  # noqa: E402
+from processing.dedup import MinHasher, NearDuplicateFilter, shingles  # noqa: E402
+
+STORY = (
+    "Researchers released a new open-weight language model that matches much larger systems on "
+    "reasoning benchmarks while running on a single consumer GPU, and published the full training recipe."
+)
+REWORDED = (
+    "Researchers released a new open-weight language model that matches much larger systems on "
+    "reasoning benchmarks while running on a single consumer GPU; they also published the full training recipe today."
+)
+OTHER = (
+    "A startup focused on vector databases raised a large funding round to expand its managed cloud offering "
+    "and hire more engineers across Europe and North America over the next year."
+)
+
+
+def email(message_id, sender, *paragraphs):
+    """An email whose body is the cleaner's output for an HTML newsletter with one <p> per paragraph"""
+    html = "<html><body><table>" + "".join(f"<tr><td><p>{p}</p></td></tr>" for p in paragraphs) + "</table></body></html>"
+    body = HTMLCleaner.extract_document(html)["text"]
+    return {"id": message_id, "from": f"{sender} <{message_id}@example.com>", "body": body}
+
+
+def test_minhash_similarity_tracks_jaccard():
+    hasher = MinHasher(128)
+    a, b, c = shingles(STORY), shingles(REWORDED), shingles(OTHER)
+    jaccard = len(a & b) / len(a | b)
+
+    assert abs(MinHasher.similarity(hasher.signature(a), hasher.signature(b)) - jaccard) < 0.15
+    assert MinHasher.similarity(hasher.signature(a), hasher.signature(c)) < 0.1
+
+
+def test_clusters_group_only_near_duplicates():
+    clusters = NearDuplicateFilter(threshold=0.6, min_words=5).clusters([STORY, OTHER, REWORDED, STORY])
+
+    assert [sorted(members) for members in clusters] == [[0, 2, 3]]
+
+
+def test_apply_keeps_one_copy_with_attribution():
+    emails = [
+        email("a", "The Batch", "Hello readers!", STORY, OTHER),
+        email("b", "Import AI", REWORDED, "Sponsored by nobody in particular today."),
+    ]
+
+    report = NearDuplicateFilter(threshold=0.6, min_words=10).apply(emails)
+
+    assert report["paragraphs_removed"] == 1
+    assert report["clusters"][0]["kept"] == "b"
+    assert report["clusters"][0]["merged"] == ["a"]
+    assert STORY not in emails[0]["body"] and OTHER in emails[0]["body"]
+    assert emails[1]["also_covered_by"] == ["The Batch"]
+    assert "The Batch" not in emails[1]["body"]
+    assert "also_covered_by" not in emails[0]
+    assert report["chars_after"] < report["chars_before"]
+
+
+def test_fully_covered_email_is_dropped_by_the_node(monkeypatch):
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", True)
+    monkeypatch.setattr(settings, "DEDUP_MIN_WORDS", 10)
+    state = {"cleaned_emails": [
+        email("a", "The Batch", STORY, OTHER),
+        email("b", "Import AI", "Good morning!", STORY),
+    ]}
+
+    state = dedup_node(state)
+
+    assert [e["id"] for e in state["cleaned_emails"]] == ["a"]
+    assert state["cleaned_emails"][0]["also_covered_by"] == ["Import AI"]
+    assert len(state["dedup_report"]["clusters"]) == 1
+
+
+def test_shared_story_among_several_is_merged():
+    linked = STORY.replace("language model", '<a href="https://example.com/model">language model</a>')
+    emails = [
+        email("a", "The Batch", "<h2>Top stories</h2>", linked, OTHER),
+        email("b", "Import AI", "Welcome back to another issue of the newsletter for everyone.", REWORDED,
+              "Compilers for tensor programs get a new intermediate representation that speeds up fused kernels."),
+    ]
+    assert "\n\n" not in emails[0]["body"]
+
+    report = NearDuplicateFilter(threshold=0.6, min_words=10).apply(emails)
+
+    assert len(report["clusters"]) == 1 and report["paragraphs_removed"] == 1
+    assert "consumer GPU" not in emails[0]["body"] and "vector databases" in emails[0]["body"]
+    assert "tensor programs" in emails[1]["body"]
+
+
+def test_short_stories_survive_when_another_paragraph_is_a_duplicate():
+    emails = [
+        email("a", "The Batch", REWORDED),
+        email("b", "Import AI", "Hi all,", STORY, "Startup raises funding for robot arms.", "Cheers, Jack"),
+    ]
+
+    NearDuplicateFilter(threshold=0.6, min_words=10).apply(emails)
+
+    assert "consumer GPU" not in emails[1]["body"]
+    assert "Startup raises funding for robot arms." in emails[1]["body"]
+
+
+def test_unrelated_emails_are_untouched():
+    emails = [email("a", "A", STORY), email("b", "B", OTHER)]
+    bodies = [e["body"] for e in emails]
+
+    report = NearDuplicateFilter(min_words=10).apply(emails)
+
+    assert report["clusters"] == []
+    assert [e["body"] for e in emails] == bodies
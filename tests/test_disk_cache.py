@@ -0,0 +1,42 @@
+"""
+Tests for the SQLite-backed DiskCache used by the local caches.
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from cache.disk import DiskCache  # noqa: E402
+
+
+def test_evicts_least_recently_used_when_over_size(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=30)
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 10)
+    cache.set("c", "z" * 10)
+    time.sleep(0.01)
+    assert cache.get("a") == "x" * 10  # "a" is now the most recently used
+
+    cache.set("d", "w" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None
+    assert cache.total_bytes() <= 30
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=1024, ttl_seconds=0.05)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+
+    time.sleep(0.1)
+
+    assert cache.get("k") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(cache) == 0
@@ -0,0 +1,138 @@
+"""
+Tests for the compiled newsletter renderer.
+"""
+import io
+import sys
+from email import message_from_bytes
+from base64 import urlsafe_b64decode
+from pathlib import Path
+
+import pytest
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from gmail.sender import NewsletterSender  # noqa: E402
+from processing.formatter import NewsletterFormatter, Template, digest_key  # noqa: E402
+
+
+def digest(**overrides):
+    data = {
+        "headline": "Models <b>ship</b>",
+        "date": "2026-10-18",
+        "summary": "A & B",
+        "sections": [{
+            "title": "🔬 Research",
+            "items": [
+                {"title": "Paper <script>", "snippet": "Fast \"attention\"", "source": "Daily",
+                 "url": "https://example.com/a?x=1&y=2"},
+                {"title": "Bad link", "snippet": "", "source": "Weekly", "url": "javascript:alert(1)",
+                 "follow_up": True},
+            ],
+        }],
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    NewsletterFormatter.cache.clear()
+    yield
+    NewsletterFormatter.cache.clear()
+
+
+def test_template_escapes_fields_unless_raw():
+    template = Template("<p>{{ text }}</p>{{ html|raw }}")
+
+    assert template.render({"text": "<i>", "html": "<br>"}) == "<p>&lt;i&gt;</p><br>"
+
+
+def test_html_escapes_values_and_unsafe_urls():
+    html = NewsletterFormatter.to_html(digest())
+
+    assert "<h1>Models &lt;b&gt;ship&lt;/b&gt;</h1>" in html
+    assert "Paper &lt;script&gt;" in html and "<script>" not in html
+    assert 'href="https://example.com/a?x=1&amp;y=2"' in html
+    assert 'href="#">Bad link' in html
+    assert "Source: Follow-up · Weekly" in html
+
+
+def test_streamed_sections_match_full_render():
+    data = digest()
+    sections = [NewsletterFormatter.section_html(section) for section in data["sections"]]
+    stream = io.StringIO()
+
+    NewsletterFormatter.write_html(data, stream, sections)
+
+    assert stream.getvalue() == NewsletterFormatter.to_html(data, sections) == NewsletterFormatter.to_html(data)
+
+
+def test_output_is_cached_by_digest_key():
+    NewsletterFormatter.to_html(digest())
+    NewsletterFormatter.to_html(digest())
+    changed = NewsletterFormatter.to_html(digest(summary="Something else"))
+    section = digest()["sections"][0]
+    NewsletterFormatter.section_html(section)
+    NewsletterFormatter.section_html(section)
+
+    assert (NewsletterFormatter.cache.hits, NewsletterFormatter.cache.misses) == (2, 3)
+    assert "Something else" in changed
+    assert digest_key(digest()) != digest_key(digest(summary="Something else"))
+
+
+def test_render_into_writes_each_part():
+    chunks = []
+    Template("<p>{{ text }}</p>").render_into(chunks.append, {"text": "<i>"})
+
+    assert chunks == ["<p>", "&lt;i&gt;", "</p>"]
+
+
+def test_null_fields_render_empty():
+    data = digest(summary=None)
+    data["sections"][0]["items"][0].update(snippet=None, source=None, url=None)
+
+    html = NewsletterFormatter.to_html(data)
+    text = NewsletterFormatter.to_text(data)
+
+    assert "None" not in html and "None" not in text
+    assert '<div class="item-snippet"></div>' in html
+    assert 'href="#">Paper' in html
+
+
+def test_unhashable_fields_are_rendered_uncached():
+    data = digest()
+    data["sections"][0]["items"][0]["snippet"] = ["a", "list"]
+
+    assert "[&#x27;a&#x27;, &#x27;list&#x27;]" in NewsletterFormatter.to_html(data)
+
+
+def test_plain_text_alternative():
+    text = NewsletterFormatter.to_text(digest())
+
+    assert text.startswith("Models <b>ship</b>\n2026-10-18\n\nA & B\n")
+    assert "\n🔬 Research\n----------\n" in text
+    assert "- Paper <script>\n  Fast \"attention\"\n  Source: Daily\n  https://example.com/a?x=1&y=2\n" in text
+    assert "- Bad link\n  Source: Follow-up · Weekly\n" in text
+    assert "javascript:" not in text
+
+
+def test_sender_attaches_text_before_html():
+    class Service:
+        def users(self):
+            return self
+
+        def messages(self):
+            return self
+
+        def send(self, userId, body):
+            return body
+
+    sender = NewsletterSender(service=Service(), executor=object())
+    body = sender._build_send_request("a@example.com", "Digest", "<p>hi</p>", "hi")
+    message = message_from_bytes(urlsafe_b64decode(body["raw"]))
+
+    assert [part.get_content_type() for part in message.get_payload()] == ["text/plain", "text/html"]
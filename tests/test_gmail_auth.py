@@ -0,0 +1,74 @@
+"""
+Tests for the shared Gmail service provider. Credentials are faked, and the
+service is built from the bundled discovery document, so no network is used.
+"""
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from google.oauth2.credentials import Credentials
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from gmail import auth  # noqa: E402
+from gmail.auth import GmailServiceProvider  # noqa: E402
+
+
+class CountingCredentials(Credentials):
+    refreshes = 0
+
+    def refresh(self, request):
+        CountingCredentials.refreshes += 1
+        self.token = f"token-{CountingCredentials.refreshes}"
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+
+class FakeAuthenticator:
+    def __init__(self, expires_in: timedelta):
+        self.loads = 0
+        self.expires_in = expires_in
+
+    def get_credentials(self):
+        self.loads += 1
+        return CountingCredentials(
+            token="token-0",
+            refresh_token="refresh",
+            expiry=datetime.utcnow() + self.expires_in,
+        )
+
+
+def test_service_is_built_once_and_shared_across_threads(monkeypatch):
+    monkeypatch.setattr(auth, "save_credentials", lambda creds: None)
+    authenticator = FakeAuthenticator(expires_in=timedelta(hours=1))
+    provider = GmailServiceProvider(authenticator=authenticator, refresh_margin_seconds=300)
+
+    services = []
+    threads = [threading.Thread(target=lambda: services.append(provider.get_service())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert authenticator.loads == 1
+    assert len({id(service) for service in services}) == 1
+
+
+def test_token_refreshed_only_near_expiry(monkeypatch):
+    monkeypatch.setattr(auth, "save_credentials", lambda creds: None)
+    CountingCredentials.refreshes = 0
+
+    fresh = GmailServiceProvider(FakeAuthenticator(expires_in=timedelta(hours=1)), refresh_margin_seconds=300)
+    fresh.get_service()
+    fresh.get_service()
+    assert CountingCredentials.refreshes == 0
+
+    expiring = GmailServiceProvider(FakeAuthenticator(expires_in=timedelta(seconds=60)), refresh_margin_seconds=300)
+    service = expiring.get_service()
+    assert expiring.get_service() is service
+    assert CountingCredentials.refreshes == 1
+    assert expiring.get_credentials().token == "token-1"
@@ -0,0 +1,135 @@
+"""
+Tests for the rate-limited, retrying Gmail request executor.
+"""
+import sys
+import time
+from pathlib import Path
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from gmail.executor import MAX_BATCH_SIZE, GmailRequestExecutor, TokenBucket  # noqa: E402
+
+
+class FlakyRequest:
+    methodId = "gmail.users.messages.get"
+
+    def __init__(self, statuses, result="ok"):
+        self.statuses = list(statuses)
+        self.result = result
+        self.attempts = 0
+
+    def execute(self):
+        self.attempts += 1
+        if self.statuses:
+            raise HttpError(httplib2.Response({"status": self.statuses.pop(0)}), b"{}")
+        return self.result
+
+
+def _executor(**overrides):
+    options = dict(max_workers=4, units_per_second=1_000_000, max_retries=3, base_delay=0.001, max_delay=0.01)
+    options.update(overrides)
+    return GmailRequestExecutor(**options)
+
+
+def test_retries_rate_limit_and_server_errors():
+    executor = _executor()
+    request = FlakyRequest([429, 503])
+
+    assert executor.execute(request) == "ok"
+    assert request.attempts == 3
+
+    metrics = executor.metrics()["gmail.users.messages.get"]
+    assert metrics["calls"] == 3
+    assert metrics["retries"] == 2
+    assert metrics["failures"] == 2
+
+
+def test_does_not_retry_client_errors():
+    executor = _executor()
+    request = FlakyRequest([404])
+
+    with pytest.raises(HttpError):
+        executor.execute(request)
+    assert request.attempts == 1
+
+
+def test_gives_up_after_max_retries():
+    executor = _executor(max_retries=2)
+    request = FlakyRequest([500, 500, 500, 500])
+
+    with pytest.raises(HttpError):
+        executor.execute(request)
+    assert request.attempts == 3
+
+
+def test_non_idempotent_calls_retry_only_rejections():
+    executor = _executor()
+    rejected = FlakyRequest([429])
+    maybe_sent = FlakyRequest([503])
+
+    assert executor.execute(rejected, idempotent=False) == "ok"
+    with pytest.raises(HttpError):
+        executor.execute(maybe_sent, idempotent=False)
+    assert (rejected.attempts, maybe_sent.attempts) == (2, 1)
+
+
+class FakeBatch:
+    def __init__(self, callback, sizes):
+        self.callback = callback
+        self.sizes = sizes
+        self.parts = []
+
+    def add(self, request, request_id=None):
+        self.parts.append((request_id, request))
+
+    def execute(self):
+        self.sizes.append(len(self.parts))
+        for request_id, request in self.parts:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except HttpError as e:
+                self.callback(request_id, None, e)
+
+
+def test_batch_retries_only_failed_parts():
+    executor = _executor()
+    sizes = []
+    requests = {str(i): FlakyRequest([503] if i % 50 == 0 else [], result=i) for i in range(250)}
+    answered = []
+
+    def new_batch(callback):
+        return FakeBatch(lambda request_id, response, exception: (
+            answered.append(request_id) if exception is None else None, callback(request_id, response, exception)
+        ), sizes)
+
+    responses, errors = executor.execute_batch(new_batch, requests)
+
+    assert errors == {}
+    assert responses == {str(i): i for i in range(250)}
+    assert sorted(answered) == sorted(requests)
+    # 250 parts in batches of at most 100, then one batch with the 5 failed parts
+    assert sizes == [MAX_BATCH_SIZE, MAX_BATCH_SIZE, 50, 5]
+
+
+def test_map_keeps_input_order():
+    executor = _executor()
+    requests = [FlakyRequest([], result=i) for i in range(20)]
+
+    assert executor.map(requests) == list(range(20))
+
+
+def test_token_bucket_throttles_to_rate():
+    bucket = TokenBucket(rate=100, capacity=10)
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire(10)
+    # First 10 units come from the full bucket, the next 30 take ~0.3s to refill
+    assert time.monotonic() - started >= 0.25
@@ -0,0 +1,120 @@
+"""
+Tests for the scheduled pipeline's summarize-to-send stage with fake Gmail and model.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from config.settings import settings  # noqa: E402
+from database import connection  # noqa: E402
+from database.connection import get_db_session, init_db  # noqa: E402
+from database.repositories import ItemFingerprintRepository  # noqa: E402
+from processing.cleaner import HTMLCleaner  # noqa: E402
+from processing.formatter import NewsletterFormatter  # noqa: E402
+from processing.published import PublishedItemFilter  # noqa: E402
+from scheduler.jobs import NewsletterPipeline  # noqa: E402
+
+OLD = {"title": "Open model matches frontier systems", "snippet": "Again.", "source": "A", "url": ""}
+NEW = {"title": "Startup ships a faster tokenizer", "snippet": "New.", "source": "B", "url": ""}
+ONLY_OLD = {"title": "Workshop deadline moves to next month", "snippet": "Again.", "source": "C", "url": ""}
+
+
+class FakeFetcher:
+    class executor:
+        @staticmethod
+        def format_metrics():
+            return ""
+
+    def __init__(self):
+        self.read = []
+        self.committed = False
+
+    def iter_newsletters(self):
+        yield {"id": "m1", "from": "A <a@example.com>", "subject": "Daily", "body": "<p>Stories</p>"}
+
+    def mark_as_read(self, msg_id):
+        self.read.append(msg_id)
+
+    def commit_checkpoint(self):
+        self.committed = True
+
+
+def sections():
+    return [
+        {"title": "🔬 Research Highlights", "items": [dict(OLD), dict(NEW)]},
+        {"title": "📅 Events", "items": [dict(ONLY_OLD)]},
+    ]
+
+
+class FakeSummarizer:
+    cache = None
+
+    def summarize_batch(self, emails, extractions=None, on_section=None, topic_model=None):
+        for section in sections():
+            on_section(section)
+        # Like a streamed response, the final digest is parsed separately from what was reported
+        return {"headline": OLD["title"], "date": "2026-10-18", "summary": "", "sections": sections()}
+
+    def refresh_overview(self, summary):
+        summary["headline"] = summary["sections"][0]["items"][0]["title"]
+        return summary
+
+
+class FakeSender:
+    def send_newsletter(self, recipients, subject, html_content, text_content=None):
+        self.subject = subject
+        self.html = html_content
+        self.text = text_content
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", "sqlite:///:memory:")
+    monkeypatch.setattr(connection, "_engine", None)
+    for name, value in [("CLEAN_CACHE_ENABLED", False), ("BOILERPLATE_ENABLED", False), ("RELEVANCE_MODE", "off"),
+                        ("SUMMARIZE_MODE", "single"), ("DEDUP_ENABLED", False), ("SUMMARIZE_INCREMENTAL", False),
+                        ("ITEM_DEDUP_MODE", "drop")]:
+        monkeypatch.setattr(settings, name, value)
+    init_db()
+    with get_db_session() as session:
+        PublishedItemFilter(ItemFingerprintRepository(session)).record([OLD, ONLY_OLD])
+
+    pipeline = NewsletterPipeline.__new__(NewsletterPipeline)
+    pipeline.fetcher = FakeFetcher()
+    pipeline.cleaner = HTMLCleaner()
+    pipeline.summarizer = FakeSummarizer()
+    pipeline.formatter = NewsletterFormatter()
+    pipeline.sender = FakeSender()
+    return pipeline
+
+
+def test_streamed_sections_leave_out_published_stories(pipeline, monkeypatch):
+    streamed = []
+    renders = []
+    original = NewsletterFormatter.to_html
+    monkeypatch.setattr(NewsletterFormatter, "to_html", staticmethod(
+        lambda data, sections_html=None: renders.append(sections_html) or original(data, sections_html)
+    ))
+
+    pipeline.run(on_section=streamed.append)
+
+    assert [[item["title"] for item in section["items"]] for section in streamed] == [[NEW["title"]]]
+    assert OLD["title"] not in pipeline.sender.html and NEW["title"] in pipeline.sender.html
+    assert ONLY_OLD["title"] not in pipeline.sender.text
+    # The sections rendered while streaming are the ones sent
+    assert renders[0] is not None and len(renders[0]) == 1
+    assert pipeline.fetcher.read == ["m1"] and pipeline.fetcher.committed
+
+
+def test_headline_is_chosen_again_when_its_story_was_published(pipeline):
+    pipeline.run()
+
+    assert pipeline.sender.subject == NEW["title"]
+    assert OLD["title"] not in pipeline.sender.html
@@ -0,0 +1,66 @@
+"""
+Tests for the incremental JSON parser used for streamed model output.
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from processing.json_stream import IncrementalJSONParser  # noqa: E402
+
+DIGEST = {
+    "headline": "Models {and} \"agents\"",
+    "date": "2024-05-01",
+    "sections": [
+        {"title": "🔬 Research", "items": [{"title": "A [1]", "url": "https://a.example/?q={x}"}, {"title": "B"}]},
+        {"title": "💼 Industry", "items": [{"title": "C \\ D", "tags": ["x", {"k": 1}]}]},
+    ],
+}
+
+
+def collect(chunks):
+    seen = []
+    parser = IncrementalJSONParser(lambda path, value: seen.append((path, value)))
+    for chunk in chunks:
+        parser.feed(chunk)
+    return seen, parser
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 10_000])
+def test_reports_values_as_they_close(chunk_size):
+    text = "```json\n" + json.dumps(DIGEST, ensure_ascii=False, indent=2) + "\n```"
+    seen, parser = collect(text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+
+    assert parser.done
+    assert seen == [
+        (("headline",), DIGEST["headline"]),
+        (("date",), "2024-05-01"),
+        (("sections", 0, "items", 0), DIGEST["sections"][0]["items"][0]),
+        (("sections", 0, "items", 1), {"title": "B"}),
+        (("sections", 0), DIGEST["sections"][0]),
+        (("sections", 1, "items", 0, "tags", 1), {"k": 1}),
+        (("sections", 1, "items", 0), DIGEST["sections"][1]["items"][0]),
+        (("sections", 1), DIGEST["sections"][1]),
+        ((), DIGEST),
+    ]
+
+
+def test_first_section_is_reported_before_the_document_ends():
+    text = json.dumps(DIGEST, ensure_ascii=False)
+    cut = text.index('{"title": "💼')
+    seen, parser = collect([text[:cut]])
+
+    assert not parser.done
+    assert (("sections", 0), DIGEST["sections"][0]) in seen
+
+
+def test_invalid_fragments_are_skipped():
+    seen, _ = collect(['{"sections": [{"title": "x",}, {"title": "y"}]}'])
+    assert [path for path, _ in seen] == [("sections", 1)]
@@ -0,0 +1,33 @@
+"""
+Importing the API or the graph must not pull in the Google client libraries
+or LangGraph, and must not need credentials.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+
+HEAVY_MODULES = ["googleapiclient", "google.generativeai", "google_auth_oauthlib", "langgraph"]
+
+
+def _loaded_after_import(module: str):
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    env = {"PATH": "", "DATABASE_URL": "sqlite:///:memory:"}
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=str(src_path), env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def test_api_import_is_lightweight():
+    assert _loaded_after_import("api.app") == []
+
+
+def test_graph_import_is_lightweight():
+    assert _loaded_after_import("graph.pipeline") == []
@@ -0,0 +1,75 @@
+"""
+Tests for link normalisation and link/image collection during cleaning.
+"""
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import pytest
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from processing.cleaner import HTMLCleaner  # noqa: E402
+from processing.links import MAX_UNWRAP_DEPTH, normalize_url  # noqa: E402
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://Example.com:443/post?id=7&utm_source=nl&utm_medium=email#top", "https://example.com/post?id=7"),
+    ("http://example.com", "http://example.com/"),
+    ("https://example.com/a?fbclid=x&gclid=y&mc_cid=1&mc_eid=2", "https://example.com/a"),
+    ("https://click.example.net/track?u=https%3A%2F%2Fblog.dev%2Fpost%3Futm_campaign%3Dx%26p%3D2",
+     "https://blog.dev/post?p=2"),
+    ("https://www.google.com/url?q=https://arxiv.org/abs/2401.00001&sa=D", "https://arxiv.org/abs/2401.00001"),
+    ("https://out.news.example/r?url=https%3A%2F%2Fgo.mid.example%2Fx%3Ftarget%3Dhttps%253A%252F%252Ffinal.example%252Fx",
+     "https://final.example/x"),
+    ("https://search.example.com/find?q=https://arxiv.org/abs/2401.00001",
+     "https://search.example.com/find?q=https%3A%2F%2Farxiv.org%2Fabs%2F2401.00001"),
+    ("https://example.com/share?u=https://blog.dev/post&link=http://other.dev",
+     "https://example.com/share?u=https%3A%2F%2Fblog.dev%2Fpost&link=http%3A%2F%2Fother.dev"),
+    ("https://click.example.net/c?url=https%3A%2F%2Fx.com%2Fa%252Fb", "https://x.com/a%2Fb"),
+    ("mailto:editor@example.com", None),
+    ("#section", None),
+    ("javascript:void(0)", None),
+    ("", None),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_unwrapping_stops_at_the_depth_limit_on_the_last_url_reached():
+    url = "https://final.example/x"
+    for hop in range(MAX_UNWRAP_DEPTH + 1):
+        url = f"https://click.hop{hop}.example/c?" + urlencode({"url": url})
+
+    innermost = url
+    for _ in range(MAX_UNWRAP_DEPTH):
+        innermost = parse_qs(urlsplit(innermost).query)["url"][0]
+
+    assert normalize_url(url) == innermost
+    assert innermost.startswith("https://click.hop0.example/c?url=")
+
+
+def test_extract_document_collects_links_and_images_in_one_pass():
+    html = """
+    <header><a href="https://example.com/view">View in browser</a><img src="https://cdn.example/logo.png"></header>
+    <p>Read <a href="https://click.t.example/c?url=https%3A%2F%2Fpaper.org%2Fabs%3Futm_source%3Dx">the <b>paper</b></a>.</p>
+    <img src="https://cdn.example/chart.png" width="600">
+    <img src="https://t.example/open.gif" width="1" height="1">
+    <a href="https://paper.org/abs"><img src="https://cdn.example/thumb.png"/></a>
+    <a href="mailto:hi@example.com">Reply</a>
+    <p><a href="https://list.example/u">Unsubscribe</a></p>
+    """
+    document = HTMLCleaner.extract_document(html)
+
+    assert document["text"] == HTMLCleaner.extract(html)
+    assert document["links"] == [{"url": "https://paper.org/abs", "text": "the paper"}]
+    assert document["images"] == ["https://cdn.example/chart.png", "https://cdn.example/thumb.png"]
+
+
+def test_links_past_the_text_budget_are_not_collected():
+    html = "<p>" + "x" * 50 + "</p><p><a href='https://late.example/'>late</a></p>"
+    assert HTMLCleaner.extract_document(html, max_chars=10)["links"] == []
@@ -0,0 +1,141 @@
+"""
+Tests for the LLM backend interface and the deterministic local backend.
+"""
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from config.settings import settings  # noqa: E402
+from processing.llm import GeminiBackend, LLMBackend, LocalBackend, create_backend  # noqa: E402
+from processing.reducer import SECTION_TITLES  # noqa: E402
+from processing.summarizer import NewsletterSummarizer  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def local_settings(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BACKEND", "local")
+    monkeypatch.setattr(settings, "LLM_CACHE_MODE", "off")
+    monkeypatch.setattr(settings, "LOCAL_LLM_LATENCY_MS", 0)
+    monkeypatch.setattr(settings, "LOCAL_LLM_TOKENS_PER_SECOND", 0)
+    monkeypatch.setattr(settings, "SUMMARIZE_STREAM", False)
+    monkeypatch.setattr(settings, "SUMMARIZE_MODE", "single")
+
+
+def make_emails():
+    return [
+        {
+            "id": "m1",
+            "from": "The Batch <batch@example.com>",
+            "subject": "Weekly research",
+            "body": "New benchmark for long-context models\nA paper shows retrieval beats longer windows.\n\n"
+                    "Startup raises $20M for inference chips\nThe round was led by a large fund.",
+            "links": [
+                {"text": "Paper", "url": "https://arxiv.org/abs/1234"},
+                {"text": "Funding", "url": "https://example.com/funding"},
+            ],
+        },
+        {
+            "id": "m2",
+            "from": "Events Weekly <events@example.com>",
+            "subject": "Upcoming",
+            "body": "Workshop on efficient training announced\nSubmissions close next month.",
+            "links": [],
+        },
+    ]
+
+
+def assert_schema_valid(summary):
+    assert summary["headline"]
+    assert summary["date"]
+    for section in summary["sections"]:
+        assert section["title"] in SECTION_TITLES.values()
+        for item in section["items"]:
+            for field in ("title", "snippet", "source", "url", "summary"):
+                assert isinstance(item[field], str)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class Incomplete(LLMBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_create_backend_follows_settings():
+    assert isinstance(create_backend(), LocalBackend)
+    assert NewsletterSummarizer().model_name == "local"
+
+
+def test_local_single_prompt_digest_is_schema_valid_and_deterministic():
+    first = NewsletterSummarizer().summarize_batch(make_emails())
+    second = NewsletterSummarizer().summarize_batch(make_emails())
+
+    assert_schema_valid(first)
+    assert first == second
+    titles = {section["title"]: [item["title"] for item in section["items"]] for section in first["sections"]}
+    assert titles[SECTION_TITLES["research"]] == ["New benchmark for long-context models"]
+    assert titles[SECTION_TITLES["industry"]] == ["Startup raises $20M for inference chips"]
+    assert titles[SECTION_TITLES["events"]] == ["Workshop on efficient training announced"]
+
+
+def test_local_map_reduce_attributes_items_to_their_emails(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_MODE", "map_reduce")
+    monkeypatch.setattr(settings, "SUMMARIZE_GROUP_SIZE", 1)
+
+    summary = NewsletterSummarizer().summarize_batch(make_emails())
+
+    assert_schema_valid(summary)
+    items = [item for section in summary["sections"] for item in section["items"]]
+    by_title = {item["title"]: item for item in items}
+    assert by_title["New benchmark for long-context models"]["source_ids"] == ["m1"]
+    assert by_title["New benchmark for long-context models"]["url"] == "https://arxiv.org/abs/1234"
+    assert by_title["Workshop on efficient training announced"]["source_ids"] == ["m2"]
+    assert summary["headline"].startswith("New benchmark for long-context models")
+
+
+def test_local_streaming_reports_sections_before_returning(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_STREAM", True)
+    sections = []
+
+    summary = NewsletterSummarizer().summarize_batch(make_emails(), on_section=sections.append)
+
+    assert sections == summary["sections"]
+
+
+def test_local_backend_simulates_latency_and_throughput():
+    backend = LocalBackend(latency=0.05, tokens_per_second=10_000)
+    prompt = "Input newsletters:\n\nSOURCE: a\nSUBJECT: b\nCONTENT:\nA long enough story title\n\nOutput as JSON:"
+
+    start = time.perf_counter()
+    chunks = list(backend.stream(prompt))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed >= 0.05
+    assert json.loads("".join(chunks)) == json.loads(backend.generate(prompt))
+
+
+def test_gemini_backend_wraps_a_model_object():
+    class Model:
+        model_name = "fake-model"
+
+        def generate_content(self, prompt, stream=False):
+            if stream:
+                return iter([SimpleNamespace(text='{"a"'), SimpleNamespace(text=': 1}')])
+            return SimpleNamespace(text='{"a": 1}')
+
+    backend = GeminiBackend(Model())
+
+    assert backend.name == "fake-model"
+    assert backend.generate("p") == '{"a": 1}'
+    assert "".join(backend.stream("p")) == '{"a": 1}'
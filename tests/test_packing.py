@@ -0,0 +1,98 @@
+"""
+Tests for token estimation, budget allocation and prompt bin-packing.
+"""
+import sys
+from pathlib import Path
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from processing.packing import (  # noqa: E402
+    PromptPacker,
+    allocate,
+    estimate_tokens,
+    first_fit_decreasing,
+    truncate_to_tokens,
+)
+
+
+def words(count, distinct=True):
+    return " ".join(f"w{i}" if distinct else "same" for i in range(count))
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * 400) == 100
+    assert estimate_tokens("a b c d e f g h i j") == 13
+
+
+def test_truncate_to_tokens_respects_budget_at_word_boundary():
+    text = words(500)
+    cut = truncate_to_tokens(text, 100)
+    assert estimate_tokens(cut) <= 100
+    assert cut.endswith("...") and not cut[:-3].endswith(" ")
+    assert text.startswith(cut[:-3])
+    assert truncate_to_tokens("short", 100) == "short"
+
+
+def test_allocate_gives_small_emails_all_they_need():
+    assert allocate([100, 5000, 5000], [1.0, 1.0, 1.0], budget=3000) == [100, 1450, 1450]
+
+
+def test_allocate_favours_dense_emails():
+    granted = allocate([5000, 5000], [0.9, 0.3], budget=2000, floor=200)
+    assert sum(granted) <= 2000
+    assert granted[0] > granted[1] >= 200
+
+
+def test_small_day_sends_everything():
+    emails = [{"body": words(50)}, {"body": words(80)}]
+    plan = PromptPacker(budget=10000).pack_single(emails, [20, 20])
+    assert plan["bodies"] == [e["body"] for e in emails]
+    assert plan["stats"]["truncated"] == 0
+    assert plan["stats"]["prompts"] == 1
+
+
+def test_big_day_stays_within_budget():
+    emails = [{"body": words(2000)}, {"body": words(2000, distinct=False)}, {"body": words(30)}]
+    plan = PromptPacker(budget=2000, min_email_tokens=100).pack_single(emails, [20, 20, 20])
+    stats = plan["stats"]
+    assert stats["tokens_used"][0] <= 2000
+    assert stats["utilisation"] > 0.9
+    assert plan["bodies"][2] == emails[2]["body"]
+    assert len(plan["bodies"][0]) > len(plan["bodies"][1])
+    assert stats["truncated"] == 2 and stats["tokens_dropped"] > 0
+
+
+def test_first_fit_decreasing():
+    assert first_fit_decreasing([6, 5, 4, 3, 2], capacity=10) == [[0, 2], [1, 3, 4]]
+    assert first_fit_decreasing([1, 1, 1], capacity=10, max_items=2) == [[0, 1], [2]]
+
+
+def test_pack_groups_keeps_each_prompt_under_budget():
+    emails = [{"body": words(n)} for n in (300, 200, 600, 100, 50)]
+    plan = PromptPacker(budget=1000).pack_groups(emails, [10] * len(emails))
+    assert sorted(i for group in plan["groups"] for i in group) == [0, 1, 2, 3, 4]
+    assert all(used <= 1000 for used in plan["stats"]["tokens_used"])
+    assert plan["stats"]["truncated"] == 0
+
+
+def test_emails_that_cannot_fit_are_dropped_not_emptied():
+    emails = [{"body": words(200)}, {"body": words(200, distinct=False)}, {"body": words(200)}]
+    plan = PromptPacker(budget=300).pack_single(emails, [100, 100, 100])
+    assert plan["dropped"] == [1]
+    assert plan["groups"] == [[0, 2]]
+    assert all(plan["bodies"][i] for i in (0, 2))
+    assert plan["stats"]["dropped"] == 1 and plan["stats"]["truncated"] == 2
+    assert plan["stats"]["tokens_used"][0] <= 300
+
+
+def test_pack_groups_drops_emails_whose_headers_fill_a_prompt():
+    emails = [{"body": words(100)}, {"body": words(100)}]
+    plan = PromptPacker(budget=500).pack_groups(emails, [10, 480])
+    assert plan["dropped"] == [1]
+    assert plan["groups"] == [[0]]
+    assert plan["stats"]["dropped"] == 1
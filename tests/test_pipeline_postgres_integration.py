@@ -14,6 +14,7 @@ import os
 import sys
 from datetime import datetime
 from pathlib import Path
+from types import SimpleNamespace
 
 # Add src directory to Python path so imports work
 project_root = Path(__file__).parent.parent
@@ -40,7 +41,7 @@ def test_pipeline_persists_to_postgres(monkeypatch):
     init_db()
 
     # Stub fetcher to avoid Gmail dependency
-    def _fake_fetch():
+    def _fake_fetch(keywords=None):
         return [
             {
                 "from": "example@news.com",
@@ -85,7 +86,7 @@ def test_pipeline_persists_to_postgres(monkeypatch):
     from graph.nodes import fetch as fetch_node
     from processing import summarizer as summarizer_mod
 
-    monkeypatch.setattr(fetch_node.fetcher, "fetch_yesterday_newsletters", _fake_fetch)
+    monkeypatch.setattr(fetch_node, "_fetcher", SimpleNamespace(iter_newsletters=_fake_fetch))
     monkeypatch.setattr(summarizer_mod.NewsletterSummarizer, "summarize_batch", staticmethod(_fake_summarize_batch))
 
     # Run pipeline and persist
@@ -0,0 +1,117 @@
+"""
+Tests for the cross-day index of published items.
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from database.models import Base  # noqa: E402
+from database.repositories import ItemFingerprintRepository  # noqa: E402
+from processing.published import PublishedItemFilter, item_fingerprints  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def repository(engine):
+    return ItemFingerprintRepository(sessionmaker(bind=engine)())
+
+
+def item(title, url=""):
+    return {"title": title, "snippet": "", "url": url}
+
+
+def test_fingerprints_ignore_tracking_and_formatting():
+    a = item_fingerprints(item("New Model Tops Benchmark!", "https://www.example.com/post/?utm_source=x"))
+    b = item_fingerprints(item("new model tops benchmark", "http://example.com/post"))
+
+    assert a == b
+    assert item_fingerprints(item("Read more")) == []
+
+
+def test_repeats_within_the_window_are_dropped(repository):
+    published = PublishedItemFilter(repository, mode="drop", window_days=7)
+    published.record([item("Open model matches frontier systems", "https://example.com/a")])
+
+    kept = published.apply([
+        item("Open model matches frontier systems", "https://other.com/coverage"),
+        item("Something else entirely new", "https://example.com/a?utm_medium=email"),
+        item("A genuinely new story today", "https://example.com/b"),
+    ])
+
+    assert [i["title"] for i in kept] == ["A genuinely new story today"]
+
+
+def test_mark_mode_keeps_follow_ups_and_empties_no_sections(repository):
+    published = PublishedItemFilter(repository, mode="mark", window_days=7)
+    published.record([item("Open model matches frontier systems")])
+    summary = {"sections": [{"title": "R", "items": [item("Open model matches frontier systems")]}]}
+
+    stats = published.apply_summary(summary)
+
+    assert stats == {"items": 1, "dropped": 0, "follow_ups": 1}
+    assert summary["sections"][0]["items"][0]["follow_up"] is True
+
+
+def test_drop_mode_removes_emptied_sections(repository):
+    published = PublishedItemFilter(repository, mode="drop", window_days=7)
+    published.record([item("Open model matches frontier systems")])
+    summary = {"sections": [
+        {"title": "R", "items": [item("Open model matches frontier systems")]},
+        {"title": "I", "items": [item("Startup raises a big round")]},
+    ]}
+
+    stats = published.apply_summary(summary)
+
+    assert stats["dropped"] == 1
+    assert [section["title"] for section in summary["sections"]] == ["I"]
+
+
+def test_items_older_than_the_window_are_new_again(repository):
+    published = PublishedItemFilter(repository, mode="drop", window_days=7)
+    repository.record(item_fingerprints(item("Open model matches frontier systems")), datetime.utcnow() - timedelta(days=8))
+
+    assert published.published([item("Open model matches frontier systems")]) == [False]
+
+
+def test_one_query_per_batch(engine, repository):
+    published = PublishedItemFilter(repository, mode="drop", window_days=7)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    published.published([item(f"Story number {n} of the day", f"https://example.com/{n}") for n in range(50)])
+
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+
+
+def test_recurring_story_expires_from_its_first_publication(repository):
+    published = PublishedItemFilter(repository, mode="mark", window_days=7)
+    story = item("Open model matches frontier systems")
+    repository.record(item_fingerprints(story), datetime.utcnow() - timedelta(days=8))
+
+    # Published again today: recording it must not restart the window
+    repository.record(item_fingerprints(story), datetime.utcnow())
+
+    assert published.published([story]) == [False]
+
+
+def test_follow_ups_are_not_recorded(repository):
+    published = PublishedItemFilter(repository, mode="mark", window_days=7)
+    published.record([dict(item("Open model matches frontier systems"), follow_up=True)])
+
+    assert published.published([item("Open model matches frontier systems")]) == [False]
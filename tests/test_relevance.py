@@ -0,0 +1,104 @@
+"""
+Tests for the local TF-IDF relevance pre-filter.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from database.models import Base, NewsItem  # noqa: E402
+from database.repositories import NewsItemRepository  # noqa: E402
+from processing.cleaner import HTMLCleaner  # noqa: E402
+from processing.relevance import (  # noqa: E402
+    CentroidModel, RelevanceFilter, TfidfVectorizer, assign_sections, format_report, load_model,
+)
+
+HISTORY = [
+    ("Sparse mixture of experts scales to trillion parameters", "🔬 Research Highlights"),
+    ("New diffusion sampler halves image generation steps", "Research Highlights"),
+    ("Chipmaker raises funding for inference accelerators", "💼 Industry News"),
+    ("Hands-on course on retrieval augmented generation", "📚 Learning Resources"),
+    ("Call for workshop papers on efficient training", "📅 Events"),
+]
+
+PROMO = {"id": "p", "subject": "Your order has shipped", "body": "Receipt total $45. 20% off our summer sale."}
+ML = {"id": "m", "subject": "Mixture of experts", "body": "A new sparse mixture of experts paper on arxiv."}
+
+
+def test_vectorizer_rows_are_unit_length():
+    vectorizer = TfidfVectorizer().fit(["mixture of experts", "diffusion sampler steps", "experts agree"])
+    rows, cols, values = vectorizer.transform(["mixture experts experts", "unknown words only"])
+
+    assert np.allclose(np.bincount(rows, weights=values ** 2, minlength=2), [1.0, 0.0])
+    assert set(rows.tolist()) == {0}
+
+
+def test_history_steers_categories():
+    model = CentroidModel().fit(HISTORY)
+    similarities = model.similarities([
+        "sparse experts scale parameters",
+        "startup raises funding round for accelerators",
+    ])
+
+    assert [model.categories[i] for i in similarities.argmax(axis=1)] == ["research", "industry"]
+
+
+def test_drop_mode_removes_off_topic_emails():
+    emails = [dict(PROMO), dict(ML)]
+
+    kept, report = RelevanceFilter(CentroidModel().fit(HISTORY), mode="drop", threshold=0.05).apply(emails)
+
+    assert [email["id"] for email in kept] == ["m"]
+    assert report["dropped"] == 1 and report["low"] == 1
+    assert report["scores"][0]["score"] < 0.05 <= report["scores"][1]["score"]
+    assert "threshold 0.05" in format_report(report)
+
+
+def test_downweight_mode_trims_instead_of_dropping():
+    promo = dict(PROMO, body="Receipt total $45. " * 100)
+
+    kept, report = RelevanceFilter(
+        CentroidModel().fit(HISTORY), mode="downweight", threshold=0.05, low_max_chars=100
+    ).apply([promo])
+
+    assert kept == [promo]
+    assert len(promo["body"]) <= 103
+    assert report["dropped"] == 0 and report["low"] == 1
+
+
+def test_model_trains_from_stored_news_items():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([NewsItem(title=title, snippet="", category=category) for title, category in HISTORY])
+    session.add(NewsItem(title="Uncategorised", snippet=""))
+    session.flush()
+
+    model = load_model(NewsItemRepository(session))
+
+    assert model.training_size == len(HISTORY)
+
+
+def test_assign_sections_splits_paragraphs_between_categories():
+    html = (
+        "<p>Sparse mixture of experts paper.</p><p><a href='https://example.com/p'>Read more</a></p>"
+        "<p>Hands-on <b>tutorial</b> course on retrieval.</p>"
+        "<p>NeurIPS workshop deadline next week.</p>"
+    )
+    emails = [{"subject": "Weekly", "body": HTMLCleaner.extract_document(html)["text"]}]
+
+    assignments = assign_sections(emails, CentroidModel().fit(HISTORY))
+
+    assert assignments == {
+        "research": {0: "Sparse mixture of experts paper.\nRead more"},
+        "learning": {0: "Hands-on\ntutorial\ncourse on retrieval."},
+        "events": {0: "NeurIPS workshop deadline next week."},
+    }
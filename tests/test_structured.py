@@ -0,0 +1,173 @@
+"""
+Tests for tolerant JSON parsing and schema checks of model responses.
+"""
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from config.settings import settings  # noqa: E402
+from processing.llm import GeminiBackend  # noqa: E402
+from processing.reducer import SECTION_TITLES  # noqa: E402
+from processing.structured import DIGEST_SCHEMA, SECTION_SCHEMA, parse_json, problems  # noqa: E402
+from processing.summarizer import NewsletterSummarizer  # noqa: E402
+
+
+def test_parse_json_fast_path_ignores_fences_and_chatter():
+    assert parse_json('Here you go:\n```json\n{"a": [1, 2]}\n```') == ({"a": [1, 2]}, 0)
+
+
+def test_parse_json_drops_trailing_commas():
+    assert parse_json('{"sections": [{"title": "A", "items": [],},],}') == (
+        {"sections": [{"title": "A", "items": []}]}, 0
+    )
+
+
+def test_parse_json_closes_a_cut_off_string():
+    value, closed = parse_json('{"headline": "x", "sections": [{"title": "A", "items": [{"title": "a", "snippet": "ha')
+    assert value == {"headline": "x", "sections": [{"title": "A", "items": [{"title": "a", "snippet": "ha"}]}]}
+    assert closed == 5
+
+
+def test_parse_json_drops_an_unfinished_array_element():
+    value, closed = parse_json('{"items": [{"title": "a"}, {"ti')
+    assert value == {"items": [{"title": "a"}]}
+    assert closed == 2
+
+
+def test_parse_json_keeps_escaped_quotes():
+    assert parse_json('{"a": "say \\"hi\\"", "b": tr') == ({"a": 'say "hi"'}, 1)
+
+
+def test_parse_json_rejects_text_without_an_object():
+    with pytest.raises(ValueError):
+        parse_json("not json")
+
+
+def test_problems_reports_types_and_missing_keys():
+    assert problems({"title": "A", "items": [{"title": "x"}]}, SECTION_SCHEMA) == []
+    assert problems({"title": "A", "items": [{"snippet": "x"}]}, SECTION_SCHEMA) == ["$.items[0].title: missing"]
+    assert problems({"headline": 1, "sections": []}, DIGEST_SCHEMA) == ["$.headline: expected string"]
+
+
+def test_gemini_backend_passes_schema_only_when_structured():
+    seen = []
+
+    class Model:
+        def generate_content(self, prompt, **options):
+            seen.append(options)
+            return SimpleNamespace(text="{}")
+
+    GeminiBackend(Model()).generate("p", schema=DIGEST_SCHEMA)
+    GeminiBackend(Model(), structured=True).generate("p", schema=DIGEST_SCHEMA)
+
+    assert seen[0] == {}
+    assert seen[1]["generation_config"]["response_schema"] is DIGEST_SCHEMA
+
+
+class ScriptedModel:
+    """Replies to prompts in order from a list of canned texts, recording the prompts"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text=self.replies.pop(0))
+
+
+@pytest.fixture
+def single_mode(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_MODE", "single")
+    monkeypatch.setattr(settings, "SUMMARIZE_STREAM", False)
+    monkeypatch.setattr(settings, "LLM_CACHE_MODE", "off")
+    monkeypatch.setattr(settings, "STRUCTURED_REASKS", 1)
+
+
+def make_email():
+    return [{"id": "m1", "from": "A <a@example.com>", "subject": "S", "body": "Body text", "links": []}]
+
+
+def test_cut_off_digest_re_asks_only_for_missing_sections(single_mode):
+    research, industry = SECTION_TITLES["research"], SECTION_TITLES["industry"]
+    truncated = json.dumps({"headline": "H", "date": "2024-01-01", "sections": [
+        {"title": research, "items": [{"title": "Paper"}]},
+        {"title": industry, "items": [{"title": "Launch"}, {"title": "Fund"}]},
+    ]}, ensure_ascii=False)[:-20]
+    reask = json.dumps({"sections": [
+        {"title": industry, "items": [{"title": "Launch"}, {"title": "Funding round"}]},
+        {"title": SECTION_TITLES["events"], "items": []},
+    ]}, ensure_ascii=False)
+    model = ScriptedModel([truncated, reask])
+
+    summary = NewsletterSummarizer(model=model).summarize_batch(make_email())
+
+    assert len(model.prompts) == 2
+    requested = model.prompts[1].split("\n")[1]
+    assert research not in requested and industry in requested
+    assert [section["title"] for section in summary["sections"]] == [research, industry]
+    assert summary["sections"][1]["items"][1]["title"] == "Funding round"
+
+
+def test_malformed_section_is_re_asked_and_streamed_once(single_mode, monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_STREAM", True)
+    research, industry = SECTION_TITLES["research"], SECTION_TITLES["industry"]
+    first = json.dumps({"headline": "H", "sections": [
+        {"title": research, "items": [{"title": "Paper"}]},
+        {"title": industry, "items": "none"},
+    ]}, ensure_ascii=False)
+    reask = json.dumps({"sections": [{"title": industry, "items": [{"title": "Launch"}]}]}, ensure_ascii=False)
+
+    class StreamingScript(ScriptedModel):
+        def generate_content(self, prompt, stream=False):
+            reply = super().generate_content(prompt)
+            return iter([SimpleNamespace(text=reply.text)]) if stream else reply
+
+    sections = []
+    summary = NewsletterSummarizer(model=StreamingScript([first, reask])).summarize_batch(
+        make_email(), on_section=sections.append
+    )
+
+    assert [section["title"] for section in sections] == [research, industry]
+    assert sections == summary["sections"]
+
+
+def test_cut_off_map_response_re_asks_only_unreached_emails(single_mode, monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_MODE", "map_reduce")
+    monkeypatch.setattr(settings, "SUMMARIZE_GROUP_SIZE", 3)
+    emails = [
+        {"id": f"m{i}", "from": f"S{i} <s{i}@example.com>", "subject": f"S{i}", "body": f"Body {i}", "links": []}
+        for i in range(3)
+    ]
+    first = '{"items": [{"email": 0, "category": "research", "title": "Zero"}, {"email": 1, "category": "events", "title": "On'
+    reask = json.dumps({"items": [
+        {"email": 1, "category": "events", "title": "One"},
+        {"email": 2, "category": "learning", "title": "Two"},
+    ]})
+    model = ScriptedModel([first, reask, '{"headline": "H", "summary": ""}'])
+
+    summary = NewsletterSummarizer(model=model).summarize_batch(emails)
+
+    assert "EMAIL: 0" in model.prompts[0] and "EMAIL: 0" not in model.prompts[1]
+    assert "EMAIL: 1" in model.prompts[1] and "EMAIL: 2" in model.prompts[1]
+    titles = [item["title"] for section in summary["sections"] for item in section["items"]]
+    assert sorted(titles) == ["One", "Two", "Zero"]
+
+
+def test_no_reask_when_disabled(single_mode, monkeypatch):
+    monkeypatch.setattr(settings, "STRUCTURED_REASKS", 0)
+    model = ScriptedModel(['{"headline": "H", "sections": [{"title": "A", "items": [{"title": "x"}]}, {"tit'])
+
+    summary = NewsletterSummarizer(model=model).summarize_batch(make_email())
+
+    assert len(model.prompts) == 1
+    assert summary["sections"] == [{"title": "A", "items": [{"title": "x"}]}]
@@ -0,0 +1,314 @@
+"""
+Tests for map-reduce summarization against a fake model.
+"""
+import json
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add src directory to Python path so imports work
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from cache.disk import DiskCache  # noqa: E402
+from config.settings import settings  # noqa: E402
+from processing.cleaner import HTMLCleaner  # noqa: E402
+from processing.llm_cache import ReplayMiss, ResponseCache  # noqa: E402
+from processing.reducer import build_sections, merge_items  # noqa: E402
+from processing.summarizer import NewsletterSummarizer  # noqa: E402
+
+
+class FakeModel:
+    """Answers map prompts with one item per EMAIL label, and headline prompts with a fixed headline"""
+
+    def __init__(self, delay=0.0, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if '"headline"' in prompt and "EMAIL:" not in prompt:
+                return SimpleNamespace(text=json.dumps({"headline": "Big day", "summary": "Lots happened."}))
+            numbers = [int(n) for n in re.findall(r"^EMAIL: (\d+)$", prompt, re.MULTILINE)]
+            if self.fail_on in numbers:
+                raise RuntimeError("model unavailable")
+            items = [
+                {"email": n, "category": "research" if n % 2 else "industry",
+                 "title": f"Story {n % 3}", "url": f"https://news.example/{n % 3}", "summary": f"s{n}"}
+                for n in numbers
+            ]
+            return SimpleNamespace(text="```json\n" + json.dumps({"items": items}) + "\n```")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def make_emails(count):
+    return [
+        {"id": f"msg{i}", "from": f"Letter {i} <l{i}@example.com>", "subject": f"Issue {i}", "body": f"body {i}"}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def map_reduce_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_MODE", "map_reduce")
+    monkeypatch.setattr(settings, "SUMMARIZE_GROUP_SIZE", 2)
+    monkeypatch.setattr(settings, "SUMMARIZE_MAX_CONCURRENCY", 3)
+    monkeypatch.setattr(settings, "LLM_CACHE_MODE", "off")
+
+
+def test_map_reduce_merges_attributes_and_sections():
+    model = FakeModel()
+    summary = NewsletterSummarizer(model=model).summarize_batch(make_emails(6))
+
+    # 3 map calls for 6 emails, plus the headline call
+    assert model.calls == 4
+    assert summary["headline"] == "Big day"
+    assert [s["title"] for s in summary["sections"]] == ["🔬 Research Highlights", "💼 Industry News"]
+    items = [item for section in summary["sections"] for item in section["items"]]
+    # Stories 0, 1 and 2 each appear twice and are merged
+    assert sorted(item["title"] for item in items) == ["Story 0", "Story 1", "Story 2"]
+    story_0 = next(item for item in items if item["title"] == "Story 0")
+    assert story_0["source_ids"] == ["msg0", "msg3"]
+    assert story_0["source"] == "Letter 0"
+
+
+def test_map_calls_run_concurrently_under_the_cap():
+    model = FakeModel(delay=0.05)
+    started = time.perf_counter()
+    NewsletterSummarizer(model=model).summarize_batch(make_emails(12))
+
+    assert model.max_in_flight == 3
+    # 6 map calls in two waves of 3, then the headline
+    assert time.perf_counter() - started < 0.05 * 5
+
+
+def test_failed_group_is_skipped():
+    summary = NewsletterSummarizer(model=FakeModel(fail_on=2)).summarize_batch(make_emails(4))
+    ids = {i for section in summary["sections"] for item in section["items"] for i in item["source_ids"]}
+    assert ids == {"msg0", "msg1"}
+
+
+def test_merge_prefers_first_position_and_longest_summary():
+    merged = merge_items([
+        {"title": "A", "url": "https://x.example/a/", "summary": "short", "source_ids": ["1"]},
+        {"title": "A (again)", "url": "http://x.example/a", "summary": "a longer summary", "source_ids": ["2"]},
+        {"title": "  ", "summary": "untitled is dropped"},
+    ])
+    assert merged == [{"title": "A", "url": "https://x.example/a/", "summary": "a longer summary", "source_ids": ["1", "2"]}]
+    assert build_sections([{"title": "B", "category": "unknown"}]) == [{"title": "Other", "items": [{"title": "B"}]}]
+
+
+def make_cache(tmp_path, replay_only=False):
+    store = DiskCache(str(tmp_path / "llm.sqlite"), max_bytes=1024 * 1024, ttl_seconds=3600)
+    return ResponseCache(store, replay_only=replay_only)
+
+
+def test_rerun_replays_cached_responses(tmp_path):
+    emails = make_emails(4)
+    first_model = FakeModel()
+    first = NewsletterSummarizer(model=first_model, cache=make_cache(tmp_path)).summarize_batch(emails)
+
+    second_model = FakeModel()
+    second = NewsletterSummarizer(model=second_model, cache=make_cache(tmp_path)).summarize_batch(emails)
+
+    assert first_model.calls == 3
+    assert second_model.calls == 0
+    assert second == first
+
+
+def test_replay_mode_raises_on_miss_instead_of_calling_the_model(tmp_path):
+    model = FakeModel()
+    with pytest.raises(ReplayMiss):
+        NewsletterSummarizer(model=model, cache=make_cache(tmp_path, replay_only=True)).summarize_batch(make_emails(2))
+    assert model.calls == 0
+
+
+def test_unparseable_responses_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_MODE", "single")
+    cache = make_cache(tmp_path)
+    broken = SimpleNamespace(generate_content=lambda prompt: SimpleNamespace(text="not json"))
+    with pytest.raises(ValueError):
+        NewsletterSummarizer(model=broken, cache=cache).summarize_batch(make_emails(1))
+    assert len(cache.store) == 0
+
+
+class MemoryExtractions:
+    """In-memory stand-in for ExtractionStore"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def get_many(self, keys):
+        return {key: self.rows[key] for key in keys if key in self.rows}
+
+    def save_many(self, extractions):
+        for message_id, content_hash, items in extractions:
+            self.rows[(message_id, content_hash)] = items
+
+
+def test_incremental_run_only_sends_new_emails():
+    store = MemoryExtractions()
+    model = FakeModel()
+    summarizer = NewsletterSummarizer(model=model)
+    summarizer.summarize_batch(make_emails(4), store)
+    assert model.calls == 2 + 1
+    assert len(store.rows) == 4
+
+    model.calls = 0
+    emails = make_emails(6)
+    emails[1]["body"] = "edited body"
+    summary = summarizer.summarize_batch(emails, store)
+
+    # msg1 (changed), msg4 and msg5 fit in two map calls, plus the headline
+    assert model.calls == 2 + 1
+    ids = {i for section in summary["sections"] for item in section["items"] for i in item["source_ids"]}
+    assert ids == {f"msg{i}" for i in range(6)}
+
+
+def test_extractions_are_keyed_on_the_cleaned_source_body():
+    store = MemoryExtractions()
+    model = FakeModel()
+    summarizer = NewsletterSummarizer(model=model)
+    emails = [dict(email, source_body=email["body"]) for email in make_emails(2)]
+    summarizer.summarize_batch(emails, store)
+
+    # Dedup/boilerplate stripping trimmed the body differently this run; the source is unchanged
+    model.calls = 0
+    emails[0]["body"] = "body 0 without the story another newsletter also covered"
+    summarizer.summarize_batch(emails, store)
+    assert model.calls == 1
+
+    emails[1]["source_body"] = "body 1, new edition"
+    model.calls = 0
+    summarizer.summarize_batch(emails, store)
+    assert model.calls == 1 + 1
+
+
+def test_failed_emails_are_not_stored():
+    store = MemoryExtractions()
+    NewsletterSummarizer(model=FakeModel(fail_on=2)).summarize_batch(make_emails(4), store)
+    assert sorted(message_id for message_id, _ in store.rows) == ["msg0", "msg1"]
+
+
+def test_extraction_repository_round_trip():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database.models import Base
+    from database.repositories import EmailExtractionRepository
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    repository = EmailExtractionRepository(session)
+
+    repository.save_many([("m1", "h1", [{"title": "A"}]), ("m2", "h2", [])])
+    repository.save_many([("m1", "h1", [{"title": "B"}])])
+
+    assert repository.get_many([("m1", "h1"), ("m2", "h2"), ("m1", "other")]) == {
+        ("m1", "h1"): [{"title": "B"}],
+        ("m2", "h2"): [],
+    }
+
+
+class StreamingModel:
+    """Streams a fixed digest in small chunks, recording what the callbacks saw mid-stream"""
+
+    def __init__(self, digest):
+        self.text = json.dumps(digest)
+        self.chunks_sent = 0
+
+    def generate_content(self, prompt, stream=False):
+        assert stream
+        for start in range(0, len(self.text), 16):
+            self.chunks_sent += 1
+            yield SimpleNamespace(text=self.text[start:start + 16])
+
+
+def test_streaming_reports_sections_before_generation_finishes(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_MODE", "single")
+    monkeypatch.setattr(settings, "SUMMARIZE_STREAM", True)
+    digest = {
+        "headline": "H",
+        "date": "2024-05-01",
+        "sections": [
+            {"title": "🔬 Research Highlights", "items": [{"title": "A"}, {"title": "B"}]},
+            {"title": "💼 Industry News", "items": [{"title": "C"}]},
+        ],
+    }
+    model = StreamingModel(digest)
+    events = []
+
+    summary = NewsletterSummarizer(model=model).summarize_batch(
+        make_emails(2),
+        on_item=lambda index, item: events.append(("item", index, item["title"], model.chunks_sent)),
+        on_section=lambda section: events.append(("section", section["title"], model.chunks_sent)),
+    )
+
+    assert summary == digest
+    assert [event[:-1] for event in events] == [
+        ("item", 0, "A"), ("item", 0, "B"), ("section", "🔬 Research Highlights"),
+        ("item", 1, "C"), ("section", "💼 Industry News"),
+    ]
+    total_chunks = -(-len(model.text) // 16)
+    assert events[2][-1] < total_chunks
+
+
+def test_section_mode_runs_one_concurrent_call_per_section(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARIZE_MODE", "sections")
+    model = FakeModel(delay=0.05)
+    emails = [
+        {"id": "r", "from": "R <r@example.com>", "subject": "Papers",
+         "body": HTMLCleaner.extract("<p>A new arxiv paper on transformer reasoning benchmarks.</p>"
+                                     "<p>Startup raises funding for <b>gpu chips</b>.</p>")},
+        {"id": "e", "from": "E <e@example.com>", "subject": "Dates",
+         "body": "NeurIPS workshop deadline and conference registration."},
+    ]
+
+    started = time.perf_counter()
+    summary = NewsletterSummarizer(model=model).summarize_batch(emails)
+
+    # research, industry and events calls in parallel, then the headline
+    assert model.calls == 4
+    assert model.max_in_flight == 3
+    assert time.perf_counter() - started < 0.05 * 3
+    # The fake answers email 0's research and industry calls with the same story, which is merged
+    titles = [section["title"] for section in summary["sections"]]
+    assert titles == ["🔬 Research Highlights", "📅 Events"]
+    assert summary["sections"][1]["items"][0]["source_ids"] == ["e"]
+
+
+def test_dedup_attribution_is_a_prompt_note_not_content():
+    email = dict(make_emails(1)[0], also_covered_by=["The Batch", "Import AI"])
+    rendered = NewsletterSummarizer(model=FakeModel())._combine_emails([email], ["body 0"])
+    assert "ALSO COVERED BY: The Batch, Import AI\nCONTENT:\nbody 0\n" in rendered
+
+
+def test_refresh_overview_uses_the_remaining_items():
+    model = FakeModel()
+    summary = {"headline": "Dropped story", "summary": "About the dropped story.",
+               "sections": [{"title": "Research", "items": [{"title": "Kept story"}]}]}
+
+    NewsletterSummarizer(model=model).refresh_overview(summary)
+
+    assert (summary["headline"], summary["summary"]) == ("Big day", "Lots happened.")
+    assert model.calls == 1
+    empty = NewsletterSummarizer(model=model).refresh_overview({"headline": "Dropped story", "sections": []})
+    assert empty["headline"] == "No newsletters today"